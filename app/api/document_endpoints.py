@@ -1,11 +1,12 @@
 # app/api/document_endpoints.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, status, BackgroundTasks
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Request, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from typing import List, Optional, Dict, Any
 import os
-import tempfile
+import json
+import uuid
 import asyncio
 import logging
 from datetime import datetime
@@ -13,59 +14,130 @@ from datetime import datetime
 # Configure logging
 logger = logging.getLogger(__name__)
 
-from app.database.database import get_db
+from app.database.database import get_db, SessionLocal
 from app.database.models import DocumentType, ValidationStatus
 from app.models.schemas import ImportedDocumentCreate, ImportedDocument as ImportedDocumentSchema
-from app.models.schemas import ValidationQueueCreate
-from app.parsers import ExcelParser, PDFParser, WordParser
-from app.crud.document import create_document, get_document, get_documents, update_document_status, delete_document
-from app.crud.validation import create_validation_item
-from app.core.mcp_client import MCPClient
-from app.core.mcp_config import load_mcp_config
+from app.models.schemas import ProcessingJob as ProcessingJobSchema, BatchProcessRequest
+from app.parsers import PDFParser, parser_registry
+from app.parsers.pdf_parser import parse_page_range
+from app.crud.document import (
+    create_document, get_document, get_documents, update_document_status, delete_document,
+    is_file_path_referenced, get_document_by_hash, get_documents_for_processing
+)
+from app.crud.mcp_result import delete_mcp_results
+from app.crud.parse_result import delete_parse_results
+from app.crud.job import get_job, get_jobs_for_document, get_active_job, cancel_job, get_batch_summary, SUCCEEDED as JOB_SUCCEEDED
+from app.core.mcp_client import MCPClient, get_mcp_client
+from app.core.mcp_dispatcher import MCPDispatcher, CircuitOpenError, get_mcp_dispatcher
+from app.core.job_queue import job_queue
+from app.core.blob_store import blob_store, BlobTooLargeError
+from app.core.document_processing import open_document_content, get_parser_class, get_cached_result
+from app.core.progress import progress_broker, TERMINAL_EVENTS
 
 router = APIRouter(prefix="/documents", tags=["documents"])
 templates = Jinja2Templates(directory="app/templates")
 
-# Define supported file types
-SUPPORTED_EXTENSIONS = {
-    ".xlsx": DocumentType.EXCEL,
-    ".xls": DocumentType.EXCEL,
-    ".pdf": DocumentType.PDF,
-    ".doc": DocumentType.WORD,
-    ".docx": DocumentType.WORD
-}
+# What to do when an upload matches an earlier file by content hash
+DUPLICATE_POLICIES = ("link", "reuse", "allow")
+
+MAX_UPLOAD_MB = int(os.getenv("MAX_UPLOAD_MB", "100"))
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Seconds between keepalive comments on an idle event stream; each one also
+# re-reads the job from the database in case it runs in another process
+EVENT_KEEPALIVE_SECONDS = 15
+
+# Seconds POST /documents/{id}/process waits for its job before answering 202 with the job ID
+PROCESS_WAIT_SECONDS = float(os.getenv("PROCESS_WAIT_SECONDS", "60"))
 
 
 @router.post("/upload", response_model=ImportedDocumentSchema)
 async def upload_document(
     file: UploadFile = File(...),
     description: Optional[str] = Form(None),
+    on_duplicate: str = Form("link"),
     db: Session = Depends(get_db)
 ):
-    """Upload a document and store it in the database."""
-    # Check file extension
+    """
+    Upload a document and store it in the database.
+    
+    on_duplicate controls what happens when a file with the same content was
+    uploaded before: "link" (default) records the upload as a duplicate that
+    shares the original's processing results, "reuse" returns the original
+    document without creating a new one, and "allow" stores an independent copy.
+    
+    The parser, and so the document type, is chosen by the parser registry
+    from the file extension and the first bytes of the file.
+    """
     filename = file.filename
     file_extension = os.path.splitext(filename)[1].lower()
     
-    if file_extension not in SUPPORTED_EXTENSIONS:
+    if on_duplicate not in DUPLICATE_POLICIES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Unsupported file format. Supported formats: {', '.join(SUPPORTED_EXTENSIONS.keys())}"
+            detail=f"Invalid on_duplicate option. Valid options: {', '.join(DUPLICATE_POLICIES)}"
         )
     
-    # Read file content
-    file_content = await file.read()
-      # Create document record
+    # Stream the upload into the blob store in chunks, hashing as we go,
+    # so memory use stays constant whatever the file size
+    try:
+        with blob_store.open_writer(max_bytes=MAX_UPLOAD_MB * 1024 * 1024) as writer:
+            chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            if not chunk:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail="Uploaded file is empty"
+                )
+            parser_class = parser_registry.detect(filename, chunk)
+            if parser_class is None and parser_registry.for_extension(file_extension):
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"File content does not match the {file_extension} format"
+                )
+            if parser_class is None:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Unsupported file format. Supported formats: {', '.join(parser_registry.extensions())}"
+                )
+            
+            while chunk:
+                await asyncio.to_thread(writer.write, chunk)
+                chunk = await file.read(UPLOAD_CHUNK_SIZE)
+            
+            blob_key = await asyncio.to_thread(writer.commit)
+    except BlobTooLargeError:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"File exceeds the maximum upload size of {MAX_UPLOAD_MB} MB"
+        )
+    
+    # The blob key is the SHA-256 of the content, so it doubles as the duplicate check
+    original = get_document_by_hash(db, blob_key) if on_duplicate != "allow" else None
+    if original and on_duplicate == "reuse":
+        return original
+    
+    # Create document record; the content stays in the blob store under its key
     document = ImportedDocumentCreate(
         filename=filename,
-        document_type=SUPPORTED_EXTENSIONS[file_extension].value.upper(),  # Convert to upper case to match enum
-        file_data=file_content,
+        document_type=parser_class.DOCUMENT_TYPE,
+        file_path=blob_key,
+        content_hash=blob_key,
+        duplicate_of_id=original.id if original else None,
         processing_notes=description
     )
     
     # Store in database
     try:
         db_document = create_document(db, document)
+        if original:
+            # Share the original's results instead of parsing the same file again
+            db_document = update_document_status(
+                db,
+                db_document.id,
+                processed=original.processed,
+                processing_status=original.processing_status,
+                processing_notes=f"Duplicate of document {original.id} ({original.filename})"
+            )
         return db_document
     except Exception as e:
         raise HTTPException(
@@ -97,6 +169,80 @@ def get_document_list(
     return get_documents(db, skip, limit, doc_type_enum, processed)
 
 
+@router.get("/mcp-status")
+async def check_mcp_status(
+    mcp_client: MCPClient = Depends(get_mcp_client),
+    dispatcher: MCPDispatcher = Depends(get_mcp_dispatcher)
+):
+    """
+    Check the connection status with the MCP server.
+    
+    The response includes the dispatcher's circuit state, in-flight
+    analyses and latency statistics. Declared before /{document_id} so the
+    path is not taken for a document ID.
+    """
+    try:
+        # Check server availability; failed pings count towards opening the circuit
+        server_available = await dispatcher.run(mcp_client.ping, is_failure=lambda ok: not ok, limited=False)
+        
+        if server_available:
+            return {
+                "status": "connected",
+                "server_url": mcp_client.server_url,
+                "message": "Successfully connected to MCP server",
+                "dispatcher": dispatcher.stats()
+            }
+        else:
+            return {
+                "status": "disconnected",
+                "server_url": mcp_client.server_url,
+                "message": "Failed to connect to MCP server",
+                "dispatcher": dispatcher.stats()
+            }
+    
+    except CircuitOpenError as e:
+        return {
+            "status": "circuit_open",
+            "server_url": mcp_client.server_url,
+            "message": str(e),
+            "dispatcher": dispatcher.stats()
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "message": f"Error connecting to MCP server: {str(e)}",
+            "error": str(e)
+        }
+
+
+@router.post("/mcp-callback/{token}")
+async def receive_mcp_callback(
+    token: str,
+    payload: Dict[str, Any],
+    mcp_client: MCPClient = Depends(get_mcp_client)
+):
+    """
+    Receive a task notification from the MCP server.
+    
+    The token in the URL was handed to the server with the analysis request
+    (see callback_base_url in the MCP configuration). Notifications for
+    requests that are no longer waiting are rejected; the analysis will
+    have polled for the result instead.
+    """
+    if not mcp_client.deliver_callback(token, payload):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No analysis is waiting for this callback"
+        )
+    return {"status": "accepted"}
+
+
+@router.delete("/mcp-cache")
+def clear_mcp_cache(db: Session = Depends(get_db)):
+    """Drop every cached MCP analysis, e.g. after the server's model was retrained."""
+    return {"deleted": delete_mcp_results(db)}
+
+
 @router.get("/{document_id}", response_model=ImportedDocumentSchema)
 def get_document_by_id(document_id: int, db: Session = Depends(get_db)):
     """Get a document by ID."""
@@ -109,10 +255,13 @@ def get_document_by_id(document_id: int, db: Session = Depends(get_db)):
     return db_document
 
 
-@router.post("/{document_id}/process")
-def process_document(document_id: int, db: Session = Depends(get_db)):
-    """Process a document to extract rules, metadata, and images."""
-    # Get document from database
+@router.get("/{document_id}/pages")
+def get_document_pages(
+    document_id: int,
+    pages: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Extract per-page text from a PDF document, optionally for a page range like "5-7"."""
     db_document = get_document(db, document_id)
     if not db_document:
         raise HTTPException(
@@ -120,89 +269,440 @@ def process_document(document_id: int, db: Session = Depends(get_db)):
             detail=f"Document with ID {document_id} not found"
         )
     
-    # Check if already processed
-    if db_document.processed:
-        return {"message": "Document already processed", "status": db_document.processing_status}
+    if db_document.document_type != DocumentType.PDF:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Page extraction is only available for PDF documents"
+        )
     
-    # Process based on document type
     try:
-        # Save file to temporary location for processing
-        # Get proper file extension for the temporary file
-        file_extension = os.path.splitext(db_document.filename)[1].lower()
-        if not file_extension:
-            # Default to .xlsx for Excel files
-            if db_document.document_type == DocumentType.EXCEL:
-                file_extension = '.xlsx'
-            elif db_document.document_type == DocumentType.PDF:
-                file_extension = '.pdf'
-            elif db_document.document_type == DocumentType.WORD:
-                file_extension = '.docx'
+        page_range = parse_page_range(pages) if pages else None
+        with open_document_content(db_document) as content:
+            # Extract serially; a request thread should not start a process pool
+            parser = PDFParser(file_content=content, page_range=page_range, max_workers=1)
+            page_texts = parser.extract_page_texts()
+            page_count = len(parser.pdf.pages)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "document_id": document_id,
+        "page_count": page_count,
+        "pages": page_texts
+    }
+
+
+def _queue_processing(document_id: int, kind: str, force: bool, notes: str) -> Dict[str, Any]:
+    """
+    Queue a processing job for a document, or find the one already queued.
+
+    Runs in its own session, so callers on the event loop can run it in a
+    thread and wait for the job without holding a connection.
+
+    Returns:
+        Dictionary with the processed document's ID and job ID, or with
+        "already_processed" set to its status when there is nothing to do
+    """
+    db = SessionLocal()
+    try:
+        db_document = get_document(db, document_id)
+        if not db_document:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Document with ID {document_id} not found"
+            )
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_extension) as temp_file:
-            temp_file.write(db_document.file_data)
-            temp_path = temp_file.name
+        # Duplicates are processed through their original, whose results they share
+        if db_document.duplicate_of_id:
+            db_document = db_document.duplicate_of
+            document_id = db_document.id
         
-        processing_result = {"rules": [], "metadata": {}, "images": []}
+        # Check if already processed
+        if db_document.processed and not force:
+            return {"already_processed": db_document.processing_status}
         
-        # Process with appropriate parser
-        if db_document.document_type == DocumentType.EXCEL:
-            parser = ExcelParser(file_path=temp_path)
-            processing_result = parser.process()
-        elif db_document.document_type == DocumentType.PDF:
-            parser = PDFParser(file_path=temp_path)
-            processing_result = parser.process()
-        elif db_document.document_type == DocumentType.WORD:
-            parser = WordParser(file_path=temp_path)
-            processing_result = parser.process()
+        # Reuse a job that is already queued or running for this document
+        db_job = get_active_job(db, document_id, kind=kind)
+        if not db_job:
+            update_document_status(
+                db,
+                document_id,
+                processed=False,
+                processing_status="processing",
+                processing_notes=notes
+            )
+            # Queued jobs survive restarts and are retried on failure
+            db_job = job_queue.enqueue(db, document_id, kind=kind)
+        return {"document_id": document_id, "job_id": db_job.id}
+    finally:
+        db.close()
+
+
+@router.post("/{document_id}/process")
+async def process_document(document_id: int, wait: bool = True, force: bool = False):
+    """
+    Process a document to extract rules, metadata, and images.
+    
+    Parsing is queued as a durable job and runs in a worker process. With
+    wait=false the job ID is returned immediately, as it is when the job
+    has not finished within PROCESS_WAIT_SECONDS; progress is available
+    from /documents/{id}/jobs. force=true reprocesses a processed document;
+    unchanged files are served from the parse result cache.
+    """
+    queued_job = await asyncio.to_thread(
+        _queue_processing, document_id, "parse", force, "Document queued for processing..."
+    )
+    if "already_processed" in queued_job:
+        return {"message": "Document already processed", "status": queued_job["already_processed"]}
+    
+    queued = JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={
+            "message": "Document queued for processing",
+            "status": "processing",
+            **queued_job
+        }
+    )
+    if not wait:
+        return queued
+    
+    # Workers may be busy, stopped or in another process; answer like wait=false then
+    try:
+        db_job = await asyncio.wait_for(job_queue.wait(queued_job["job_id"]), PROCESS_WAIT_SECONDS)
+    except asyncio.TimeoutError:
+        return queued
+    
+    if db_job.status != JOB_SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to process document: {db_job.last_error}"
+        )
+    
+    return {
+        "message": "Document processed successfully",
+        "status": "success",
+        "job_id": db_job.id,
+        **(db_job.result or {})
+    }
+
+
+@router.post("/batch-process", status_code=status.HTTP_202_ACCEPTED)
+async def batch_process_documents(request: BatchProcessRequest, db: Session = Depends(get_db)):
+    """
+    Queue many documents for processing in one call.
+    
+    Documents are selected by ID or by a filter ("unprocessed" or "failed")
+    and queued as one batch. The job queue works through them with bounded
+    concurrency; progress is available from /documents/batches/{batch_id}.
+    """
+    if request.document_ids is None and not request.filter:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide document_ids or a filter"
+        )
+    
+    try:
+        documents = get_documents_for_processing(
+            db, request.document_ids, request.filter, request.document_type
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    
+    skipped = []
+    if request.document_ids is not None:
+        found = {db_document.id for db_document in documents}
+        skipped.extend(
+            {"document_id": document_id, "reason": "not found"}
+            for document_id in request.document_ids if document_id not in found
+        )
+    
+    batch_id = uuid.uuid4().hex
+    queued = []
+    seen = set()
+    for db_document in documents:
+        # Duplicates are processed through their original
+        target = db_document.duplicate_of or db_document
+        if target.id in seen:
+            continue
+        seen.add(target.id)
         
-        # Clean up temp file
-        os.unlink(temp_path)
+        if target.processed and not request.force:
+            skipped.append({"document_id": target.id, "reason": "already processed"})
+            continue
+        active_job = get_active_job(db, target.id, kind=request.kind)
+        if active_job:
+            skipped.append({"document_id": target.id, "reason": "already queued", "job_id": active_job.id})
+            continue
         
-        # Update document status in database
-        update_document_status(
-            db, 
-            document_id, 
-            processed=True,
-            processing_status="success",
-            processing_notes=f"Extracted {len(processing_result['rules'])} rules, {len(processing_result['images'])} images"
+        target.processed = False
+        target.processing_status = "processing"
+        target.processing_notes = f"Queued in batch {batch_id}"
+        db_job = job_queue.enqueue(db, target.id, kind=request.kind, commit=False, batch_id=batch_id)
+        queued.append({"document_id": target.id, "job_id": db_job.id})
+    
+    # One transaction for the whole batch
+    db.commit()
+    job_queue.notify()
+    
+    if not queued:
+        return JSONResponse(
+            status_code=status.HTTP_200_OK,
+            content={"message": "No documents to process", "batch_id": None, "queued": [], "skipped": skipped}
         )
-        
+    
+    return {
+        "message": f"Queued {len(queued)} documents for processing",
+        "batch_id": batch_id,
+        "queued": queued,
+        "skipped": skipped
+    }
+
+
+@router.get("/batches/{batch_id}")
+def get_batch_status(batch_id: str, db: Session = Depends(get_db)):
+    """Get the aggregate progress, throughput and per-document outcomes of a batch."""
+    summary = get_batch_summary(db, batch_id)
+    if summary is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Batch {batch_id} not found"
+        )
+    return summary
+
+
+@router.get("/{document_id}/extracted-rules")
+def get_extracted_rules(
+    document_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Preview the rules extracted from a document, served from the parse result cache."""
+    db_document = get_document(db, document_id)
+    if not db_document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {document_id} not found"
+        )
+    
+    parser_class = get_parser_class(db_document.document_type.value)
+    result = get_cached_result(db_document.content_hash, parser_class) if parser_class else None
+    if result is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document {document_id} has not been parsed by the current parser version"
+        )
+    
+    return {
+        "document_id": document_id,
+        "parser": parser_class.__name__,
+        "parser_version": parser_class.PARSER_VERSION,
+        "total_rules": len(result["rules"]),
+        "rules": result["rules"][skip:skip + limit],
+        "metadata": result["metadata"],
+        "images": result["images"],
+        "image_count": result["image_count"]
+    }
+
+
+@router.get("/{document_id}/jobs")
+def get_document_jobs(document_id: int, db: Session = Depends(get_db)):
+    """Get the processing jobs of a document, newest first."""
+    if not get_document(db, document_id):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {document_id} not found"
+        )
+    return {
+        "document_id": document_id,
+        "jobs": [ProcessingJobSchema.model_validate(job) for job in get_jobs_for_document(db, document_id)]
+    }
+
+
+@router.get("/{document_id}/jobs/{job_id}", response_model=ProcessingJobSchema)
+def get_document_job(document_id: int, job_id: int, db: Session = Depends(get_db)):
+    """Get a single processing job."""
+    db_job = get_job(db, job_id)
+    if not db_job or db_job.document_id != document_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found for document {document_id}"
+        )
+    return db_job
+
+
+@router.post("/{document_id}/jobs/{job_id}/cancel")
+def cancel_document_job(document_id: int, job_id: int, db: Session = Depends(get_db)):
+    """Cancel a queued or running processing job."""
+    db_job = get_job(db, job_id)
+    if not db_job or db_job.document_id != document_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job {job_id} not found for document {document_id}"
+        )
+    if not cancel_job(db, job_id):
+        db.refresh(db_job)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Job {job_id} has already finished with status {db_job.status}"
+        )
+    
+    # Stop the job if it runs in this process; other processes notice when renewing the lease
+    job_queue.cancel_running(job_id)
+    update_document_status(
+        db,
+        document_id,
+        processed=False,
+        processing_status="cancelled",
+        processing_notes="Processing was cancelled"
+    )
+    progress_broker.publish(document_id, "cancelled", job_id=job_id)
+    return {"message": "Job cancelled", "job_id": job_id}
+
+
+def _read_job_state(document_id: int, job_id: Optional[int]) -> Dict[str, Any]:
+    """Read the document status and the watched job (or the active one) from the database."""
+    db = SessionLocal()
+    try:
+        db_document = get_document(db, document_id)
+        db_job = get_job(db, job_id) if job_id is not None else get_active_job(db, document_id)
         return {
-            "message": "Document processed successfully",
-            "status": "success",
-            "rules_extracted": len(processing_result['rules']),
-            "images_extracted": len(processing_result['images']),
-            "metadata": processing_result['metadata']
+            "document_id": document_id,
+            "event": "state",
+            "processing_status": db_document.processing_status if db_document else None,
+            "processing_notes": db_document.processing_notes if db_document else None,
+            "job_id": db_job.id if db_job else None,
+            "job_status": db_job.status if db_job else None,
+            "result": db_job.result if db_job else None,
+            "error": db_job.last_error if db_job else None
         }
-        
-    except Exception as e:
-        # Update document with error status
-        update_document_status(
-            db, 
-            document_id, 
-            processed=False,
-            processing_status="failed",
-            processing_notes=f"Processing error: {str(e)}"
-        )
-        
+    finally:
+        db.close()
+
+
+def _format_event(payload: Dict[str, Any]) -> str:
+    return f"event: {payload['event']}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@router.get("/{document_id}/events")
+async def stream_document_events(
+    document_id: int,
+    request: Request,
+    job_id: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Stream processing progress of a document as Server-Sent Events.
+    
+    The stream opens with a "state" event holding the current document and
+    job status, followed by "started", "progress", "cached" and "retrying"
+    events, and closes after "succeeded", "failed" or "cancelled".
+    
+    Args:
+        document_id: Document to watch
+        job_id: Only forward events of this job
+    """
+    if not get_document(db, document_id):
         raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Failed to process document: {str(e)}"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {document_id} not found"
         )
+    if job_id is not None:
+        db_job = get_job(db, job_id)
+        if not db_job or db_job.document_id != document_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Job {job_id} not found for document {document_id}"
+            )
+    
+    async def event_stream():
+        # Subscribe before reading the state so no event falls in between
+        queue = progress_broker.subscribe(document_id)
+        try:
+            state = await asyncio.to_thread(_read_job_state, document_id, job_id)
+            yield "retry: 3000\n" + _format_event(state)
+            if job_id is not None and state["job_status"] in TERMINAL_EVENTS:
+                # The job finished before the client subscribed, e.g. on a cache hit
+                yield _format_event({**state, "event": state["job_status"]})
+                return
+            
+            # Without a job_id, follow the active job or the next one to start
+            watched_job_id = state["job_id"]
+            last_event = progress_broker.last_event(document_id)
+            if last_event and last_event["event"] == "progress" and last_event.get("job_id") == watched_job_id:
+                yield _format_event(last_event)
+            
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    yield ": keepalive\n\n"
+                    if watched_job_id is not None:
+                        # Catch jobs finished by a worker in another process
+                        state = await asyncio.to_thread(_read_job_state, document_id, watched_job_id)
+                        if state["job_status"] in TERMINAL_EVENTS:
+                            yield _format_event({**state, "event": state["job_status"]})
+                            return
+                    continue
+                
+                if watched_job_id is None and event["event"] == "started":
+                    watched_job_id = event["job_id"]
+                if event.get("job_id") not in (None, watched_job_id):
+                    continue
+                yield _format_event(event)
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+        finally:
+            progress_broker.unsubscribe(document_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.delete("/{document_id}")
 def delete_document_by_id(document_id: int, db: Session = Depends(get_db)):
     """Delete a document by ID."""
+    db_document = get_document(db, document_id)
+    file_path = db_document.file_path if db_document else None
+    content_hash = db_document.content_hash if db_document else None
+    
     success = delete_document(db, document_id)
     if not success:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Document with ID {document_id} not found"
         )
+    
+    # Remove the stored upload, its cached parse output and images once no document refers to it
+    if file_path and not is_file_path_referenced(db, file_path):
+        blob_store.delete(file_path)
+        if content_hash:
+            delete_parse_results(db, content_hash, image_store=blob_store)
     return {"message": f"Document {document_id} deleted successfully"}
 
 
+@router.delete("/{document_id}/mcp-cache")
+def clear_document_mcp_cache(document_id: int, db: Session = Depends(get_db)):
+    """Drop the cached MCP analyses of a document and its chunks, so the next analysis calls the server."""
+    db_document = get_document(db, document_id)
+    if not db_document:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Document with ID {document_id} not found"
+        )
+    
+    deleted = delete_mcp_results(db, db_document.content_hash) if db_document.content_hash else 0
+    return {"deleted": deleted}
+
+
 @router.get("/ui/upload", include_in_schema=False)
 async def document_upload_page(request: Request):
     """Document upload UI page."""
@@ -223,175 +723,27 @@ async def document_list_page(request: Request, db: Session = Depends(get_db)):
 
 
 @router.post("/{document_id}/process-with-mcp")
-async def process_document_with_mcp(
-    document_id: int, 
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
-    """Process a document using the MCP server for AI-assisted analysis."""
-    # Get document from database
-    db_document = get_document(db, document_id)
-    if not db_document:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Document with ID {document_id} not found"
-        )
+def process_document_with_mcp(document_id: int, force: bool = False):
+    """
+    Process a document using the MCP server for AI-assisted analysis.
     
-    # Check if already processed
-    if db_document.processed:
-        return {"message": "Document already processed", "status": db_document.processing_status}
-    
-    # Update document status to processing
-    update_document_status(
-        db, 
-        document_id, 
-        processed=False,
-        processing_status="processing",
-        processing_notes="Sending document to MCP server for analysis..."
-    )
-    
-    # Process in background to avoid blocking the API
-    background_tasks.add_task(
-        process_document_with_mcp_background,
-        document_id=document_id
+    force=true reanalyzes a processed document; unchanged files are served
+    from the MCP result cache until it expires or is cleared with
+    DELETE /documents/{id}/mcp-cache.
+    """
+    queued_job = _queue_processing(
+        document_id, "mcp", force, "Sending document to MCP server for analysis..."
     )
+    if "already_processed" in queued_job:
+        return {"message": "Document already processed", "status": queued_job["already_processed"]}
     
     return {
         "message": "Document sent for processing with MCP server",
         "status": "processing",
-        "document_id": document_id
+        **queued_job
     }
 
 
-async def process_document_with_mcp_background(document_id: int):
-    """Background task for processing a document with MCP server."""
-    # Get a new db session for this background task
-    from app.database.database import SessionLocal
-    db = SessionLocal()
-    
-    try:
-        # Get document from database
-        db_document = get_document(db, document_id)
-        if not db_document:
-            logger.error(f"Document with ID {document_id} not found in background task")
-            return
-            
-        # Load MCP configuration
-        mcp_config = load_mcp_config()
-        
-        # Initialize MCP client
-        mcp_client = MCPClient(
-            server_url=mcp_config["server_url"],
-            api_key=mcp_config["api_key"]
-        )
-        
-        try:
-            # Send document to MCP for analysis
-            result = await mcp_client.extract_rules_with_ai(
-                file_content=db_document.file_data,
-                file_name=db_document.filename,
-                document_type=db_document.document_type.value
-            )
-            
-            # Close the client
-            await mcp_client.close()
-            
-            # Check for errors
-            if "error" in result:
-                update_document_status(
-                    db, 
-                    document_id, 
-                    processed=False,
-                    processing_status="failed",
-                    processing_notes=f"MCP processing error: {result['error']}"
-                )
-                return
-                
-            # Add extracted rules to validation queue
-            rules_added = 0
-            for rule in result["rules"]:
-                # Only add rules with confidence above threshold
-                if rule.get("confidence", 0) >= mcp_config.get("confidence_threshold", 0.7):
-                    validation_item = ValidationQueueCreate(
-                        document_id=document_id,
-                        extracted_content=rule,
-                        validation_status=ValidationStatus.PENDING
-                    )
-                    create_validation_item(db, validation_item)
-                    rules_added += 1
-            
-            # Update document status
-            update_document_status(
-                db, 
-                document_id, 
-                processed=True,
-                processing_status="success",
-                processing_notes=(
-                    f"MCP processing completed. "
-                    f"Added {rules_added} rules to validation queue. "
-                    f"Extracted {len(result['images'])} images."
-                )
-            )
-            
-        except Exception as e:
-            # Handle any exceptions during MCP processing
-            update_document_status(
-                db, 
-                document_id, 
-                processed=False,
-                processing_status="failed",
-                processing_notes=f"MCP processing error: {str(e)}"
-            )
-            
-    except Exception as e:
-        # Log any unexpected errors
-        logger.error(f"Error in MCP background processing: {str(e)}")
-        
-    finally:
-        # Close the database session
-        db.close()
-
-
-@router.get("/mcp-status")
-async def check_mcp_status():
-    """Check the connection status with the MCP server."""
-    try:
-        # Load MCP configuration
-        mcp_config = load_mcp_config()
-        
-        # Initialize MCP client
-        mcp_client = MCPClient(
-            server_url=mcp_config["server_url"],
-            api_key=mcp_config["api_key"]
-        )
-        
-        # Check server availability
-        server_available = await mcp_client.ping()
-        
-        # Close the client
-        await mcp_client.close()
-        
-        if server_available:
-            return {
-                "status": "connected",
-                "server_url": mcp_config["server_url"],
-                "message": "Successfully connected to MCP server"
-            }
-        else:
-            return {
-                "status": "disconnected",
-                "server_url": mcp_config["server_url"],
-                "message": "Failed to connect to MCP server"
-            }
-            
-    except Exception as e:
-        return {
-            "status": "error",
-            "message": f"Error connecting to MCP server: {str(e)}",
-            "error": str(e)
-        }
-
-
 @router.get("/ui/mcp", include_in_schema=False)
 async def mcp_document_page(request: Request, db: Session = Depends(get_db)):
     """MCP document processing UI page."""
@@ -11,12 +11,15 @@ from app.database.database import get_db
 from app.database.models import ValidationQueue, ValidationStatus
 from app.models.schemas import ValidationQueue as ValidationQueueSchema
 from app.models.schemas import ValidationQueueUpdate, ValidationQueueCreate
+from app.models.schemas import ExtractionCandidate as ExtractionCandidateSchema, CandidatePromotion, BulkReviewRequest
 from app.crud.validation import (
     get_validation_item, get_validation_items, update_validation_status,
-    get_pending_validation_count
+    get_pending_validation_count, bulk_review_validation_items
 )
+from app.crud.candidate import get_candidates, promote_candidates
 from app.crud.rule import RuleCRUD
 from app.core.notification import notification_manager
+from app.core.stats_service import stats_service
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -47,6 +50,37 @@ def get_validation_list(
     return get_validation_items(db, skip, limit, document_id, validation_status)
 
 
+@router.get("/candidates", response_model=List[ExtractionCandidateSchema])
+def get_candidate_list(
+    document_id: Optional[int] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = Query(None, ge=0.0, le=1.0),
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db)
+):
+    """Get the rules extracted from documents, queued or not, most confident first."""
+    return get_candidates(db, document_id, source, min_confidence, skip, limit)
+
+
+@router.post("/candidates/promote")
+def promote_candidate_list(promotion: CandidatePromotion, db: Session = Depends(get_db)):
+    """
+    Queue stored candidates at or above a confidence threshold for validation.
+    
+    Lowering the threshold this way reuses the stored extraction results
+    instead of analyzing the documents again.
+    """
+    promoted = promote_candidates(db, promotion.confidence_threshold, promotion.document_id, promotion.source)
+    return {"promoted": promoted, "confidence_threshold": promotion.confidence_threshold}
+
+
+@router.get("/stats")
+def get_validation_stats(db: Session = Depends(get_db)):
+    """Get the number of validation items per status, as shown on the dashboard."""
+    return stats_service.validation_status_counts(db)
+
+
 @router.get("/{validation_id}", response_model=ValidationQueueSchema)
 def get_validation_by_id(validation_id: int, db: Session = Depends(get_db)):
     """Get a specific validation queue item by ID."""
@@ -281,6 +315,81 @@ def mark_validation_for_review(
     }
 
 
+# Status and notification wording of each bulk review action
+BULK_REVIEW_ACTIONS = {
+    "approve": (ValidationStatus.APPROVED, "approved"),
+    "reject": (ValidationStatus.REJECTED, "rejected"),
+    "needs_review": (ValidationStatus.NEEDS_REVIEW, "marked for review")
+}
+
+
+@router.post("/review/bulk")
+def bulk_review_validation(
+    request: BulkReviewRequest,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    """
+    Approve, reject or mark for review many validation items at once.
+    
+    All status updates and the rules created for approved items are stored
+    in one transaction, and one digest notification is sent for the batch.
+    Items that already have the requested status are skipped.
+    """
+    if request.action == "reject" and not request.validator_notes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Rejection requires notes explaining the reason"
+        )
+    validation_status, verb = BULK_REVIEW_ACTIONS[request.action]
+    
+    try:
+        reviewed, skipped, not_found = bulk_review_validation_items(
+            db, request.validation_ids, validation_status, request.validator_notes, request.validator
+        )
+    except Exception as e:
+        logger.error(f"Error in bulk review of validation items: {str(e)}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Error reviewing validation items: {str(e)}"
+        )
+    
+    if reviewed:
+        digest_data = {
+            "action": verb,
+            "validator": request.validator or "System",
+            "notes": request.validator_notes,
+            "items": [
+                {
+                    "title": item.extracted_content.get("title", "Untitled Rule"),
+                    "rule_type": item.extracted_content.get("rule_type", "general"),
+                    "url": f"/validation/ui/review/{item.id}"
+                }
+                for item in reviewed
+            ]
+        }
+        background_tasks.add_task(
+            notification_manager.send_validation_digest_notification,
+            digest_data=digest_data,
+            recipients=["esd-team@example.com"]  # Would be configured in production
+        )
+        notification_manager.log_notification(
+            notification_type=f"bulk_{request.action}",
+            validation_id=None,
+            user=request.validator or "Unknown",
+            message=f"{len(reviewed)} validation items {verb}"
+        )
+    
+    return {
+        "message": f"{len(reviewed)} validation items {verb}",
+        "action": request.action,
+        "validation_ids": [item.id for item in reviewed],
+        "rule_ids": [item.rule_id for item in reviewed] if validation_status == ValidationStatus.APPROVED else [],
+        "skipped": skipped,
+        "not_found": not_found
+    }
+
+
 @router.get("/ui/list", include_in_schema=False)
 async def validation_list_page(
     request: Request, 
@@ -335,32 +444,17 @@ async def validation_review_page(
 @router.get("/ui/dashboard", include_in_schema=False)
 async def validation_dashboard_page(request: Request, db: Session = Depends(get_db)):
     """Validation dashboard UI page."""
-    # Get counts per status
-    pending_count = db.query(ValidationQueue).filter(
-        ValidationQueue.validation_status == ValidationStatus.PENDING
-    ).count()
-    
-    approved_count = db.query(ValidationQueue).filter(
-        ValidationQueue.validation_status == ValidationStatus.APPROVED
-    ).count()
-    
-    rejected_count = db.query(ValidationQueue).filter(
-        ValidationQueue.validation_status == ValidationStatus.REJECTED
-    ).count()
-    
-    needs_review_count = db.query(ValidationQueue).filter(
-        ValidationQueue.validation_status == ValidationStatus.NEEDS_REVIEW
-    ).count()
+    counts = stats_service.validation_status_counts(db)
     
     return templates.TemplateResponse(
         "validation_dashboard.html", 
         {
             "request": request, 
             "title": "Validation Dashboard",
-            "pending_count": pending_count,
-            "approved_count": approved_count,
-            "rejected_count": rejected_count,
-            "needs_review_count": needs_review_count,
-            "total_count": pending_count + approved_count + rejected_count + needs_review_count
+            "pending_count": counts["pending"],
+            "approved_count": counts["approved"],
+            "rejected_count": counts["rejected"],
+            "needs_review_count": counts["needs_review"],
+            "total_count": counts["total"]
         }
     )
@@ -0,0 +1,263 @@
+"""
+Content-addressed blob storage for document payloads and extracted images.
+
+Blobs are stored on the local filesystem under BLOB_STORE_PATH, keyed by the
+SHA-256 of their content, so writing the same bytes twice is a no-op apart
+from refreshing the blob's modification time, which age() reports.
+"""
+import os
+import mmap
+import hashlib
+import logging
+import time
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional, Union
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "blob_store")
+
+
+@contextmanager
+def map_file(path: Union[str, Path]) -> Iterator[Union[mmap.mmap, bytes]]:
+    """
+    Memory-map a file read-only so it can be parsed without reading it into memory.
+
+    Args:
+        path: File to map
+
+    Yields:
+        The mapped file (empty bytes for an empty file, which cannot be mapped)
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield b""
+            return
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield mapped
+    finally:
+        try:
+            mapped.close()
+        except BufferError:
+            # A parser still holds a view; the mapping is released with it
+            logger.debug(f"Deferred unmapping of {path}")
+
+
+class BlobTooLargeError(ValueError):
+    """Raised when a streamed blob grows beyond its size limit."""
+
+
+class BlobWriter:
+    """
+    Write a blob in chunks, hashing it on the fly.
+
+    Chunks are spooled to a temporary file inside the store and moved into
+    place on commit, so memory use does not depend on the blob size. Used as
+    a context manager, the temporary file is removed unless commit() was called.
+    """
+
+    def __init__(self, store: "BlobStore", max_bytes: Optional[int] = None):
+        """
+        Start writing a blob.
+
+        Args:
+            store: Store the blob is committed to
+            max_bytes: Size limit; write() raises BlobTooLargeError beyond it
+        """
+        self.store = store
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.key: Optional[str] = None
+        self._hash = hashlib.sha256()
+
+        incoming = store.root / ".incoming"
+        incoming.mkdir(parents=True, exist_ok=True)
+        fd, self._temp_path = tempfile.mkstemp(dir=incoming, prefix=".tmp-")
+        self._file = os.fdopen(fd, "wb")
+
+    def write(self, chunk: bytes) -> None:
+        """
+        Append a chunk to the blob.
+
+        Args:
+            chunk: Next part of the content
+        """
+        self.size += len(chunk)
+        if self.max_bytes is not None and self.size > self.max_bytes:
+            raise BlobTooLargeError(f"Content exceeds the limit of {self.max_bytes} bytes")
+        self._hash.update(chunk)
+        self._file.write(chunk)
+
+    def commit(self) -> str:
+        """
+        Finish the blob and move it into the store.
+
+        Returns:
+            Blob key (hex SHA-256 of the content)
+        """
+        self._file.close()
+        key = self._hash.hexdigest()
+        target = self.store.path(key)
+        if target.exists() and _touch(target):
+            os.unlink(self._temp_path)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(self._temp_path, target)
+        self.key = key
+        return key
+
+    def abort(self) -> None:
+        """Discard the partially written blob."""
+        self._file.close()
+        if os.path.exists(self._temp_path):
+            os.unlink(self._temp_path)
+
+    def __enter__(self) -> "BlobWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if self.key is None:
+            self.abort()
+
+
+class BlobStore:
+    """Filesystem blob store addressed by SHA-256 content hash."""
+
+    def __init__(self, root: str):
+        """
+        Initialize the blob store.
+
+        Args:
+            root: Directory that holds the blobs
+        """
+        self.root = Path(root)
+
+    def path(self, key: str) -> Path:
+        """
+        Get the filesystem path of a blob.
+
+        Args:
+            key: Blob key (hex SHA-256)
+
+        Returns:
+            Path where the blob is stored
+        """
+        if len(key) < 5 or not all(c in "0123456789abcdef" for c in key):
+            raise ValueError(f"Invalid blob key: {key}")
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data: bytes) -> str:
+        """
+        Store bytes and return their key.
+
+        Args:
+            data: Content to store
+
+        Returns:
+            Blob key (hex SHA-256 of the content)
+        """
+        key = hashlib.sha256(data).hexdigest()
+        target = self.path(key)
+        if target.exists() and _touch(target):
+            return key
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so readers never see a partial blob
+        fd, temp_path = tempfile.mkstemp(dir=target.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, target)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        return key
+
+    def open_writer(self, max_bytes: Optional[int] = None) -> BlobWriter:
+        """
+        Start writing a blob in chunks.
+
+        Args:
+            max_bytes: Optional size limit
+
+        Returns:
+            BlobWriter for the new blob
+        """
+        return BlobWriter(self, max_bytes)
+
+    def get(self, key: str) -> bytes:
+        """
+        Read a blob into memory.
+
+        Args:
+            key: Blob key
+
+        Returns:
+            Blob content
+        """
+        with open(self.path(key), "rb") as f:
+            return f.read()
+
+    def open_mapped(self, key: str):
+        """
+        Memory-map a blob read-only.
+
+        Args:
+            key: Blob key
+
+        Returns:
+            Context manager yielding the mapped blob
+        """
+        return map_file(self.path(key))
+
+    def exists(self, key: str) -> bool:
+        """Check whether a blob is stored."""
+        return self.path(key).exists()
+
+    def size(self, key: str) -> Optional[int]:
+        """Get the size of a blob in bytes, or None if it is missing."""
+        try:
+            return self.path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def age(self, key: str) -> Optional[float]:
+        """Get the seconds since a blob was last written, or None if it is missing."""
+        try:
+            return time.time() - self.path(key).stat().st_mtime
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> bool:
+        """
+        Delete a blob.
+
+        Args:
+            key: Blob key
+
+        Returns:
+            True if deleted, False if not found
+        """
+        try:
+            self.path(key).unlink()
+            return True
+        except FileNotFoundError:
+            return False
+
+
+def _touch(path: Path) -> bool:
+    """Mark an existing blob as written now; False if it has just been deleted."""
+    try:
+        os.utime(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+# Shared blob store instance
+blob_store = BlobStore(BLOB_STORE_PATH)
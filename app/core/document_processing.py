@@ -0,0 +1,518 @@
+"""
+Document processing jobs.
+
+The run_*_job handlers are executed by the durable job queue (see
+app.core.job_queue) in the API process. Parsing itself runs in a job
+worker process through parse_document (see app.core.job_manager).
+"""
+import json
+import asyncio
+import hashlib
+import logging
+import itertools
+from contextlib import contextmanager, asynccontextmanager
+from typing import Dict, Any, Iterator, List, Optional, Type
+
+from app.database.database import SessionLocal
+from app.database.models import DocumentType
+from app.crud.document import get_document, update_document_status
+from app.crud.candidate import save_candidates
+from app.crud.parse_result import get_parse_result, save_parse_result
+from app.core.blob_store import blob_store, map_file
+from app.core.job_manager import job_manager, JobStatus, report_progress
+from app.core.progress import progress_broker
+from app.core.job_queue import JobQueue, PermanentJobError
+from app.parsers import parser_registry
+from app.parsers.base_parser import BaseParser, ContentBuffer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Parsers that must not run side by side, by parser class name
+_serial_parser_locks: Dict[str, asyncio.Lock] = {}
+
+
+def get_parser_class(document_type: str) -> Optional[Type[BaseParser]]:
+    """
+    Get the parser class for a document type from the parser registry.
+
+    Args:
+        document_type: DocumentType value
+
+    Returns:
+        Parser class, or None if the type has no parser
+    """
+    return parser_registry.for_document_type(DocumentType(document_type).value)
+
+
+def parse_document(
+    document_type: str,
+    filename: str,
+    file_data: Optional[bytes] = None,
+    file_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Run the parser matching a document's type.
+
+    The parser reads the stored bytes, or a memory-mapped file_path, directly;
+    nothing is written to a temporary file. Streaming parsers read file_path
+    themselves. Parser progress is sent to the job supervisor as it goes.
+
+    Args:
+        document_type: DocumentType value of the document
+        filename: Original filename, used in error messages
+        file_data: Raw document bytes
+        file_path: Path of the stored document, used when file_data is empty
+
+    Returns:
+        Dictionary with rules, metadata, image references and the image count
+    """
+    parser_class = get_parser_class(document_type)
+    if parser_class is None:
+        raise ValueError(f"No parser for {filename} of type {document_type}")
+
+    # Process with appropriate parser; images go straight to the blob store
+    if file_data:
+        return parser_class(file_content=file_data).process(image_store=blob_store, progress_callback=report_progress)
+    if not file_path:
+        raise ValueError(f"Document {filename} has no stored content")
+    if parser_class.SUPPORTS_STREAMING:
+        return parser_class(file_path=file_path).process(image_store=blob_store, progress_callback=report_progress)
+    with map_file(file_path) as content:
+        return parser_class(file_content=content).process(image_store=blob_store, progress_callback=report_progress)
+
+
+@contextmanager
+def open_document_content(db_document) -> Iterator[ContentBuffer]:
+    """
+    Open a document's stored content for parsing.
+
+    Args:
+        db_document: ImportedDocument model
+
+    Yields:
+        The content as bytes, or memory-mapped from the blob store
+    """
+    if db_document.file_data:
+        yield db_document.file_data
+        return
+    if not db_document.file_path:
+        raise ValueError(f"Document {db_document.filename} has no stored content")
+    with map_file(blob_store.path(db_document.file_path)) as content:
+        yield content
+
+
+def _load_document(document_id: int) -> Optional[Dict[str, Any]]:
+    """Read the fields a job needs from the document, or None if it was deleted."""
+    db = SessionLocal()
+    try:
+        db_document = get_document(db, document_id)
+        if not db_document:
+            return None
+        if not db_document.content_hash and db_document.file_data:
+            # Documents stored before uploads were hashed
+            db_document.content_hash = hashlib.sha256(db_document.file_data).hexdigest()
+            db.commit()
+        return {
+            "document_type": db_document.document_type.value,
+            "filename": db_document.filename,
+            "file_data": db_document.file_data,
+            "file_path": str(blob_store.path(db_document.file_path)) if db_document.file_path else None,
+            "content_hash": db_document.content_hash
+        }
+    finally:
+        db.close()
+
+
+def _to_json(value: Any) -> Any:
+    """Convert parser output to plain JSON types; dates and other values become strings."""
+    return json.loads(json.dumps(value, default=str))
+
+
+def get_cached_result(content_hash: Optional[str], parser_class: Type[BaseParser]) -> Optional[Dict[str, Any]]:
+    """
+    Look up the cached parse output of a file for the current parser version.
+
+    Output whose image blobs are gone counts as a miss, so the file is
+    parsed again and its images are written back.
+
+    Args:
+        content_hash: SHA-256 of the file content
+        parser_class: Parser that would parse the file
+
+    Returns:
+        Dictionary with rules, metadata, images and image_count, or None on a cache miss
+    """
+    if not content_hash:
+        return None
+    db = SessionLocal()
+    try:
+        db_result = get_parse_result(db, content_hash, parser_class.__name__, parser_class.PARSER_VERSION)
+        if not db_result:
+            return None
+        missing = [
+            image["blob_key"] for image in db_result.images or []
+            if image.get("blob_key") and not blob_store.exists(image["blob_key"])
+        ]
+        if missing:
+            logger.warning(f"Cached parse output of {content_hash} lost {len(missing)} images; parsing again")
+            return None
+        return {
+            "rules": db_result.rules or [],
+            "metadata": db_result.result_metadata or {},
+            "images": db_result.images or [],
+            "image_count": db_result.image_count or 0
+        }
+    finally:
+        db.close()
+
+
+def _cache_result(content_hash: str, parser_class: Type[BaseParser], result: Dict[str, Any]) -> None:
+    db = SessionLocal()
+    try:
+        save_parse_result(
+            db, content_hash, parser_class.__name__, parser_class.PARSER_VERSION, result, image_store=blob_store
+        )
+    except Exception as e:
+        # The cache is an optimisation; a failed write must not fail the job
+        db.rollback()
+        logger.error(f"Error caching parse result for {content_hash}: {str(e)}")
+    finally:
+        db.close()
+
+
+def _set_document_status(document_id: int, processed: bool, processing_status: str, processing_notes: str) -> None:
+    db = SessionLocal()
+    try:
+        update_document_status(
+            db,
+            document_id,
+            processed=processed,
+            processing_status=processing_status,
+            processing_notes=processing_notes
+        )
+    finally:
+        db.close()
+
+
+@asynccontextmanager
+async def _parser_slot(parser_class: Type[BaseParser]):
+    """Hold the parser's lock while it runs, unless it is PARALLEL_SAFE."""
+    if parser_class.PARALLEL_SAFE:
+        yield
+        return
+
+    lock = _serial_parser_locks.setdefault(parser_class.__name__, asyncio.Lock())
+    async with lock:
+        yield
+
+
+async def run_parse_job(db_job) -> Dict[str, Any]:
+    """
+    Queue handler for "parse" jobs: parse the document in a worker process.
+
+    Output is cached by content hash and parser version, so a file the
+    current parser has already parsed skips the worker process. Parser
+    errors fail the job for good; timeouts and worker crashes are retried.
+    Progress reported by the parser is published to the progress broker.
+    The extracted rules are queued for validation in one bulk insert.
+
+    Args:
+        db_job: The claimed ProcessingJob
+
+    Returns:
+        Summary stored as the job result
+    """
+    document = await asyncio.to_thread(_load_document, db_job.document_id)
+    if document is None:
+        raise PermanentJobError(f"Document with ID {db_job.document_id} not found")
+
+    parser_class = get_parser_class(document["document_type"])
+    if parser_class is None:
+        raise PermanentJobError(f"No parser for document type {document['document_type']}")
+
+    # Reprocessing a file this parser version has already seen reuses the stored output
+    result = await asyncio.to_thread(get_cached_result, document["content_hash"], parser_class)
+    source = "cache"
+
+    if result is not None:
+        progress_broker.publish(db_job.document_id, "cached", job_id=db_job.id, rules_found=len(result["rules"]))
+    else:
+        source = "parser"
+        await asyncio.to_thread(
+            _set_document_status,
+            db_job.document_id,
+            False,
+            "processing",
+            f"Parsing document (attempt {db_job.attempts} of {db_job.max_attempts})..."
+        )
+
+        async with _parser_slot(parser_class):
+            local_job = job_manager.submit(
+                db_job.document_id,
+                kind="parse",
+                target=parse_document,
+                args=(document["document_type"], document["filename"], document["file_data"], document["file_path"]),
+                on_progress=lambda job: progress_broker.publish(
+                    job.document_id, "progress", job_id=db_job.id, **job.progress
+                )
+            )
+            try:
+                await job_manager.wait(local_job)
+            except asyncio.CancelledError:
+                # Stop the worker process too, not just the coroutine waiting for it
+                job_manager.cancel(local_job.id)
+                raise
+
+        if local_job.status != JobStatus.SUCCEEDED:
+            if local_job.retryable or local_job.status == JobStatus.CANCELLED:
+                raise RuntimeError(local_job.error)
+            raise PermanentJobError(local_job.error)
+
+        # Metadata may hold dates and other values JSON cannot store directly
+        result = _to_json(local_job.result)
+        if document["content_hash"]:
+            await asyncio.to_thread(_cache_result, document["content_hash"], parser_class, result)
+
+    progress_broker.publish(
+        db_job.document_id, "progress", job_id=db_job.id, stage="queuing_rules", rules_found=len(result["rules"])
+    )
+    rules_queued = await asyncio.to_thread(
+        _queue_rules_for_validation, db_job.document_id, result["rules"], "parser"
+    )
+
+    await asyncio.to_thread(
+        _set_document_status,
+        db_job.document_id,
+        True,
+        "success",
+        f"Extracted {len(result['rules'])} rules, {result['image_count']} images; "
+        f"queued {rules_queued} rules for validation"
+        + (" (cached parse result)" if source == "cache" else "")
+    )
+
+    return {
+        "rules_extracted": len(result["rules"]),
+        "rules_queued": rules_queued,
+        "images_extracted": result["image_count"],
+        "metadata": result["metadata"],
+        "source": source
+    }
+
+
+async def run_mcp_job(db_job) -> Dict[str, Any]:
+    """
+    Queue handler for "mcp" jobs: send the document to the MCP server and
+    queue the extracted rules for validation.
+
+    Errors reported by the MCP server are raised so the job is retried.
+
+    Args:
+        db_job: The claimed ProcessingJob
+
+    Returns:
+        Summary stored as the job result
+    """
+    from app.core.mcp_client import get_mcp_client
+    from app.core.mcp_dispatcher import get_mcp_dispatcher
+    from app.core.mcp_config import load_mcp_config
+    from app.core.mcp_chunking import split_document
+
+    document = await asyncio.to_thread(_load_document, db_job.document_id)
+    if document is None:
+        raise PermanentJobError(f"Document with ID {db_job.document_id} not found")
+    document_type, filename = document["document_type"], document["filename"]
+    file_data, file_path = document["file_data"], document["file_path"]
+
+    # Load MCP configuration
+    mcp_config = load_mcp_config()
+
+    progress_broker.publish(db_job.document_id, "progress", job_id=db_job.id, stage="analyzing")
+    # Large documents are analyzed in chunks, so one slow part cannot time out the whole
+    chunks = split_document(document_type, filename, file_data, file_path, mcp_config)
+    first_chunk = await asyncio.to_thread(next, chunks, None)
+    if first_chunk is not None:
+        result = await _analyze_chunks(
+            db_job, itertools.chain([first_chunk], chunks), mcp_config, document["content_hash"]
+        )
+    else:
+        # Send document to MCP for analysis over the shared connection pool;
+        # stored files are streamed from disk rather than read into memory. The
+        # dispatcher limits concurrent analyses and raises CircuitOpenError,
+        # retrying the job later, while the server keeps failing.
+        mcp_client = get_mcp_client()
+        result = await get_mcp_dispatcher().run(
+            lambda: mcp_client.extract_rules_with_ai(
+                file_content=file_data or None,
+                file_name=filename,
+                document_type=document_type,
+                file_path=file_path,
+                progress_callback=lambda task: progress_broker.publish(
+                    db_job.document_id, "progress", job_id=db_job.id, stage="analyzing",
+                    task_status=task.get("status"), task_progress=task.get("progress")
+                ),
+                content_hash=document["content_hash"]
+            ),
+            is_failure=lambda result: "error" in result
+        )
+
+    if "error" in result:
+        raise RuntimeError(result["error"])
+
+    progress_broker.publish(
+        db_job.document_id, "progress", job_id=db_job.id, stage="queuing_rules", rules_found=len(result["rules"])
+    )
+    rules_added = await asyncio.to_thread(
+        _queue_rules_for_validation,
+        db_job.document_id,
+        result["rules"],
+        "mcp",
+        mcp_config.get("confidence_threshold", 0.7)
+    )
+
+    await asyncio.to_thread(
+        _set_document_status,
+        db_job.document_id,
+        True,
+        "success",
+        (
+            f"MCP processing completed{' (cached analysis)' if result.get('cached') else ''}. "
+            f"Added {rules_added} of {len(result['rules'])} rules to validation queue. "
+            f"Extracted {len(result['images'])} images."
+        )
+    )
+
+    return {"rules_extracted": len(result["rules"]), "rules_queued": rules_added, "images_extracted": len(result["images"])}
+
+
+async def _analyze_chunks(
+    db_job,
+    chunks: Iterator,
+    mcp_config: Dict[str, Any],
+    document_hash: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Analyze a document's chunks concurrently and merge their rules.
+
+    Chunks run through the MCP dispatcher, which bounds how many are in
+    flight; the next chunk is only built once one of those has finished.
+    A chunk whose analysis fails is retried on its own, up to
+    chunk_attempts times, before the job fails. Each chunk's analysis is
+    cached, so a retried job only sends the chunks that failed.
+
+    Args:
+        db_job: The running ProcessingJob
+        chunks: Chunks from split_document, built as they are consumed
+        mcp_config: MCP configuration
+        document_hash: SHA-256 of the document the chunks belong to
+
+    Returns:
+        Merged result, like extract_rules_with_ai
+    """
+    from app.core.mcp_client import get_mcp_client
+    from app.core.mcp_dispatcher import get_mcp_dispatcher
+    from app.core.mcp_chunking import merge_chunk_results
+
+    mcp_client = get_mcp_client()
+    dispatcher = get_mcp_dispatcher()
+    max_attempts = int(mcp_config.get("chunk_attempts", 3))
+    retry_seconds = float(mcp_config.get("chunk_retry_seconds", 5))
+    chunks_done = 0
+
+    async def analyze(chunk) -> Dict[str, Any]:
+        nonlocal chunks_done
+        for attempt in range(1, max_attempts + 1):
+            result = await dispatcher.run(
+                lambda: mcp_client.extract_rules_with_ai(
+                    file_content=chunk.content,
+                    file_name=chunk.name,
+                    document_type=chunk.document_type,
+                    content_hash=hashlib.sha256(chunk.content).hexdigest(),
+                    document_hash=document_hash
+                ),
+                is_failure=lambda result: "error" in result
+            )
+            if "error" not in result:
+                break
+            if attempt == max_attempts:
+                raise RuntimeError(f"MCP analysis of {chunk.label} failed after {attempt} attempts: {result['error']}")
+            logger.warning(f"MCP analysis of {chunk.label} of document {db_job.document_id} failed, retrying: {result['error']}")
+            await asyncio.sleep(retry_seconds * attempt)
+
+        chunks_done += 1
+        progress_broker.publish(
+            db_job.document_id, "progress", job_id=db_job.id, stage="analyzing",
+            done=chunks_done, total=chunk.count, chunk=chunk.label
+        )
+        return result
+
+    # Analyzed chunks without their content, and their results, in chunk order
+    analyzed = []
+    tasks: Dict[asyncio.Task, int] = {}
+    results: Dict[int, Dict[str, Any]] = {}
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(tasks) < dispatcher.max_concurrency:
+                chunk = await asyncio.to_thread(next, chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                tasks[asyncio.create_task(analyze(chunk))] = chunk.index
+                analyzed.append(chunk._replace(content=b""))
+            if not tasks:
+                break
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                results[tasks.pop(task)] = task.result()
+    except BaseException:
+        # One chunk failed for good or the job was cancelled: stop the others
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+    return merge_chunk_results(analyzed, [results[chunk.index] for chunk in analyzed])
+
+
+def _queue_rules_for_validation(
+    document_id: int,
+    rules: List[Dict[str, Any]],
+    source: str,
+    confidence_threshold: float = 0.0
+) -> int:
+    """
+    Store all extracted rules as candidates, add those at or above the
+    confidence threshold to the validation queue and return how many were
+    added. The rest can be promoted later without extracting again.
+    """
+    db = SessionLocal()
+    try:
+        return save_candidates(db, document_id, rules, source, confidence_threshold)
+    finally:
+        db.close()
+
+
+def record_job_failure(db_job) -> None:
+    """
+    Mark the document as failed once its job has run out of attempts.
+
+    Args:
+        db_job: The failed ProcessingJob
+    """
+    prefix = "MCP processing error" if db_job.kind == "mcp" else "Processing error"
+    try:
+        _set_document_status(db_job.document_id, False, "failed", f"{prefix}: {db_job.last_error}")
+    except Exception as e:
+        logger.error(f"Error recording failure of job {db_job.id}: {str(e)}")
+
+
+def register_job_handlers(queue: JobQueue) -> None:
+    """
+    Register the document job kinds with the job queue.
+
+    Args:
+        queue: Job queue to register with
+    """
+    queue.register("parse", run_parse_job, on_failure=record_job_failure)
+    queue.register("mcp", run_mcp_job, on_failure=record_job_failure)
@@ -0,0 +1,336 @@
+"""
+Out-of-process job execution for document processing.
+
+Each job runs its target function in a separate worker process so a large
+PDF, Word or Excel parse never blocks the API's threadpool. Jobs are
+supervised by a small bounded thread pool that enforces a per-job timeout,
+an optional memory limit and cancellation.
+"""
+import os
+import time
+import uuid
+import asyncio
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, Future
+from enum import Enum
+from typing import Dict, Any, Optional, Callable
+
+try:
+    import resource
+except ImportError:  # Windows has no resource module; memory limits are skipped
+    resource = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+DOCUMENT_WORKERS = int(os.getenv("DOCUMENT_WORKERS", "2"))  # Concurrent worker processes
+DOCUMENT_JOB_TIMEOUT = int(os.getenv("DOCUMENT_JOB_TIMEOUT", "600"))  # Seconds per job
+DOCUMENT_JOB_MEMORY_MB = int(os.getenv("DOCUMENT_JOB_MEMORY_MB", "2048"))  # Address space per job, 0 = unlimited
+DOCUMENT_JOB_START_METHOD = os.getenv("DOCUMENT_JOB_START_METHOD", "")  # "", "spawn", "forkserver" or "fork"
+
+# Minimum seconds between progress messages sent by a worker process
+PROGRESS_INTERVAL = 0.25
+
+# Set inside a job process to the CPUs it may use, so parsers that fan out
+# divide the machine with the other jobs instead of each taking every core
+JOB_CPUS_ENV = "DOCUMENT_JOB_CPUS"
+
+# Pipe to the supervisor, set inside a worker process by _job_process_main
+_progress_conn = None
+_progress_sent_at = 0.0
+
+
+class JobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+    TIMED_OUT = "timed_out"
+
+
+FINISHED_STATUSES = {JobStatus.SUCCEEDED, JobStatus.FAILED, JobStatus.CANCELLED, JobStatus.TIMED_OUT}
+
+
+class DocumentJob:
+    """A single unit of document work and its current state."""
+
+    def __init__(self, document_id: int, kind: str):
+        self.id = uuid.uuid4().hex
+        self.document_id = document_id
+        self.kind = kind
+        self.status = JobStatus.QUEUED
+        self.result: Optional[Dict[str, Any]] = None
+        self.progress: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # True when the failure came from the environment (timeout, crash) rather than the document
+        self.retryable = False
+        self.cancel_requested = threading.Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+
+def report_progress(**progress: Any) -> None:
+    """
+    Send progress of the running job to the supervisor.
+
+    Call from a job target; outside a worker process this does nothing.
+    Messages are throttled to one per PROGRESS_INTERVAL, except the last
+    unit of a stage, which is always sent.
+
+    Args:
+        **progress: Progress fields, e.g. stage, done, total and rules_found
+    """
+    global _progress_sent_at
+    if _progress_conn is None:
+        return
+
+    now = time.monotonic()
+    finished_stage = progress.get("total") is not None and progress.get("done") == progress.get("total")
+    if not finished_stage and now - _progress_sent_at < PROGRESS_INTERVAL:
+        return
+    _progress_sent_at = now
+
+    try:
+        _progress_conn.send(("progress", progress))
+    except (OSError, ValueError):
+        # Progress is best effort; the result is still sent at the end
+        pass
+
+
+def _job_process_main(conn, memory_limit_mb: int, cpus: int, target: Callable, args: tuple) -> None:
+    """
+    Entry point of a job worker process.
+
+    Args:
+        conn: Pipe end used to send ("progress", fields) while running and
+            ("ok", result) or ("error", message) at the end
+        memory_limit_mb: Address space limit for this process, 0 for none
+        cpus: CPUs this job may use, published as DOCUMENT_JOB_CPUS
+        target: Function to run
+        args: Positional arguments for target
+    """
+    global _progress_conn
+    _progress_conn = conn
+    os.environ[JOB_CPUS_ENV] = str(cpus)
+
+    if resource is not None and memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+    try:
+        conn.send(("ok", target(*args)))
+    except MemoryError:
+        conn.send(("error", f"Job exceeded the memory limit of {memory_limit_mb} MB"))
+    except Exception as e:
+        conn.send(("error", f"{type(e).__name__}: {str(e)}"))
+    finally:
+        conn.close()
+
+
+class JobManager:
+    """Run document jobs in worker processes with bounded concurrency."""
+
+    def __init__(
+        self,
+        max_workers: int = DOCUMENT_WORKERS,
+        timeout_seconds: int = DOCUMENT_JOB_TIMEOUT,
+        memory_limit_mb: int = DOCUMENT_JOB_MEMORY_MB,
+        start_method: str = DOCUMENT_JOB_START_METHOD
+    ):
+        """
+        Initialize the job manager.
+
+        Args:
+            max_workers: Maximum number of jobs running at once
+            timeout_seconds: Wall-clock limit for a single job
+            memory_limit_mb: Address space limit for a job process, 0 for none
+            start_method: multiprocessing start method; empty picks forkserver where available
+        """
+        self.max_workers = max(1, max_workers)
+        # Jobs running side by side share the machine's cores
+        self.cpus_per_job = max(1, (os.cpu_count() or 1) // self.max_workers)
+        self.timeout_seconds = timeout_seconds
+        self.memory_limit_mb = memory_limit_mb
+        self.start_method = start_method or (
+            "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        )
+        if self.start_method == "forkserver":
+            # Import the parsers once in the fork server instead of in every job
+            multiprocessing.get_context("forkserver").set_forkserver_preload(["app.parsers"])
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Jobs not yet finished, for cancel and shutdown
+        self._jobs: Dict[str, DocumentJob] = {}
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="document-job"
+                )
+            return self._executor
+
+    def submit(
+        self,
+        document_id: int,
+        kind: str,
+        target: Callable,
+        args: tuple = (),
+        on_progress: Optional[Callable[[DocumentJob], None]] = None
+    ) -> DocumentJob:
+        """
+        Queue a job to run target(*args) in a worker process.
+
+        Args:
+            document_id: Document the job belongs to
+            kind: Job kind, e.g. "parse"
+            target: Picklable module-level function to run
+            args: Picklable positional arguments for target
+            on_progress: Called in the supervisor thread when the job reports progress
+
+        Returns:
+            The queued job
+        """
+        job = DocumentJob(document_id, kind)
+        with self._lock:
+            self._jobs[job.id] = job
+
+        job.future = self._get_executor().submit(self._supervise, job, target, args, on_progress)
+        return job
+
+    def _supervise(
+        self,
+        job: DocumentJob,
+        target: Callable,
+        args: tuple,
+        on_progress: Optional[Callable[[DocumentJob], None]]
+    ) -> DocumentJob:
+        """Run one job in a worker process and enforce its limits."""
+        try:
+            if job.cancel_requested.is_set():
+                job.status = JobStatus.CANCELLED
+                job.error = "Job cancelled"
+                return job
+            self._run_process(job, target, args, on_progress)
+            return job
+        finally:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+
+    def _run_process(
+        self,
+        job: DocumentJob,
+        target: Callable,
+        args: tuple,
+        on_progress: Optional[Callable[[DocumentJob], None]]
+    ) -> None:
+        """Run target(*args) in a new worker process until it finishes or hits a limit."""
+        job.status = JobStatus.RUNNING
+
+        context = multiprocessing.get_context(self.start_method)
+        receiver, sender = context.Pipe(duplex=False)
+        process = context.Process(
+            target=_job_process_main,
+            args=(sender, self.memory_limit_mb, self.cpus_per_job, target, args),
+            name=f"document-job-{job.id[:8]}"
+        )
+        process.start()
+        sender.close()
+
+        deadline = time.monotonic() + self.timeout_seconds
+        try:
+            while True:
+                if receiver.poll(0.2):
+                    outcome, payload = receiver.recv()
+                    if outcome == "progress":
+                        job.progress = payload
+                        self._notify(job, on_progress)
+                        continue
+                    if outcome == "ok":
+                        job.status = JobStatus.SUCCEEDED
+                        job.result = payload
+                    else:
+                        job.status = JobStatus.FAILED
+                        job.error = payload
+                    break
+
+                if job.cancel_requested.is_set():
+                    job.status = JobStatus.CANCELLED
+                    job.error = "Job cancelled"
+                    break
+
+                if time.monotonic() > deadline:
+                    job.status = JobStatus.TIMED_OUT
+                    job.error = f"Job exceeded the timeout of {self.timeout_seconds} seconds"
+                    job.retryable = True
+                    break
+
+                if not process.is_alive() and not receiver.poll():
+                    job.status = JobStatus.FAILED
+                    job.error = f"Worker process exited unexpectedly (exit code {process.exitcode})"
+                    job.retryable = True
+                    break
+        except (EOFError, OSError):
+            process.join(1)
+            job.status = JobStatus.FAILED
+            job.error = f"Worker process exited unexpectedly (exit code {process.exitcode})"
+            job.retryable = True
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join(5)
+            receiver.close()
+
+        if job.status != JobStatus.SUCCEEDED:
+            logger.warning(f"Job {job.id} for document {job.document_id} ended as {job.status.value}: {job.error}")
+
+    def _notify(self, job: DocumentJob, on_progress: Optional[Callable[[DocumentJob], None]]) -> None:
+        if on_progress is None:
+            return
+        try:
+            on_progress(job)
+        except Exception as e:
+            logger.error(f"Error in progress handler for job {job.id}: {str(e)}")
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Request cancellation of a job.
+
+        Args:
+            job_id: Job to cancel
+
+        Returns:
+            True if the job was queued or running, False if unknown or finished
+        """
+        job = self._jobs.get(job_id)
+        if not job or job.finished:
+            return False
+        job.cancel_requested.set()
+        return True
+
+    async def wait(self, job: DocumentJob) -> DocumentJob:
+        """Wait for a job to finish without blocking the event loop."""
+        await asyncio.wrap_future(job.future)
+        return job
+
+    def shutdown(self) -> None:
+        """Cancel outstanding jobs and stop the supervisor threads."""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job.cancel_requested.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+# Shared job manager instance
+job_manager = JobManager()
@@ -0,0 +1,381 @@
+"""
+Durable document job queue.
+
+Jobs are stored in the processing_jobs table, so they survive restarts.
+Workers claim jobs by taking a time-limited lease and keep renewing it
+while the job runs; a sweeper requeues jobs whose lease has expired
+because the worker holding them died. Failed attempts are retried with
+exponential backoff up to the job's max_attempts.
+"""
+import os
+import uuid
+import socket
+import asyncio
+import logging
+from typing import Dict, Any, Optional, Callable, Awaitable, List, Set
+
+from app.database.database import SessionLocal
+from app.crud import job as job_crud
+from app.crud.document import update_document_status
+from app.database.models import ImportedDocument
+from app.core.progress import progress_broker
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+JOB_QUEUE_CONCURRENCY = int(os.getenv("JOB_QUEUE_CONCURRENCY", "4"))  # Jobs run at once by this process
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))  # Renewed every third of the lease
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))  # Seconds between polls when idle
+JOB_SWEEP_INTERVAL = int(os.getenv("JOB_SWEEP_INTERVAL", "30"))
+
+FINISHED_STATUSES = (job_crud.SUCCEEDED, job_crud.FAILED, job_crud.CANCELLED)
+
+JobHandler = Callable[[Any], Awaitable[Optional[Dict[str, Any]]]]
+FailureHandler = Callable[[Any], None]
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler when retrying cannot help, e.g. a corrupt document."""
+
+
+class JobQueue:
+    """Workers that drain the durable job queue."""
+
+    def __init__(
+        self,
+        concurrency: int = JOB_QUEUE_CONCURRENCY,
+        lease_seconds: int = JOB_LEASE_SECONDS,
+        retry_base_seconds: int = JOB_RETRY_BASE_SECONDS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        sweep_interval: int = JOB_SWEEP_INTERVAL
+    ):
+        """
+        Initialize the job queue.
+
+        Args:
+            concurrency: Number of worker tasks in this process
+            lease_seconds: Lease duration for claimed jobs
+            retry_base_seconds: Backoff before the first retry
+            poll_interval: Idle polling interval of each worker
+            sweep_interval: Interval between sweeps for abandoned jobs
+        """
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval = poll_interval
+        self.sweep_interval = sweep_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._handlers: Dict[str, JobHandler] = {}
+        self._failure_handlers: Dict[str, FailureHandler] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._running_jobs: Dict[int, asyncio.Task] = {}
+        self._stopped_jobs: Set[int] = set()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._finished: Dict[int, asyncio.Event] = {}
+
+    def register(self, kind: str, handler: JobHandler, on_failure: Optional[FailureHandler] = None) -> None:
+        """
+        Register the handler for a job kind.
+
+        Args:
+            kind: Job kind
+            handler: Coroutine taking the claimed job and returning a result summary
+            on_failure: Called with the job once it has failed for good or been cancelled
+        """
+        self._handlers[kind] = handler
+        if on_failure:
+            self._failure_handlers[kind] = on_failure
+
+    def enqueue(
+        self,
+        db,
+        document_id: int,
+        kind: str,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+        commit: bool = True,
+        batch_id: Optional[str] = None
+    ):
+        """
+        Add a job to the queue and wake an idle worker.
+
+        Args:
+            db: Database session
+            document_id: Document to process
+            kind: Job kind
+            max_attempts: Attempts before the job fails for good
+            commit: Commit immediately
+            batch_id: Batch the job belongs to
+
+        Returns:
+            Created ProcessingJob model
+        """
+        db_job = job_crud.enqueue_job(
+            db, document_id, kind, max_attempts=max_attempts, commit=commit, batch_id=batch_id
+        )
+        self.notify()
+        return db_job
+
+    def notify(self) -> None:
+        """Wake idle workers to look for new jobs; safe to call from any thread."""
+        if self._wake is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def start(self) -> None:
+        """Recover from a previous run and start the worker and sweeper tasks."""
+        if self._tasks:
+            return
+        self._wake = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        await asyncio.to_thread(self._recover)
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(), name=f"job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper_loop(), name="job-sweeper"))
+        logger.info(f"Job queue started with {self.concurrency} workers as {self.worker_id}")
+
+    async def stop(self) -> None:
+        """
+        Stop all workers.
+
+        Jobs they were running are released back to the queue right away,
+        without using up an attempt. Only jobs of a process that dies
+        without stopping wait for their leases to expire.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def wait(self, job_id: int, timeout: Optional[float] = None):
+        """
+        Wait until a job has finished.
+
+        Args:
+            job_id: Job ID
+            timeout: Maximum seconds to wait, or None to wait indefinitely
+
+        Returns:
+            The ProcessingJob in its final state, or its current state on timeout
+        """
+        event = self._finished.setdefault(job_id, asyncio.Event())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout is not None else None
+        try:
+            while True:
+                db_job = await asyncio.to_thread(self._load_job, job_id)
+                if db_job is None or db_job.status in FINISHED_STATUSES:
+                    return db_job
+                remaining = deadline - loop.time() if deadline is not None else None
+                if remaining is not None and remaining <= 0:
+                    return db_job
+                # Jobs finished by this process set the event; others are picked up by polling
+                wait_for = self.poll_interval if remaining is None else min(self.poll_interval, remaining)
+                try:
+                    await asyncio.wait_for(event.wait(), wait_for)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._finished.pop(job_id, None)
+
+    @property
+    def running(self) -> bool:
+        """Whether the workers have been started."""
+        return bool(self._tasks)
+
+    def cancel_running(self, job_id: int) -> bool:
+        """
+        Stop a job if it is running in this process.
+
+        The caller is responsible for marking the job cancelled in the database.
+
+        Args:
+            job_id: Job ID
+
+        Returns:
+            True if a local task was cancelled
+        """
+        task = self._running_jobs.get(job_id)
+        if task is None:
+            return False
+        self._stopped_jobs.add(job_id)
+        task.cancel()
+        return True
+
+    def _load_job(self, job_id: int):
+        db = SessionLocal()
+        try:
+            return job_crud.get_job(db, job_id)
+        finally:
+            db.close()
+
+    def _recover(self) -> None:
+        """
+        Requeue abandoned jobs and release documents stuck in "processing" with no job behind them.
+        """
+        db = SessionLocal()
+        try:
+            self._sweep(db)
+            stuck = db.query(ImportedDocument).filter(ImportedDocument.processing_status == "processing").all()
+            for db_document in stuck:
+                if not job_crud.get_active_job(db, db_document.id):
+                    update_document_status(
+                        db,
+                        db_document.id,
+                        processed=False,
+                        processing_status="pending",
+                        processing_notes="Processing was interrupted by a restart; please process the document again"
+                    )
+        except Exception as e:
+            logger.error(f"Error recovering job queue: {str(e)}")
+        finally:
+            db.close()
+
+    def _sweep(self, db) -> None:
+        for db_job in job_crud.requeue_abandoned_jobs(db):
+            logger.warning(f"Job {db_job.id} for document {db_job.document_id} abandoned; now {db_job.status}")
+            if db_job.status == job_crud.FAILED:
+                self._run_failure_handler(db_job)
+        self.notify()
+
+    async def _sweeper_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await asyncio.to_thread(self._sweep_once)
+            except Exception as e:
+                logger.error(f"Error sweeping job queue: {str(e)}")
+
+    def _sweep_once(self) -> None:
+        db = SessionLocal()
+        try:
+            self._sweep(db)
+        finally:
+            db.close()
+
+    def _claim(self):
+        db = SessionLocal()
+        try:
+            db_job = job_crud.claim_next_job(
+                db, self.worker_id, self.lease_seconds, kinds=list(self._handlers.keys())
+            )
+            if db_job is not None:
+                db.expunge(db_job)
+            return db_job
+        finally:
+            db.close()
+
+    async def _worker_loop(self) -> None:
+        while True:
+            try:
+                db_job = await asyncio.to_thread(self._claim)
+            except Exception as e:
+                logger.error(f"Error claiming job: {str(e)}")
+                db_job = None
+
+            if db_job is None:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            await self._run(db_job)
+
+    async def _run(self, db_job) -> None:
+        """Run a claimed job, keeping its lease alive until it finishes."""
+        handler = self._handlers[db_job.kind]
+        progress_broker.publish(
+            db_job.document_id, "started", job_id=db_job.id, kind=db_job.kind, attempt=db_job.attempts
+        )
+        task = asyncio.create_task(handler(db_job))
+        self._running_jobs[db_job.id] = task
+        heartbeat = asyncio.create_task(self._heartbeat(db_job.id, task))
+
+        try:
+            result = await task
+            completed = await asyncio.to_thread(
+                self._with_session, job_crud.complete_job, db_job.id, self.worker_id, result
+            )
+            if not completed:
+                logger.warning(f"Job {db_job.id} finished after losing its lease; result discarded")
+            else:
+                progress_broker.publish(db_job.document_id, "succeeded", job_id=db_job.id, result=result)
+        except asyncio.CancelledError:
+            if db_job.id in self._stopped_jobs:
+                # Cancelled through the API or lease lost; the job row is already up to date
+                logger.info(f"Job {db_job.id} for document {db_job.document_id} stopped")
+                return
+            # The queue is shutting down: hand the job back without using up an attempt
+            self._with_session(job_crud.release_job, db_job.id, self.worker_id)
+            raise
+        except Exception as e:
+            retryable = not isinstance(e, PermanentJobError)
+            error = str(e) if not retryable else f"{type(e).__name__}: {str(e)}"
+            updated = await asyncio.to_thread(
+                self._with_session, job_crud.fail_job,
+                db_job.id, self.worker_id, error, self.retry_base_seconds, retryable
+            )
+            if updated is not None and updated.status == job_crud.FAILED:
+                logger.error(f"Job {db_job.id} for document {db_job.document_id} failed: {error}")
+                await asyncio.to_thread(self._run_failure_handler, updated)
+                progress_broker.publish(db_job.document_id, "failed", job_id=db_job.id, error=error)
+            elif updated is not None:
+                logger.warning(
+                    f"Job {db_job.id} attempt {updated.attempts} failed, retrying at {updated.available_at}: {error}"
+                )
+                progress_broker.publish(
+                    db_job.document_id, "retrying", job_id=db_job.id, error=error,
+                    attempt=updated.attempts, available_at=updated.available_at.isoformat()
+                )
+        finally:
+            heartbeat.cancel()
+            self._running_jobs.pop(db_job.id, None)
+            self._stopped_jobs.discard(db_job.id)
+            event = self._finished.get(db_job.id)
+            if event is not None:
+                event.set()
+
+    async def _heartbeat(self, job_id: int, task: asyncio.Task) -> None:
+        """Renew the lease while the job runs; stop the job if the lease is lost or it was cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                held = await asyncio.to_thread(
+                    self._with_session, job_crud.renew_lease, job_id, self.worker_id, self.lease_seconds
+                )
+            except Exception as e:
+                logger.error(f"Error renewing lease of job {job_id}: {str(e)}")
+                continue
+            if not held:
+                logger.warning(f"Job {job_id} lost its lease or was cancelled; stopping it")
+                self._stopped_jobs.add(job_id)
+                task.cancel()
+                return
+
+    def _with_session(self, func, *args):
+        db = SessionLocal()
+        try:
+            result = func(db, *args)
+            if hasattr(result, "_sa_instance_state"):
+                db.expunge(result)
+            return result
+        finally:
+            db.close()
+
+    def _run_failure_handler(self, db_job) -> None:
+        on_failure = self._failure_handlers.get(db_job.kind)
+        if on_failure is None:
+            return
+        try:
+            on_failure(db_job)
+        except Exception as e:
+            logger.error(f"Error in failure handler for job {db_job.id}: {str(e)}")
+
+
+# Shared job queue instance
+job_queue = JobQueue()
@@ -0,0 +1,323 @@
+"""
+Split large documents into chunks for MCP analysis.
+
+A long PDF sent to /analyze in one piece runs into the request timeout and
+fails as a whole. PDFs above chunk_min_pages are cut into runs of about
+chunk_pages pages, each a PDF of its own, ending where the PDF parser's
+rule scanner finds a rule heading. Word documents are cut at heading
+boundaries into Word documents of at most chunk_max_chars characters of
+text, read with the same streaming reader the Word parser uses; images go
+with the chunk that shows them.
+
+Chunks are built one at a time as they are consumed, so only the chunks in
+flight are held in memory. Each chunk is analyzed separately, so a failing
+chunk is retried on its own, and the rules of all chunks are merged with
+duplicates removed.
+"""
+import io
+import re
+import copy
+import bisect
+import zipfile
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import PyPDF2
+from lxml import etree
+
+from app.parsers.docx_reader import DocxStreamReader, DocxParagraph, UnsupportedDocxError
+from app.parsers.pdf_parser import PDFParser
+from app.parsers.rule_scanner import rule_scanner
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class DocumentChunk(NamedTuple):
+    """A part of a document that is analyzed on its own."""
+    index: int
+    name: str
+    document_type: str
+    content: bytes
+    # Where the chunk lies in the document, e.g. "pages 31-45"
+    label: str
+    # Number of chunks the document was cut into
+    count: int
+
+
+def split_document(
+    document_type: str,
+    filename: str,
+    file_data: Optional[bytes],
+    file_path: Optional[str],
+    config: Dict[str, Any]
+) -> Iterator[DocumentChunk]:
+    """
+    Split a document for chunked analysis.
+
+    The cuts are planned before the first chunk is yielded; each chunk's
+    content is built when it is requested.
+
+    Args:
+        document_type: DocumentType value of the document
+        filename: Original filename
+        file_data: Raw document bytes, if stored in the database
+        file_path: Path of the stored document
+        config: MCP configuration with chunk_min_pages, chunk_pages and chunk_max_chars
+
+    Yields:
+        Chunks in document order; none if the document is analyzed whole
+    """
+    if not file_data and not file_path:
+        return
+
+    try:
+        if document_type == "PDF":
+            chunks = _split_pdf(
+                file_data, file_path, filename,
+                int(config.get("chunk_min_pages", 30)), int(config.get("chunk_pages", 15))
+            )
+        elif document_type == "WORD":
+            chunks = _split_word(file_data, file_path, filename, int(config.get("chunk_max_chars", 60000)))
+        else:
+            return
+        first = next(chunks, None)
+    except (PyPDF2.errors.PdfReadError, UnsupportedDocxError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError) as e:
+        # Documents the splitter cannot read are sent whole, as before
+        logger.warning(f"Could not split {filename} for MCP analysis, sending it whole: {str(e)}")
+        return
+
+    if first is not None:
+        yield first
+        yield from chunks
+
+
+def _split_pdf(
+    file_data: Optional[bytes],
+    file_path: Optional[str],
+    filename: str,
+    min_pages: int,
+    chunk_pages: int
+) -> Iterator[DocumentChunk]:
+    """Cut a PDF into runs of about chunk_pages pages if it has more than min_pages."""
+    parser = PDFParser(file_path=file_path, file_content=file_data or None)
+    page_count = len(parser.pdf.pages)
+    if page_count <= min_pages or chunk_pages <= 0:
+        return
+
+    runs = _page_runs([page["text"] for page in parser.extract_page_texts()], chunk_pages)
+    stem = filename.rsplit(".", 1)[0]
+    for index, (start, end) in enumerate(runs):
+        writer = PyPDF2.PdfWriter()
+        for page_index in range(start, end):
+            writer.add_page(parser.pdf.pages[page_index])
+        output = io.BytesIO()
+        writer.write(output)
+        yield DocumentChunk(
+            index=index,
+            name=f"{stem}.pages-{start + 1}-{end}.pdf",
+            document_type="PDF",
+            content=output.getvalue(),
+            label=f"pages {start + 1}-{end}",
+            count=len(runs)
+        )
+
+
+def _page_runs(page_texts: List[str], chunk_pages: int) -> List[Tuple[int, int]]:
+    """
+    Plan runs of about chunk_pages pages that end where a rule starts.
+
+    Each run ends at the last page within chunk_pages on which the rule
+    scanner finds a heading, like the PDF parser does. When text of the
+    previous rule comes before the heading on that page, the page goes into
+    both runs, so each of the two rules is whole in one of them. Runs are
+    only cut at a fixed page when no heading falls within chunk_pages.
+
+    Args:
+        page_texts: Text of each page
+        chunk_pages: Pages per run to aim for
+
+    Returns:
+        Zero-based (start, end) page ranges, end exclusive
+    """
+    # Join the pages as the PDF parser does, so offsets map back to pages the same way
+    page_offsets = []
+    offset = 0
+    for text in page_texts:
+        page_offsets.append(offset)
+        offset += len(text) + 2
+    full_text = "".join(text + "\n\n" for text in page_texts)
+
+    # Whether the first heading on a page is the first text on it
+    heading_at_top: Dict[int, bool] = {}
+    for span in rule_scanner.scan(full_text):
+        page = bisect.bisect_right(page_offsets, span["start"]) - 1
+        heading_at_top.setdefault(page, not full_text[page_offsets[page]:span["start"]].strip())
+    heading_pages = sorted(heading_at_top)
+
+    runs = []
+    start = 0
+    while start + chunk_pages < len(page_texts):
+        position = bisect.bisect_right(heading_pages, start + chunk_pages) - 1
+        if position >= 0 and heading_pages[position] > start:
+            cut = heading_pages[position]
+            end = cut if heading_at_top[cut] else cut + 1
+        else:
+            cut = end = start + chunk_pages
+        runs.append((start, end))
+        start = cut
+    runs.append((start, len(page_texts)))
+    return runs
+
+
+def _split_word(
+    file_data: Optional[bytes],
+    file_path: Optional[str],
+    filename: str,
+    max_chars: int
+) -> Iterator[DocumentChunk]:
+    """Cut a Word document at headings into Word documents of at most max_chars characters of text."""
+    with DocxStreamReader(io.BytesIO(file_data) if file_data else file_path) as reader:
+        starts = _block_chunk_starts(reader.iter_blocks(), max_chars)
+        if not starts:
+            return
+
+        stem = filename.rsplit(".", 1)[0]
+        ends = starts[1:] + [None]
+        index = 0
+        blocks = []
+        for position, (element, _) in enumerate(reader.iter_blocks()):
+            if position == ends[index]:
+                yield _word_chunk(reader, blocks, index, stem, len(starts))
+                index += 1
+                blocks = []
+            blocks.append(copy.deepcopy(element))
+        yield _word_chunk(reader, blocks, index, stem, len(starts))
+
+
+def _word_chunk(reader: DocxStreamReader, blocks: List[Any], index: int, stem: str, count: int) -> DocumentChunk:
+    return DocumentChunk(
+        index=index,
+        name=f"{stem}.part-{index + 1}.docx",
+        document_type="WORD",
+        content=reader.package_with_body(blocks),
+        label=f"part {index + 1} of {count}",
+        count=count
+    )
+
+
+def _block_chunk_starts(blocks: Iterable[Tuple[Any, Optional[DocxParagraph]]], max_chars: int) -> List[int]:
+    """
+    Plan where to cut a document body into chunks of at most max_chars characters.
+
+    Whole heading sections are packed into chunks; only a section longer
+    than max_chars is cut itself, between its paragraphs and tables.
+
+    Args:
+        blocks: Body-level elements from DocxStreamReader.iter_blocks
+        max_chars: Most characters of text per chunk
+
+    Returns:
+        Index of the first block of each chunk; empty if the document fits in one
+    """
+    sizes: List[int] = []
+    section_starts: List[int] = []
+    for position, (element, paragraph) in enumerate(blocks):
+        if paragraph is not None:
+            sizes.append(len(paragraph.text))
+            if _heading_level(paragraph.style) or position == 0:
+                section_starts.append(position)
+        else:
+            sizes.append(sum(len(text) for text in element.itertext()))
+            if position == 0:
+                section_starts.append(position)
+
+    if sum(sizes) <= max_chars:
+        return []
+
+    starts = [0]
+    current = 0
+    for start, end in zip(section_starts, section_starts[1:] + [len(sizes)]):
+        section = sum(sizes[start:end])
+        if current and current + section > max_chars:
+            starts.append(start)
+            current = 0
+        if section <= max_chars:
+            current += section
+            continue
+        for position in range(start, end):
+            if current and current + sizes[position] > max_chars:
+                starts.append(position)
+                current = 0
+            current += sizes[position]
+    return starts
+
+
+def _heading_level(style: Optional[str]) -> int:
+    """Heading level of a paragraph style, or 0 for body text."""
+    if not style:
+        return 0
+    if style == "Title":
+        return 1
+    match = re.match(r"Heading (\d)", style)
+    return min(int(match.group(1)), 6) if match else 0
+
+
+def _normalize(text: str) -> str:
+    """Lower-case text with punctuation and runs of whitespace collapsed."""
+    return re.sub(r"[\W_]+", " ", text.lower()).strip()
+
+
+def merge_chunk_results(chunks: List[DocumentChunk], results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the analyses of a document's chunks.
+
+    Rules found in several chunks, e.g. on a page that two chunks share,
+    are kept once. A copy cut off at the end of a chunk gives way to the
+    copy whose content continues it; of identical copies the one with the
+    highest confidence wins. Each rule records the chunk it came from.
+
+    Args:
+        chunks: Analyzed chunks
+        results: Output of extract_rules_with_ai for each chunk, in chunk order
+
+    Returns:
+        Dictionary with rules, metadata and images, like extract_rules_with_ai
+    """
+    rules: List[Dict[str, Any]] = []
+    # Positions in rules and normalized contents of the rules kept under each normalized title
+    kept_by_title: Dict[str, List[List[Any]]] = {}
+    images = []
+    metadata: Dict[str, Any] = {}
+
+    for chunk, result in zip(chunks, results):
+        for rule in result["rules"]:
+            content = _normalize(rule.get("content", ""))
+            same_title = kept_by_title.setdefault(_normalize(rule.get("title", "")), [])
+            kept = next(
+                (entry for entry in same_title if entry[1].startswith(content) or content.startswith(entry[1])),
+                None
+            )
+            if kept is None:
+                same_title.append([len(rules), content])
+                rules.append({**rule, "chunk": chunk.label})
+                continue
+            position, kept_content = kept
+            if len(content) > len(kept_content) or (
+                content == kept_content and rule.get("confidence", 0.0) > rules[position].get("confidence", 0.0)
+            ):
+                kept[1] = content
+                rules[position] = {**rule, "chunk": chunk.label}
+        images.extend(result["images"])
+        # The first chunk usually carries the title page
+        for name, value in result["metadata"].items():
+            metadata.setdefault(name, value)
+
+    metadata["chunks"] = len(chunks)
+    # Duplicates take the place of the first copy, so rules stay in document order
+    return {
+        "rules": rules,
+        "metadata": metadata,
+        "images": images,
+        "cached": all(result.get("cached", False) for result in results)
+    }
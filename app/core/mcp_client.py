@@ -9,11 +9,23 @@ import json
 import asyncio
 import os
 import base64
-from typing import Dict, Any, List, Optional, Union, BinaryIO
+import random
+import time
+import secrets
+import hashlib
+import importlib.util
+import mimetypes
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Callable, Dict, Any, List, Optional, Tuple, Union, BinaryIO
 import logging
 from pathlib import Path
 from io import BytesIO
 
+from app.core.mcp_config import load_mcp_config
+from app.crud import mcp_result as mcp_result_crud
+from app.database.database import SessionLocal
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -21,63 +33,304 @@ logging.basicConfig(
 )
 logger = logging.getLogger("mcp_client")
 
+# Ways of sending a document to /analyze: the file as a multipart upload,
+# or base64 inside a JSON body for servers that do not advertise multipart
+TRANSPORTS = ("auto", "multipart", "json")
+
+# Capability a server lists in its /ping response when /analyze accepts multipart uploads
+MULTIPART_CAPABILITY = "multipart_upload"
+
+# Responses to a multipart upload meaning the server only understands JSON
+MULTIPART_REJECTED_STATUSES = (415, 422)
+
+# Factor the wait between task polls grows by, up to the maximum delay
+POLL_BACKOFF_FACTOR = 2
+
+# Task poll responses meaning the server is busy; polling continues after Retry-After
+POLL_BUSY_STATUSES = (429, 503)
+
 class MCPClient:
     """Client for interacting with a Model Context Protocol server."""
     
-    def __init__(self, server_url: str, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        server_url: str,
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+        transport: str = "auto",
+        poll_initial_delay: float = 0.5,
+        poll_max_delay: float = 15.0,
+        task_deadline: float = 1800.0,
+        callback_base_url: Optional[str] = None,
+        cache_ttl: float = 604800.0,
+        model_ttl: float = 60.0
+    ):
         """
         Initialize the MCP client.
         
+        Connections are pooled and kept alive between requests, so one client
+        should be shared rather than created per call (see get_mcp_client).
+        
         Args:
             server_url: Base URL of the MCP server
             api_key: API key for authentication (optional)
+            timeout: Request timeout in seconds
+            max_connections: Maximum number of open connections
+            max_keepalive_connections: Maximum number of idle connections kept open
+            keepalive_expiry: Seconds an idle connection is kept open
+            http2: Use HTTP/2 if the h2 package is installed
+            transport: How documents are sent: "multipart", "json", or "auto"
+                to use multipart when the server advertises it on /ping
+            poll_initial_delay: Seconds before the first poll of an asynchronous task
+            poll_max_delay: Longest wait between task polls, in seconds
+            task_deadline: Seconds to wait for an asynchronous task before giving up
+            callback_base_url: Public base URL of this application; when set,
+                the server is asked to POST finished tasks to it instead of
+                being polled often
+            cache_ttl: Seconds an analysis is reused for the same file,
+                options and model; 0 disables the result cache
+            model_ttl: Seconds the model reported on /ping is trusted before
+                the cache asks the server again
         """
+        if transport not in TRANSPORTS:
+            raise ValueError(f"Invalid MCP transport '{transport}'. Valid options: {', '.join(TRANSPORTS)}")
+        
         self.server_url = server_url.rstrip("/")
         self.api_key = api_key
+        self.transport = transport
+        # Capabilities listed by the server's last successful /ping, if any
+        self.capabilities: Optional[List[str]] = None
+        # Model identifier reported by the server's last successful /ping, if any
+        self.model: Optional[str] = None
+        self.cache_ttl = cache_ttl
+        self.model_ttl = model_ttl
+        self._model_checked_at: Optional[float] = None
+        self._model_lock = asyncio.Lock()
+        self.poll_initial_delay = poll_initial_delay
+        self.poll_max_delay = poll_max_delay
+        self.task_deadline = task_deadline
+        self.callback_base_url = callback_base_url.rstrip("/") if callback_base_url else None
+        # Task notifications posted by the server, by callback token
+        self._callbacks: Dict[str, asyncio.Queue] = {}
+        
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning("HTTP/2 requested for the MCP server but the h2 package is not installed; using HTTP/1.1")
+            http2 = False
+        
+        # Content-Type is left to each request, as uploads are not always JSON
         self.client = httpx.AsyncClient(
             headers={
                 "Authorization": f"Bearer {api_key}" if api_key else "",
-                "Content-Type": "application/json",
                 "Accept": "application/json"
             },
-            timeout=60.0  # Increased timeout for document processing
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            http2=http2
+        )
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "MCPClient":
+        """
+        Create a client from an MCP configuration (see load_mcp_config).
+        
+        Args:
+            config: MCP configuration dictionary
+            
+        Returns:
+            New MCPClient
+        """
+        return cls(
+            server_url=config["server_url"],
+            api_key=config["api_key"],
+            timeout=float(config.get("timeout_seconds", 60)),
+            max_connections=int(config.get("max_connections", 20)),
+            max_keepalive_connections=int(config.get("max_keepalive_connections", 10)),
+            keepalive_expiry=float(config.get("keepalive_expiry_seconds", 30)),
+            http2=bool(config.get("http2", False)),
+            transport=config.get("transport", "auto"),
+            poll_initial_delay=float(config.get("poll_initial_delay_seconds", 0.5)),
+            poll_max_delay=float(config.get("poll_max_delay_seconds", 15)),
+            task_deadline=float(config.get("task_deadline_seconds", 1800)),
+            callback_base_url=config.get("callback_base_url") or None,
+            cache_ttl=float(config.get("result_cache_ttl_seconds", 604800)),
+            model_ttl=float(config.get("model_check_seconds", 60))
         )
+    
+    @property
+    def is_closed(self) -> bool:
+        """Whether the HTTP client has been closed."""
+        return self.client.is_closed
         
     async def close(self):
         """Close the HTTP client session."""
         await self.client.aclose()
+    
+    async def __aenter__(self) -> "MCPClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
         
     async def ping(self) -> bool:
         """
         Check if the MCP server is available.
         
+        A JSON response may list the server's capabilities and name its model, e.g.
+        {"capabilities": ["multipart_upload"], "model": "esd-rules-2"}; they are
+        kept in self.capabilities and self.model.
+        
         Returns:
             True if server is available, False otherwise
         """
         try:
             response = await self.client.get(f"{self.server_url}/ping")
-            return response.status_code == 200
         except Exception as e:
             logger.error(f"Error pinging MCP server: {str(e)}")
             return False
-            
-    async def analyze_document(
-        self, 
-        file_content: bytes, 
-        file_name: str, 
-        document_type: str
-    ) -> Dict[str, Any]:
+        
+        if response.status_code != 200:
+            return False
+        
+        try:
+            data = response.json()
+            capabilities = data.get("capabilities", [])
+            model = data.get("model")
+        except (ValueError, AttributeError):
+            # Plain-text or non-object pings advertise nothing
+            capabilities, model = [], None
+        self.capabilities = [str(capability) for capability in capabilities] if isinstance(capabilities, list) else []
+        self.model = str(model) if model else None
+        self._model_checked_at = time.monotonic()
+        return True
+    
+    async def current_model(self) -> Optional[str]:
         """
-        Send a document to the MCP server for analysis.
+        Get the server's current model, pinging at most once per model_ttl.
+        
+        Concurrent callers, such as the chunks of one document, share a
+        single ping.
+        
+        Returns:
+            Model identifier, or None if the server is unreachable or names no model
+        """
+        async with self._model_lock:
+            checked_at = self._model_checked_at
+            if checked_at is None or time.monotonic() - checked_at >= self.model_ttl:
+                if not await self.ping():
+                    return None
+            return self.model
+    
+    async def _negotiate_transport(self) -> str:
+        """
+        Decide how to send documents to this server.
+        
+        Returns:
+            "multipart" or "json"
+        """
+        if self.transport != "auto":
+            return self.transport
+        if self.capabilities is None:
+            await self.ping()
+        return "multipart" if MULTIPART_CAPABILITY in (self.capabilities or []) else "json"
+    
+    def _open_callback(self) -> Tuple[Optional[str], Optional[asyncio.Queue]]:
+        """
+        Register a callback URL for one analysis request, if callbacks are enabled.
+        
+        Returns:
+            Tuple of the callback URL and the queue notifications arrive on,
+            or (None, None)
+        """
+        if not self.callback_base_url:
+            return None, None
+        # The unguessable token is what authorizes the server's callback
+        token = secrets.token_urlsafe(24)
+        self._callbacks[token] = asyncio.Queue()
+        return f"{self.callback_base_url}/documents/mcp-callback/{token}", self._callbacks[token]
+    
+    def deliver_callback(self, token: str, payload: Dict[str, Any]) -> bool:
+        """
+        Hand a task notification posted by the server to the request waiting for it.
         
         Args:
-            file_content: Binary content of the file
-            file_name: Original filename
-            document_type: Type of document (excel, pdf, word)
+            token: Token from the callback URL
+            payload: Task status, as returned by /tasks/{task_id}
             
         Returns:
-            Dictionary containing analysis results
+            True if a request was waiting for the token
+        """
+        queue = self._callbacks.get(token)
+        if queue is None:
+            return False
+        queue.put_nowait(payload)
+        return True
+    
+    def _analysis_options(self) -> Dict[str, Any]:
+        """Options sent with every analysis request."""
+        return {
+            "extract_rules": True,
+            "extract_metadata": True,
+            "extract_images": True,
+            "use_advanced_models": True
+        }
+    
+    async def _post_multipart(
+        self,
+        file_content: Optional[bytes],
+        file_path: Optional[str],
+        file_name: str,
+        document_type: str,
+        callback_url: Optional[str] = None
+    ) -> httpx.Response:
+        """
+        Upload a document to /analyze as multipart form data.
+        
+        The file is streamed from file_path in chunks when no content is
+        given, so it is never held in memory as a whole.
         """
+        mime_type = mimetypes.guess_type(file_name)[0] or "application/octet-stream"
+        fields = {
+            "name": file_name,
+            "type": document_type,
+            "analysis_type": "rule_extraction",
+            "options": json.dumps(self._analysis_options())
+        }
+        if callback_url:
+            fields["callback_url"] = callback_url
+        if file_content is not None:
+            return await self.client.post(
+                f"{self.server_url}/analyze",
+                data=fields,
+                files={"file": (file_name, BytesIO(file_content), mime_type)}
+            )
+        with open(file_path, "rb") as f:
+            return await self.client.post(
+                f"{self.server_url}/analyze",
+                data=fields,
+                files={"file": (file_name, f, mime_type)}
+            )
+    
+    async def _post_json(
+        self,
+        file_content: Optional[bytes],
+        file_path: Optional[str],
+        file_name: str,
+        document_type: str,
+        callback_url: Optional[str] = None
+    ) -> httpx.Response:
+        """Send a document to /analyze base64-encoded in a JSON body."""
+        if file_content is None:
+            with open(file_path, "rb") as f:
+                file_content = f.read()
+        
         # Convert file content to base64 for transmission
         encoded_content = base64.b64encode(file_content).decode()
         
@@ -88,24 +341,68 @@ class MCPClient:
                 "content": encoded_content
             },
             "analysis_type": "rule_extraction",
-            "options": {
-                "extract_rules": True,
-                "extract_metadata": True,
-                "extract_images": True,
-                "use_advanced_models": True
-            }
+            "options": self._analysis_options()
         }
+        if callback_url:
+            payload["callback_url"] = callback_url
+        
+        return await self.client.post(
+            f"{self.server_url}/analyze",
+            json=payload
+        )
+            
+    async def analyze_document(
+        self, 
+        file_content: Optional[bytes], 
+        file_name: str, 
+        document_type: str,
+        file_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Send a document to the MCP server for analysis.
+        
+        Servers that advertise multipart uploads receive the raw file;
+        others get it base64-encoded in JSON. A server that rejects a
+        multipart upload is sent JSON from then on.
+        
+        Args:
+            file_content: Binary content of the file, or None to read file_path
+            file_name: Original filename
+            document_type: Type of document (excel, pdf, word)
+            file_path: Path of the file, used when file_content is None
+            progress_callback: Called with the task status while an
+                asynchronous analysis is still running
+            
+        Returns:
+            Dictionary containing analysis results
+        """
+        if file_content is None and not file_path:
+            return {"error": f"No content for document {file_name}"}
         
+        callback_url, callback_queue = self._open_callback()
         try:
-            response = await self.client.post(
-                f"{self.server_url}/analyze",
-                json=payload
-            )
+            transport = await self._negotiate_transport()
+            if transport == "multipart":
+                response = await self._post_multipart(file_content, file_path, file_name, document_type, callback_url)
+                if response.status_code in MULTIPART_REJECTED_STATUSES and self.transport == "auto":
+                    logger.warning(
+                        f"MCP server rejected a multipart upload ({response.status_code}); falling back to JSON"
+                    )
+                    self.capabilities = [c for c in self.capabilities or [] if c != MULTIPART_CAPABILITY]
+                    response = await self._post_json(file_content, file_path, file_name, document_type, callback_url)
+            else:
+                response = await self._post_json(file_content, file_path, file_name, document_type, callback_url)
             
             if response.status_code == 202:
                 # Asynchronous processing - get task ID
                 task_id = response.json().get("task_id")
-                return await self._poll_task_result(task_id)
+                return await self._poll_task_result(
+                    task_id,
+                    callback_queue=callback_queue,
+                    progress_callback=progress_callback,
+                    retry_after=_retry_after_seconds(response)
+                )
             elif response.status_code == 200:
                 # Synchronous response
                 return response.json()
@@ -117,69 +414,169 @@ class MCPClient:
         except Exception as e:
             logger.error(f"Exception during document analysis: {str(e)}")
             return {"error": str(e)}
+        finally:
+            if callback_url:
+                self._callbacks.pop(callback_url.rsplit("/", 1)[1], None)
     
-    async def _poll_task_result(self, task_id: str, max_retries: int = 30, retry_delay: int = 2) -> Dict[str, Any]:
+    async def _poll_task_result(
+        self,
+        task_id: str,
+        callback_queue: Optional[asyncio.Queue] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        retry_after: Optional[float] = None
+    ) -> Dict[str, Any]:
         """
-        Poll for the result of an asynchronous task.
+        Wait for the result of an asynchronous task.
+        
+        The task is polled with exponential backoff and jitter, starting at
+        poll_initial_delay and capped at poll_max_delay. A Retry-After header
+        or an "eta_seconds" field from the server sets the next wait instead.
+        With a callback queue, notifications posted by the server end a wait
+        early, and polling at the maximum delay only covers lost callbacks.
         
         Args:
             task_id: ID of the task to poll for
-            max_retries: Maximum number of polling attempts
-            retry_delay: Delay between polling attempts in seconds
+            callback_queue: Queue receiving task notifications, if callbacks are enabled
+            progress_callback: Called with the task status while the task is still running
+            retry_after: Server hint for the first wait, in seconds
             
         Returns:
             Task result or error information
         """
-        retries = 0
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.task_deadline
+        delay = self.poll_initial_delay
         
-        while retries < max_retries:
-            try:
-                response = await self.client.get(f"{self.server_url}/tasks/{task_id}")
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return {"error": f"MCP task {task_id} did not finish within {self.task_deadline:g} seconds"}
+            
+            if retry_after is not None:
+                wait = min(retry_after, self.poll_max_delay)
+            elif callback_queue is not None:
+                wait = self.poll_max_delay
+            else:
+                # Equal jitter keeps many waiting documents from polling in lockstep
+                wait = random.uniform(delay / 2, delay)
+                delay = min(delay * POLL_BACKOFF_FACTOR, self.poll_max_delay)
+            retry_after = None
+            
+            data = await self._wait_for_callback(callback_queue, min(wait, remaining))
+            if data is None:
+                try:
+                    response = await self.client.get(f"{self.server_url}/tasks/{task_id}")
+                except httpx.TransportError as e:
+                    logger.warning(f"Error polling MCP task {task_id}, retrying: {str(e)}")
+                    continue
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    status = data.get("status", "")
-                    
-                    if status == "completed":
-                        return data.get("result", {})
-                    elif status == "failed":
-                        return {"error": data.get("error", "Task failed")}
-                    elif status == "processing":
-                        # Still processing, wait and retry
-                        await asyncio.sleep(retry_delay)
-                        retries += 1
-                        continue
-                else:
+                retry_after = _retry_after_seconds(response)
+                if response.status_code in POLL_BUSY_STATUSES:
+                    continue
+                if response.status_code != 200:
                     return {"error": f"Error checking task status: {response.status_code} - {response.text}"}
-                    
-            except Exception as e:
-                return {"error": f"Exception during task polling: {str(e)}"}
-                
-        return {"error": "Maximum retries reached while waiting for task completion"}
+                data = response.json()
+            
+            status = data.get("status", "")
+            if status == "completed":
+                return data.get("result", {})
+            elif status == "failed":
+                return {"error": data.get("error", "Task failed")}
+            
+            # Any other status means the task is still queued or processing
+            eta = data.get("eta_seconds")
+            if retry_after is None and isinstance(eta, (int, float)) and eta > 0:
+                retry_after = float(eta)
+            if progress_callback is not None:
+                progress_callback(data)
+    
+    async def _wait_for_callback(self, callback_queue: Optional[asyncio.Queue], timeout: float) -> Optional[Dict[str, Any]]:
+        """
+        Wait for a task notification, or just sleep when callbacks are disabled.
+        
+        Returns:
+            The notification payload, or None if the wait timed out
+        """
+        if callback_queue is None:
+            await asyncio.sleep(timeout)
+            return None
+        try:
+            return await asyncio.wait_for(callback_queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
         
-    async def extract_rules_with_ai(self, file_content: bytes, file_name: str, document_type: str) -> Dict[str, Any]:
+    async def extract_rules_with_ai(
+        self,
+        file_content: Optional[bytes],
+        file_name: str,
+        document_type: str,
+        file_path: Optional[str] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        content_hash: Optional[str] = None,
+        document_hash: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Extract rules from a document using AI assistance.
         
+        When content_hash is given, an unexpired analysis of the same content
+        with the same options and model is reused instead of calling the server.
+        While the server's model is unknown nothing is read from or written to
+        the cache.
+        
         Args:
-            file_content: Binary content of the file
+            file_content: Binary content of the file, or None to read file_path
             file_name: Original filename
             document_type: Type of document (excel, pdf, word)
+            file_path: Path of the file, used when file_content is None
+            progress_callback: Called with the task status while an
+                asynchronous analysis is still running
+            content_hash: SHA-256 of the analyzed content, to cache the analysis under
+            document_hash: SHA-256 of the whole document when a chunk is
+                analyzed, so invalidating the document drops its chunks too
             
         Returns:
-            Dictionary with extracted rules, metadata and images
+            Dictionary with extracted rules, metadata and images, and whether
+            the analysis came from the cache
         """
-        result = await self.analyze_document(file_content, file_name, document_type)
+        use_cache = content_hash is not None and self.cache_ttl > 0
+        result = None
+        model = None
+        if use_cache:
+            options_hash = hashlib.sha256(
+                json.dumps(self._analysis_options(), sort_keys=True).encode("utf-8")
+            ).hexdigest()
+            # Analyses by a replaced model are not reused, and with an unknown
+            # model there is no telling which analyses are current
+            model = await self.current_model()
+            if model:
+                result = await asyncio.to_thread(_load_cached_analysis, content_hash, options_hash, model)
+        
+        cached = result is not None
+        if not cached:
+            result = await self.analyze_document(
+                file_content, file_name, document_type, file_path=file_path, progress_callback=progress_callback
+            )
         
         # Handle error cases
         if "error" in result:
             return {"rules": [], "metadata": {}, "images": [], "error": result["error"]}
+        
+        if model and not cached:
+            model = str(result.get("model") or model)
+            try:
+                await asyncio.to_thread(
+                    _store_cached_analysis, content_hash, options_hash, model, result, self.cache_ttl, document_hash
+                )
+            except Exception as e:
+                # A failed cache write only costs a repeated analysis later
+                logger.warning(f"Could not cache MCP analysis of {file_name}: {str(e)}")
             
         # Process and format the results
         processed_result = {
             "rules": [],
             "metadata": result.get("metadata", {}),
-            "images": []
+            "images": [],
+            "cached": cached
         }
         
         # Process extracted rules
@@ -209,3 +606,82 @@ class MCPClient:
             ]
             
         return processed_result
+
+
+def _load_cached_analysis(content_hash: str, options_hash: str, model: str) -> Optional[Dict[str, Any]]:
+    """Raw result of a cached analysis, or None; runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        cached = mcp_result_crud.get_mcp_result(db, content_hash, options_hash, model)
+        return cached.result if cached else None
+    finally:
+        db.close()
+
+
+def _store_cached_analysis(
+    content_hash: str,
+    options_hash: str,
+    model: str,
+    result: Dict[str, Any],
+    ttl_seconds: float,
+    document_hash: Optional[str]
+) -> None:
+    """Cache the raw result of an analysis; runs in a worker thread."""
+    db = SessionLocal()
+    try:
+        mcp_result_crud.save_mcp_result(
+            db, content_hash, options_hash, model, result, int(ttl_seconds), document_hash=document_hash
+        )
+    finally:
+        db.close()
+
+
+def _retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """
+    Read a Retry-After header given in seconds or as an HTTP date.
+    
+    Returns:
+        Seconds to wait, or None if the header is missing or invalid
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+# Process-wide client, created on first use and closed when the app shuts down
+_shared_client: Optional[MCPClient] = None
+
+
+def get_mcp_client() -> MCPClient:
+    """
+    Get the shared MCP client; usable as a FastAPI dependency.
+    
+    The client is created from the MCP configuration on first use, and
+    again if it has been closed.
+    
+    Returns:
+        Shared MCPClient
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.is_closed:
+        _shared_client = MCPClient.from_config(load_mcp_config())
+    return _shared_client
+
+
+async def close_mcp_client() -> None:
+    """Close the shared MCP client and its pooled connections."""
+    global _shared_client
+    client, _shared_client = _shared_client, None
+    if client is not None:
+        await client.close()
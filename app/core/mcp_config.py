@@ -11,6 +11,36 @@ DEFAULT_MCP_CONFIG = {
     "server_url": "http://localhost:3000",
     "api_key": "",  # Default empty, should be set in environment or config file
     "timeout_seconds": 60,
+    # Connection pool of the shared client; HTTP/2 needs the h2 package
+    "max_connections": 20,
+    "max_keepalive_connections": 10,
+    "keepalive_expiry_seconds": 30,
+    "http2": False,
+    # How documents are sent: "multipart", "json" (base64), or "auto" to ask /ping
+    "transport": "auto",
+    # Polling of asynchronous analysis tasks
+    "poll_initial_delay_seconds": 0.5,
+    "poll_max_delay_seconds": 15,
+    "task_deadline_seconds": 1800,
+    # Public URL of this application; when set, the server is asked to POST
+    # finished tasks to /documents/mcp-callback/{token} instead of being polled often
+    "callback_base_url": "",
+    # Dispatcher limits (see app.core.mcp_dispatcher)
+    "max_concurrent_analyses": 4,
+    "analyses_per_second": 2,
+    "analysis_burst": 4,
+    "circuit_failure_threshold": 5,
+    "circuit_reset_seconds": 60,
+    # Chunked analysis of large documents (see app.core.mcp_chunking)
+    "chunk_min_pages": 30,
+    "chunk_pages": 15,
+    "chunk_max_chars": 60000,
+    "chunk_attempts": 3,
+    "chunk_retry_seconds": 5,
+    # Seconds an analysis is reused for the same file, options and model; 0 disables the cache
+    "result_cache_ttl_seconds": 604800,
+    # Seconds the model named on /ping is trusted before the cache pings again
+    "model_check_seconds": 60,
     "extract_rules": True,
     "extract_metadata": True,
     "extract_images": True,
@@ -49,6 +79,9 @@ def load_mcp_config() -> Dict[str, Any]:
     if os.environ.get("MCP_API_KEY"):
         config["api_key"] = os.environ.get("MCP_API_KEY")
         
+    if os.environ.get("MCP_CALLBACK_BASE_URL"):
+        config["callback_base_url"] = os.environ.get("MCP_CALLBACK_BASE_URL")
+        
     if os.environ.get("MCP_TIMEOUT"):
         try:
             config["timeout_seconds"] = int(os.environ.get("MCP_TIMEOUT"))
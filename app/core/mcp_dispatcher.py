@@ -0,0 +1,292 @@
+"""
+Admission control for calls to the MCP server.
+
+Every analysis goes through the shared MCPDispatcher, which
+- caps the number of analyses in flight with a semaphore,
+- spaces out new analyses with a token bucket, and
+- stops calling the server while a circuit breaker is open after repeated
+  failures, letting a single trial call through once the reset time passes.
+
+It also keeps the counters and latency histogram shown by
+GET /documents/mcp-status.
+"""
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from app.core.mcp_config import load_mcp_config
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Upper bounds, in seconds, of the analysis latency histogram buckets
+LATENCY_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600)
+
+# Latencies kept for percentiles
+LATENCY_SAMPLES = 500
+
+# Circuit breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """The MCP server failed repeatedly and is not being called for now."""
+
+    def __init__(self, retry_in: float):
+        super().__init__(f"MCP server circuit is open after repeated failures; retrying in {retry_in:.1f} seconds")
+        self.retry_in = retry_in
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and take it; callers are served in order."""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class MCPDispatcher:
+    """Run MCP calls with bounded concurrency, rate limiting and a circuit breaker."""
+
+    def __init__(
+        self,
+        max_concurrency: int = 4,
+        rate_per_second: float = 2.0,
+        burst: int = 4,
+        failure_threshold: int = 5,
+        reset_seconds: float = 60.0
+    ):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            max_concurrency: Analyses allowed in flight at once
+            rate_per_second: Analyses started per second on average; 0 disables the limit
+            burst: Analyses that may start at once after an idle period
+            failure_threshold: Consecutive failures that open the circuit
+            reset_seconds: Seconds the circuit stays open before a trial call
+        """
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._bucket = TokenBucket(rate_per_second, burst)
+
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self._histogram = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._latencies: deque = deque(maxlen=LATENCY_SAMPLES)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> "MCPDispatcher":
+        """
+        Create a dispatcher from an MCP configuration (see load_mcp_config).
+
+        Args:
+            config: MCP configuration dictionary
+
+        Returns:
+            New MCPDispatcher
+        """
+        return cls(
+            max_concurrency=int(config.get("max_concurrent_analyses", 4)),
+            rate_per_second=float(config.get("analyses_per_second", 2)),
+            burst=int(config.get("analysis_burst", 4)),
+            failure_threshold=int(config.get("circuit_failure_threshold", 5)),
+            reset_seconds=float(config.get("circuit_reset_seconds", 60))
+        )
+
+    @property
+    def state(self) -> str:
+        """Circuit state; an open circuit whose reset time has passed reports half-open."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+            return HALF_OPEN
+        return self._state
+
+    def _admit(self) -> None:
+        """Let a call through the circuit breaker or raise CircuitOpenError."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and not self._trial_running:
+            # One trial call decides whether the circuit closes again
+            self._trial_running = True
+            self._state = HALF_OPEN
+            return
+        self.rejected += 1
+        retry_in = max(self.reset_seconds - (time.monotonic() - self._opened_at), 0.0)
+        raise CircuitOpenError(retry_in)
+
+    def _record(self, failed: bool) -> None:
+        """Update the circuit breaker with the outcome of a call."""
+        was_trial = self._state == HALF_OPEN
+        self._trial_running = False
+        if not failed:
+            if self._state != CLOSED:
+                logger.info("MCP server is responding again; circuit closed")
+            self._state = CLOSED
+            self._consecutive_failures = 0
+            return
+
+        self._consecutive_failures += 1
+        if was_trial or self._consecutive_failures >= self.failure_threshold:
+            if self._state != OPEN:
+                logger.warning(
+                    f"MCP server failed {self._consecutive_failures} times in a row; "
+                    f"circuit open for {self.reset_seconds:g} seconds"
+                )
+            self._state = OPEN
+            self._opened_at = time.monotonic()
+
+    async def run(
+        self,
+        operation: Callable[[], Awaitable[T]],
+        is_failure: Callable[[T], bool] = lambda result: False,
+        limited: bool = True
+    ) -> T:
+        """
+        Run an MCP call under the dispatcher's limits.
+
+        Args:
+            operation: Coroutine function making the call
+            is_failure: Tells whether a returned result counts as a failure,
+                e.g. an error dictionary; exceptions always count
+            limited: False for cheap calls such as /ping, which skip the
+                concurrency and rate limits and the latency statistics
+
+        Returns:
+            The operation's result
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+        """
+        self._admit()
+
+        if not limited:
+            try:
+                result = await operation()
+            except asyncio.CancelledError:
+                self._trial_running = False
+                raise
+            except Exception:
+                self._record(failed=True)
+                raise
+            self._record(failed=is_failure(result))
+            return result
+
+        self.waiting += 1
+        try:
+            await self._bucket.acquire()
+            await self._semaphore.acquire()
+        except BaseException:
+            self._trial_running = False
+            raise
+        finally:
+            self.waiting -= 1
+
+        self.in_flight += 1
+        started = time.monotonic()
+        try:
+            result = await operation()
+        except asyncio.CancelledError:
+            # A cancelled job says nothing about the server's health
+            self._trial_running = False
+            raise
+        except Exception:
+            self._observe(time.monotonic() - started, failed=True)
+            self._record(failed=True)
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+        failed = is_failure(result)
+        self._observe(time.monotonic() - started, failed)
+        self._record(failed)
+        return result
+
+    def _observe(self, latency: float, failed: bool) -> None:
+        """Count a finished call and its latency."""
+        if failed:
+            self.failed += 1
+        else:
+            self.succeeded += 1
+        self._latencies.append(latency)
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))
+        self._histogram[bucket] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get the dispatcher's counters.
+
+        Returns:
+            Dictionary with circuit state, call counts, in-flight and waiting
+            calls, a latency histogram and latency percentiles in seconds
+        """
+        labels = [f"<={bound}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}s"]
+        latencies = sorted(self._latencies)
+        percentiles = {}
+        if latencies:
+            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99)):
+                percentiles[name] = round(latencies[min(int(fraction * len(latencies)), len(latencies) - 1)], 3)
+
+        return {
+            "circuit": self.state,
+            "consecutive_failures": self._consecutive_failures,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "latency_histogram": dict(zip(labels, self._histogram)),
+            "latency_seconds": percentiles
+        }
+
+
+# Shared dispatcher, created from the MCP configuration on first use
+_dispatcher: Optional[MCPDispatcher] = None
+
+
+def get_mcp_dispatcher() -> MCPDispatcher:
+    """
+    Get the shared MCP dispatcher; usable as a FastAPI dependency.
+
+    Returns:
+        Shared MCPDispatcher
+    """
+    global _dispatcher
+    if _dispatcher is None:
+        _dispatcher = MCPDispatcher.from_config(load_mcp_config())
+    return _dispatcher
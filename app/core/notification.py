@@ -8,6 +8,9 @@ from typing import Optional, List, Dict, Any
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Rules listed by name in a digest notification
+DIGEST_MAX_ITEMS = 50
+
 class NotificationManager:
     """
     Manager for sending notifications to users about validation events
@@ -243,19 +246,82 @@ class NotificationManager:
         
         return self.send_email_notification(subject, message, recipients)
     
-    def log_notification(self, notification_type: str, validation_id: int, user: str, 
+    def send_validation_digest_notification(self, digest_data: Dict[str, Any], 
+                                            recipients: List[str]) -> bool:
+        """
+        Send one notification summarizing a bulk review of validation items.
+        
+        Args:
+            digest_data: Data about the review: action, validator, notes and
+                the reviewed items, each with a title, rule_type and url
+            recipients: List of recipient email addresses
+            
+        Returns:
+            Boolean indicating success
+        """
+        items = digest_data.get("items", [])
+        action = digest_data.get("action", "reviewed")
+        subject = f"Rule Validation Digest: {len(items)} rules {action}"
+        
+        # Long batches list the first rules only; the rest are counted
+        listed = items[:DIGEST_MAX_ITEMS]
+        rows = "".join(
+            f"<li><a href=\"{item.get('url', '#')}\">{item.get('title', 'Untitled')}</a> "
+            f"({item.get('rule_type', 'general').title()})</li>"
+            for item in listed
+        )
+        if len(items) > len(listed):
+            rows += f"<li>... and {len(items) - len(listed)} more</li>"
+        
+        message = f"""
+        <html>
+        <head>
+            <style>
+                body {{ font-family: Arial, sans-serif; line-height: 1.6; color: #333; }}
+                .container {{ max-width: 600px; margin: 0 auto; padding: 20px; }}
+                .header {{ background-color: #343a40; color: white; padding: 10px; text-align: center; }}
+                .content {{ padding: 20px; border: 1px solid #ddd; }}
+                .footer {{ font-size: 12px; color: #666; text-align: center; margin-top: 20px; }}
+                .notes {{ background-color: #f8f9fa; padding: 10px; border-left: 3px solid #343a40; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h2>Rule Validation Digest</h2>
+                </div>
+                <div class="content">
+                    <p>{len(items)} rule validations have been {action} by {digest_data.get('validator', 'System')}:</p>
+                    <ul>{rows}</ul>
+                    <p><strong>Notes:</strong></p>
+                    <div class="notes">
+                        <p>{digest_data.get('notes') or 'No notes provided.'}</p>
+                    </div>
+                </div>
+                <div class="footer">
+                    <p>This is an automated notification from the ESD & Latch-up Guideline Generator System.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+        
+        return self.send_email_notification(subject, message, recipients)
+    
+    def log_notification(self, notification_type: str, validation_id: Optional[int], user: str, 
                         message: str) -> None:
         """
         Log a notification event for record-keeping.
         
         Args:
             notification_type: Type of notification (approval, rejection, etc)
-            validation_id: ID of the validation item
+            validation_id: ID of the validation item, or None for a digest
             user: User who triggered the notification
             message: Notification message
         """
+        subject = f"Validation #{validation_id}" if validation_id is not None else "Validation digest"
         logger.info(f"NOTIFICATION [{notification_type.upper()}]: " 
-                   f"Validation #{validation_id} - User: {user} - {message}")
+                   f"{subject} - User: {user} - {message}")
 
 
 # Default notification manager instance
@@ -0,0 +1,109 @@
+"""
+In-process fan-out of document processing progress.
+
+Job handlers and the job queue publish events for a document; each
+Server-Sent Events client subscribes to the documents it watches. Events
+may be published from any thread; delivery happens on the event loop.
+"""
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Set
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Events that end a job; SSE streams close after forwarding one
+TERMINAL_EVENTS = ("succeeded", "failed", "cancelled")
+
+# Events buffered per subscriber before the oldest are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class ProgressBroker:
+    """Publish progress events per document to asyncio subscribers."""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._last_events: Dict[int, Dict[str, Any]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def subscribe(self, document_id: int) -> asyncio.Queue:
+        """
+        Start receiving events for a document.
+
+        Must be called from the event loop.
+
+        Args:
+            document_id: Document to watch
+
+        Returns:
+            Queue that receives the document's events
+        """
+        self._loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            self._subscribers.setdefault(document_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, document_id: int, queue: asyncio.Queue) -> None:
+        """
+        Stop receiving events for a document.
+
+        Args:
+            document_id: Watched document
+            queue: Queue returned by subscribe
+        """
+        with self._lock:
+            queues = self._subscribers.get(document_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[document_id]
+
+    def last_event(self, document_id: int) -> Optional[Dict[str, Any]]:
+        """Get the most recent event published for a document."""
+        return self._last_events.get(document_id)
+
+    def publish(self, document_id: int, event: str, **data: Any) -> None:
+        """
+        Publish an event for a document. Safe to call from any thread.
+
+        Args:
+            document_id: Document the event is about
+            event: Event type, e.g. "started", "progress" or "succeeded"
+            **data: Event payload such as job_id, done, total or rules_found
+        """
+        payload = {"document_id": document_id, "event": event, "timestamp": time.time(), **data}
+        self._last_events[document_id] = payload
+
+        with self._lock:
+            queues: List[asyncio.Queue] = list(self._subscribers.get(document_id, ()))
+        if not queues or self._loop is None:
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._deliver(queues, payload)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, queues, payload)
+
+    def _deliver(self, queues: List[asyncio.Queue], payload: Dict[str, Any]) -> None:
+        for queue in queues:
+            if queue.full():
+                # A slow client loses old progress, never the latest state
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(payload)
+
+
+# Shared progress broker instance
+progress_broker = ProgressBroker()
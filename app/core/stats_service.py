@@ -0,0 +1,179 @@
+"""
+Cached aggregate counts for the dashboards.
+
+The validation dashboard, /validation/count/pending and /api/rules/stats/summary
+are polled by every open landing page. Each count is one GROUP BY query,
+kept for STATS_CACHE_SECONDS and dropped as soon as a session commits a
+change to the rules or the validation queue, so the pages stay current
+without recounting on every request.
+
+Writes made by other processes are not seen by the commit hook; they show
+up once the cache entry expires.
+"""
+import os
+import time
+import logging
+import threading
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+
+from app.database.models import Rule, RuleType, ValidationQueue, ValidationStatus
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+STATS_CACHE_SECONDS = float(os.getenv("STATS_CACHE_SECONDS", "10"))  # 0 = always query
+
+# Cache entries recomputed when rows of these models change
+RULE_STATS = "rules"
+VALIDATION_STATS = "validation"
+STATS_BY_MODEL = {Rule: RULE_STATS, ValidationQueue: VALIDATION_STATS}
+STATS_BY_TABLE = {model.__tablename__: name for model, name in STATS_BY_MODEL.items()}
+
+
+class StatsService:
+    """Grouped counts of rules and validation items, cached per database."""
+
+    def __init__(self, ttl_seconds: float = STATS_CACHE_SECONDS):
+        """
+        Initialize the service.
+
+        Args:
+            ttl_seconds: Seconds a count is reused; 0 disables the cache
+        """
+        self.ttl_seconds = ttl_seconds
+        # Entries by engine, so sessions on different databases never share counts
+        self._cache: "weakref.WeakKeyDictionary[Any, Dict[str, tuple]]" = weakref.WeakKeyDictionary()
+        # Bumped by invalidate(), so a count computed before a commit is never stored after it
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def _cached(self, db: Session, name: str, compute: Callable[[Session], Any]) -> Any:
+        """Return a fresh cache entry or compute and store it."""
+        engine = db.get_bind()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(engine, {}).get(name)
+            generation = self._generation
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        value = compute(db)
+        if self.ttl_seconds > 0:
+            with self._lock:
+                if self._generation == generation:
+                    self._cache.setdefault(engine, {})[name] = (now + self.ttl_seconds, value)
+        return value
+
+    def invalidate(self, *names: str) -> None:
+        """
+        Drop cached counts on all databases.
+
+        Args:
+            names: Entries to drop, e.g. RULE_STATS; all entries if none are given
+        """
+        with self._lock:
+            self._generation += 1
+            for entries in self._cache.values():
+                for name in names or list(entries):
+                    entries.pop(name, None)
+
+    def validation_status_counts(self, db: Session) -> Dict[str, int]:
+        """
+        Count validation items per status with one GROUP BY query.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dictionary of status value to count, with every status present,
+            plus "total"
+        """
+        return dict(self._cached(db, VALIDATION_STATS, _count_validation_statuses))
+
+    def rule_stats(self, db: Session) -> Dict[str, Any]:
+        """
+        Count active rules per type and technology with one GROUP BY query.
+
+        Args:
+            db: Database session
+
+        Returns:
+            Dictionary with total, esd, latchup and general counts and
+            by_technology, the same counts per technology ID
+        """
+        stats = self._cached(db, RULE_STATS, _count_rules)
+        return {**stats, "by_technology": {tech_id: dict(counts) for tech_id, counts in stats["by_technology"].items()}}
+
+
+def _count_validation_statuses(db: Session) -> Dict[str, int]:
+    """Validation items per status."""
+    counts = {validation_status.value: 0 for validation_status in ValidationStatus}
+    rows = db.query(ValidationQueue.validation_status, func.count(ValidationQueue.id)).group_by(
+        ValidationQueue.validation_status
+    ).all()
+    for validation_status, count in rows:
+        if validation_status is not None:
+            counts[validation_status.value] = count
+    counts["total"] = sum(count for _, count in rows)
+    return counts
+
+
+def _count_rules(db: Session) -> Dict[str, Any]:
+    """Active rules per type, overall and per technology."""
+    def empty() -> Dict[str, int]:
+        return {"total": 0, **{rule_type.value: 0 for rule_type in RuleType}}
+
+    stats: Dict[str, Any] = empty()
+    by_technology: Dict[Optional[int], Dict[str, int]] = {}
+    rows = db.query(Rule.rule_type, Rule.technology_id, func.count(Rule.id)).filter(
+        Rule.is_active == True
+    ).group_by(Rule.rule_type, Rule.technology_id).all()
+    for rule_type, technology_id, count in rows:
+        technology_counts = by_technology.setdefault(technology_id, empty())
+        for counts in (stats, technology_counts):
+            counts["total"] += count
+            if rule_type is not None:
+                counts[rule_type.value] += count
+    stats["by_technology"] = by_technology
+    return stats
+
+
+# Shared service used by the dashboard endpoints
+stats_service = StatsService()
+
+
+# Invalidate on commit: remember which counts a session's writes touch ...
+@event.listens_for(Session, "after_flush")
+def _track_flushed_changes(session: Session, flush_context) -> None:
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        name = STATS_BY_MODEL.get(type(instance))
+        if name:
+            session.info.setdefault("stats_changed", set()).add(name)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_changes(orm_execute_state) -> None:
+    # Bulk INSERT, UPDATE and DELETE statements bypass the flush
+    if not (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    table = getattr(orm_execute_state.statement, "table", None)
+    name = STATS_BY_TABLE.get(getattr(table, "name", None))
+    if name:
+        orm_execute_state.session.info.setdefault("stats_changed", set()).add(name)
+
+
+# ... and drop them once the changes are committed
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_changes(session: Session) -> None:
+    changed = session.info.pop("stats_changed", None)
+    if changed:
+        stats_service.invalidate(*changed)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_changes(session: Session) -> None:
+    session.info.pop("stats_changed", None)
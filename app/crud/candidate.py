@@ -0,0 +1,188 @@
+# app/crud/candidate.py
+import re
+from typing import List, Optional, Dict, Any
+from sqlalchemy import insert, select, update, exists, func, literal
+from sqlalchemy.orm import Session
+
+from app.database.models import ExtractionCandidate, ValidationQueue, ValidationStatus
+
+
+def save_candidates(
+    db: Session,
+    document_id: int,
+    rules: List[Dict[str, Any]],
+    source: str,
+    confidence_threshold: float = 0.0
+) -> int:
+    """
+    Store every rule extracted from a document and queue those at or above
+    the confidence threshold for validation, in a single transaction.
+
+    Candidates and pending items the same extractor stored earlier for the
+    document are replaced. Items already reviewed are kept and move over to
+    the new candidate with the same title and content, so extracting the
+    rule again does not queue it a second time.
+
+    Args:
+        db: Database session
+        document_id: Document the rules were extracted from
+        rules: Extracted rule dictionaries, optionally with a confidence
+        source: Extractor that produced the rules, "parser" or "mcp"
+        confidence_threshold: Rules with a lower confidence are stored but not queued
+
+    Returns:
+        Number of items queued
+    """
+    db.query(ValidationQueue).filter(
+        ValidationQueue.document_id == document_id,
+        ValidationQueue.source == source,
+        ValidationQueue.validation_status == ValidationStatus.PENDING,
+        ValidationQueue.rule_id.is_(None)
+    ).delete(synchronize_session=False)
+    # Everything left for the document and extractor was reviewed
+    reviewed = db.query(ValidationQueue.id, ValidationQueue.extracted_content).filter(
+        ValidationQueue.document_id == document_id,
+        ValidationQueue.source == source
+    ).order_by(ValidationQueue.id).all()
+    if reviewed:
+        db.query(ValidationQueue).filter(
+            ValidationQueue.id.in_([item.id for item in reviewed])
+        ).update({ValidationQueue.candidate_id: None}, synchronize_session=False)
+    db.query(ExtractionCandidate).filter(
+        ExtractionCandidate.document_id == document_id,
+        ExtractionCandidate.source == source
+    ).delete(synchronize_session=False)
+
+    if rules:
+        db.execute(insert(ExtractionCandidate), [
+            {
+                "document_id": document_id,
+                "source": source,
+                "content": rule,
+                "confidence": rule.get("confidence")
+            }
+            for rule in rules
+        ])
+    if reviewed:
+        _relink_reviewed(db, reviewed, document_id, source)
+    queued = _promote(db, confidence_threshold, document_id, source)
+    db.commit()
+    return queued
+
+
+def _rule_key(content: Dict[str, Any]) -> tuple:
+    """Title and content of an extracted rule, lower-cased with punctuation and runs of whitespace collapsed."""
+    return tuple(
+        re.sub(r"[\W_]+", " ", str(content.get(field) or "").lower()).strip()
+        for field in ("title", "content")
+    )
+
+
+def _relink_reviewed(db: Session, reviewed: List[Any], document_id: int, source: str) -> None:
+    """Point each reviewed item at the first new candidate with the same rule, so _promote skips it."""
+    candidates: Dict[tuple, List[int]] = {}
+    for candidate_id, content in db.query(ExtractionCandidate.id, ExtractionCandidate.content).filter(
+        ExtractionCandidate.document_id == document_id,
+        ExtractionCandidate.source == source
+    ).order_by(ExtractionCandidate.id):
+        candidates.setdefault(_rule_key(content or {}), []).append(candidate_id)
+
+    links = []
+    for item in reviewed:
+        matching = candidates.get(_rule_key(item.extracted_content or {}))
+        if matching:
+            links.append({"id": item.id, "candidate_id": matching.pop(0)})
+    if links:
+        db.execute(update(ValidationQueue), links)
+
+
+def promote_candidates(
+    db: Session,
+    confidence_threshold: float,
+    document_id: Optional[int] = None,
+    source: Optional[str] = None
+) -> int:
+    """
+    Queue stored candidates at or above a confidence threshold for validation.
+
+    Lowering the threshold this way needs no new extraction. Candidates that
+    are already queued or were reviewed are skipped, so promoting twice
+    queues nothing new.
+
+    Args:
+        db: Database session
+        confidence_threshold: Lowest confidence to queue
+        document_id: Only promote candidates of this document
+        source: Only promote candidates of this extractor
+
+    Returns:
+        Number of items queued
+    """
+    queued = _promote(db, confidence_threshold, document_id, source)
+    db.commit()
+    return queued
+
+
+def _promote(
+    db: Session,
+    confidence_threshold: float,
+    document_id: Optional[int],
+    source: Optional[str]
+) -> int:
+    """Copy unqueued candidates at or above the threshold into the validation queue with one INSERT ... SELECT."""
+    candidates = select(
+        ExtractionCandidate.document_id,
+        ExtractionCandidate.content,
+        ExtractionCandidate.source,
+        ExtractionCandidate.confidence,
+        ExtractionCandidate.id,
+        literal(ValidationStatus.PENDING, ValidationQueue.validation_status.type)
+    ).where(
+        func.coalesce(ExtractionCandidate.confidence, 0) >= confidence_threshold,
+        ~exists().where(ValidationQueue.candidate_id == ExtractionCandidate.id)
+    ).order_by(ExtractionCandidate.id)
+    if document_id is not None:
+        candidates = candidates.where(ExtractionCandidate.document_id == document_id)
+    if source is not None:
+        candidates = candidates.where(ExtractionCandidate.source == source)
+
+    result = db.execute(insert(ValidationQueue).from_select(
+        ["document_id", "extracted_content", "source", "confidence", "candidate_id", "validation_status"],
+        candidates
+    ))
+    return result.rowcount
+
+
+def get_candidates(
+    db: Session,
+    document_id: Optional[int] = None,
+    source: Optional[str] = None,
+    min_confidence: Optional[float] = None,
+    skip: int = 0,
+    limit: int = 100
+) -> List[ExtractionCandidate]:
+    """
+    Get stored extraction candidates, most confident first.
+
+    Args:
+        db: Database session
+        document_id: Filter by document ID
+        source: Filter by extractor
+        min_confidence: Lowest confidence to include
+        skip: Number of candidates to skip
+        limit: Maximum number of candidates to return
+
+    Returns:
+        List of ExtractionCandidate models
+    """
+    query = db.query(ExtractionCandidate)
+    if document_id is not None:
+        query = query.filter(ExtractionCandidate.document_id == document_id)
+    if source is not None:
+        query = query.filter(ExtractionCandidate.source == source)
+    if min_confidence is not None:
+        query = query.filter(func.coalesce(ExtractionCandidate.confidence, 0) >= min_confidence)
+
+    return query.order_by(
+        ExtractionCandidate.confidence.desc(), ExtractionCandidate.id
+    ).offset(skip).limit(limit).all()
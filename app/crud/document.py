@@ -22,6 +22,9 @@ def create_document(db: Session, document: ImportedDocumentCreate) -> ImportedDo
         filename=document.filename,
         document_type=document.document_type,
         file_data=document.file_data,
+        file_path=document.file_path,
+        content_hash=document.content_hash,
+        duplicate_of_id=document.duplicate_of_id,
         processing_notes=document.processing_notes,
         uploaded_by=document.uploaded_by,
         processed=False,
@@ -47,6 +50,23 @@ def get_document(db: Session, document_id: int) -> Optional[ImportedDocument]:
     return db.query(ImportedDocument).filter(ImportedDocument.id == document_id).first()
 
 
+def get_document_by_hash(db: Session, content_hash: str) -> Optional[ImportedDocument]:
+    """
+    Get the original upload of a file by its content hash.
+    
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the file content
+        
+    Returns:
+        The earliest document with this content that is not itself a duplicate, or None
+    """
+    return db.query(ImportedDocument).filter(
+        ImportedDocument.content_hash == content_hash,
+        ImportedDocument.duplicate_of_id.is_(None)
+    ).order_by(ImportedDocument.id).first()
+
+
 def get_documents(
     db: Session, 
     skip: int = 0, 
@@ -78,6 +98,41 @@ def get_documents(
     return query.order_by(ImportedDocument.uploaded_at.desc()).offset(skip).limit(limit).all()
 
 
+def get_documents_for_processing(
+    db: Session,
+    document_ids: Optional[List[int]] = None,
+    status_filter: Optional[str] = None,
+    document_type: Optional[DocumentType] = None
+) -> List[ImportedDocument]:
+    """
+    Select documents for batch processing by ID or by status.
+    
+    Args:
+        db: Database session
+        document_ids: Explicit document IDs; takes precedence over status_filter
+        status_filter: "unprocessed" for documents never processed successfully, "failed" for failed ones
+        document_type: Only include documents of this type
+        
+    Returns:
+        List of ImportedDocument models in ID order
+    """
+    query = db.query(ImportedDocument)
+    
+    if document_ids is not None:
+        query = query.filter(ImportedDocument.id.in_(document_ids))
+    elif status_filter == "unprocessed":
+        query = query.filter(ImportedDocument.processed == False)
+    elif status_filter == "failed":
+        query = query.filter(ImportedDocument.processing_status == "failed")
+    else:
+        raise ValueError(f"Unknown document filter: {status_filter}")
+    
+    if document_type:
+        query = query.filter(ImportedDocument.document_type == document_type)
+    
+    return query.order_by(ImportedDocument.id).all()
+
+
 def update_document_status(
     db: Session, 
     document_id: int, 
@@ -88,6 +143,8 @@ def update_document_status(
     """
     Update a document's processing status.
     
+    Documents linked to it as duplicates share its status.
+    
     Args:
         db: Database session
         document_id: Document ID to update
@@ -102,11 +159,12 @@ def update_document_status(
     if not db_document:
         return None
     
-    db_document.processed = processed
-    db_document.processing_status = processing_status
-    if processing_notes:
-        db_document.processing_notes = processing_notes
-    db_document.processed_at = datetime.now()
+    for document in [db_document] + list(db_document.duplicates):
+        document.processed = processed
+        document.processing_status = processing_status
+        if processing_notes:
+            document.processing_notes = processing_notes
+        document.processed_at = datetime.now()
     
     db.commit()
     db.refresh(db_document)
@@ -128,6 +186,24 @@ def delete_document(db: Session, document_id: int) -> bool:
     if not db_document:
         return False
     
+    # Duplicates of this document become standalone uploads
+    for duplicate in db_document.duplicates:
+        duplicate.duplicate_of_id = None
+    
     db.delete(db_document)
     db.commit()
     return True
+
+
+def is_file_path_referenced(db: Session, file_path: str) -> bool:
+    """
+    Check whether any document still points at a stored file.
+    
+    Args:
+        db: Database session
+        file_path: Blob store key of the stored file
+        
+    Returns:
+        True if at least one document references the file
+    """
+    return db.query(ImportedDocument.id).filter(ImportedDocument.file_path == file_path).first() is not None
@@ -0,0 +1,432 @@
+# app/crud/job.py
+from typing import List, Optional, Dict, Any
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import update
+from datetime import datetime, timedelta
+import random
+
+from app.database.models import ProcessingJob
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+
+def enqueue_job(
+    db: Session,
+    document_id: int,
+    kind: str,
+    max_attempts: int = 3,
+    commit: bool = True,
+    batch_id: Optional[str] = None
+) -> ProcessingJob:
+    """
+    Add a job to the durable queue.
+
+    Args:
+        db: Database session
+        document_id: Document to process
+        kind: Job kind ("parse" or "mcp")
+        max_attempts: How many times the job may be claimed before it fails for good
+        commit: Commit immediately; pass False to enqueue as part of a larger transaction
+        batch_id: Batch the job belongs to
+
+    Returns:
+        Created ProcessingJob model
+    """
+    db_job = ProcessingJob(
+        document_id=document_id,
+        kind=kind,
+        batch_id=batch_id,
+        status=QUEUED,
+        attempts=0,
+        max_attempts=max_attempts,
+        available_at=datetime.now()
+    )
+    db.add(db_job)
+    if commit:
+        db.commit()
+        db.refresh(db_job)
+    else:
+        db.flush()
+    return db_job
+
+
+def get_job(db: Session, job_id: int) -> Optional[ProcessingJob]:
+    """
+    Get a job by ID.
+
+    Args:
+        db: Database session
+        job_id: Job ID to retrieve
+
+    Returns:
+        ProcessingJob model or None if not found
+    """
+    return db.query(ProcessingJob).filter(ProcessingJob.id == job_id).first()
+
+
+def get_jobs_for_document(db: Session, document_id: int, limit: int = 50) -> List[ProcessingJob]:
+    """
+    Get the jobs of a document, newest first.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        limit: Maximum number of jobs to return
+
+    Returns:
+        List of ProcessingJob models
+    """
+    return db.query(ProcessingJob).filter(
+        ProcessingJob.document_id == document_id
+    ).order_by(ProcessingJob.id.desc()).limit(limit).all()
+
+
+def get_batch_jobs(db: Session, batch_id: str) -> List[ProcessingJob]:
+    """
+    Get the jobs of a batch in the order they were queued, with their documents loaded.
+
+    Args:
+        db: Database session
+        batch_id: Batch ID
+
+    Returns:
+        List of ProcessingJob models
+    """
+    return db.query(ProcessingJob).options(
+        joinedload(ProcessingJob.document)
+    ).filter(ProcessingJob.batch_id == batch_id).order_by(ProcessingJob.id).all()
+
+
+def get_batch_summary(db: Session, batch_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Aggregate the progress and throughput of a batch.
+
+    Throughput is measured from the first job start to the last job finish,
+    or to now while the batch is still running.
+
+    Args:
+        db: Database session
+        batch_id: Batch ID
+
+    Returns:
+        Dictionary with status counts, throughput and per-document outcomes, or None if unknown
+    """
+    jobs = get_batch_jobs(db, batch_id)
+    if not jobs:
+        return None
+
+    counts = {state: 0 for state in (QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED)}
+    pages = 0
+    documents = []
+    for db_job in jobs:
+        counts[db_job.status] = counts.get(db_job.status, 0) + 1
+        result = db_job.result or {}
+        if db_job.status == SUCCEEDED:
+            pages += (result.get("metadata") or {}).get("pages") or 0
+        documents.append({
+            "document_id": db_job.document_id,
+            "filename": db_job.document.filename if db_job.document else None,
+            "job_id": db_job.id,
+            "status": db_job.status,
+            "attempts": db_job.attempts,
+            "rules_extracted": result.get("rules_extracted"),
+            "source": result.get("source"),
+            "error": db_job.last_error if db_job.status != SUCCEEDED else None
+        })
+
+    finished = counts[SUCCEEDED] + counts[FAILED] + counts[CANCELLED]
+    started = [db_job.started_at for db_job in jobs if db_job.started_at]
+    ended = [db_job.finished_at for db_job in jobs if db_job.finished_at]
+    done = finished == len(jobs)
+
+    elapsed_seconds = None
+    if started:
+        end = max(ended) if done and ended else datetime.now()
+        elapsed_seconds = max((end - min(started)).total_seconds(), 0.001)
+
+    return {
+        "batch_id": batch_id,
+        "kind": jobs[0].kind,
+        "total": len(jobs),
+        "finished": finished,
+        "done": done,
+        "progress": round(finished / len(jobs), 4),
+        "counts": counts,
+        "created_at": jobs[0].created_at,
+        "elapsed_seconds": round(elapsed_seconds, 2) if elapsed_seconds else None,
+        "docs_per_minute": round(counts[SUCCEEDED] * 60 / elapsed_seconds, 2) if elapsed_seconds else None,
+        "pages_per_minute": round(pages * 60 / elapsed_seconds, 2) if elapsed_seconds else None,
+        "pages_processed": pages,
+        "documents": documents
+    }
+
+
+def get_active_job(db: Session, document_id: int, kind: Optional[str] = None) -> Optional[ProcessingJob]:
+    """
+    Get a queued or running job for a document, if any.
+
+    Args:
+        db: Database session
+        document_id: Document ID
+        kind: Only consider jobs of this kind
+
+    Returns:
+        ProcessingJob model or None
+    """
+    query = db.query(ProcessingJob).filter(
+        ProcessingJob.document_id == document_id,
+        ProcessingJob.status.in_(ACTIVE_STATUSES)
+    )
+    if kind:
+        query = query.filter(ProcessingJob.kind == kind)
+    return query.order_by(ProcessingJob.id.desc()).first()
+
+
+def claim_next_job(
+    db: Session,
+    worker_id: str,
+    lease_seconds: int,
+    kinds: Optional[List[str]] = None
+) -> Optional[ProcessingJob]:
+    """
+    Claim the next available job by taking a lease on it.
+
+    The claim is a conditional UPDATE on the job's status, so two workers
+    racing for the same job cannot both win it.
+
+    Args:
+        db: Database session
+        worker_id: Identifier of the claiming worker
+        lease_seconds: How long the lease lasts before the job counts as abandoned
+        kinds: Only claim jobs of these kinds
+
+    Returns:
+        The claimed ProcessingJob, or None if nothing is available
+    """
+    now = datetime.now()
+    query = db.query(ProcessingJob.id).filter(
+        ProcessingJob.status == QUEUED,
+        ProcessingJob.available_at <= now
+    )
+    if kinds:
+        query = query.filter(ProcessingJob.kind.in_(kinds))
+    candidates = [row.id for row in query.order_by(ProcessingJob.available_at, ProcessingJob.id).limit(10)]
+
+    for job_id in candidates:
+        claimed = db.execute(
+            update(ProcessingJob)
+            .where(ProcessingJob.id == job_id, ProcessingJob.status == QUEUED)
+            .values(
+                status=RUNNING,
+                lease_owner=worker_id,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=ProcessingJob.attempts + 1,
+                started_at=now
+            )
+        ).rowcount
+        db.commit()
+        if claimed:
+            return get_job(db, job_id)
+
+    return None
+
+
+def renew_lease(db: Session, job_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """
+    Extend the lease of a running job.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+        lease_seconds: New lease duration from now
+
+    Returns:
+        True if the lease is still held by worker_id, False if it was lost or the job cancelled
+    """
+    renewed = db.execute(
+        update(ProcessingJob)
+        .where(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == RUNNING,
+            ProcessingJob.lease_owner == worker_id
+        )
+        .values(lease_expires_at=datetime.now() + timedelta(seconds=lease_seconds))
+    ).rowcount
+    db.commit()
+    return bool(renewed)
+
+
+def complete_job(db: Session, job_id: int, worker_id: str, result: Optional[Dict[str, Any]] = None) -> bool:
+    """
+    Mark a running job as succeeded.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+        result: Summary of the outcome
+
+    Returns:
+        True if the job was completed, False if the lease had been lost
+    """
+    completed = db.execute(
+        update(ProcessingJob)
+        .where(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == RUNNING,
+            ProcessingJob.lease_owner == worker_id
+        )
+        .values(
+            status=SUCCEEDED,
+            result=result,
+            last_error=None,
+            lease_owner=None,
+            lease_expires_at=None,
+            finished_at=datetime.now()
+        )
+    ).rowcount
+    db.commit()
+    return bool(completed)
+
+
+def fail_job(
+    db: Session,
+    job_id: int,
+    worker_id: str,
+    error: str,
+    retry_base_seconds: int,
+    retryable: bool = True
+) -> Optional[ProcessingJob]:
+    """
+    Record a failed attempt, requeueing the job with exponential backoff if attempts remain.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+        error: Error description
+        retry_base_seconds: Delay before the first retry; doubles on each further attempt
+        retryable: False to fail the job without further attempts
+
+    Returns:
+        Updated ProcessingJob, or None if the lease had been lost
+    """
+    db_job = get_job(db, job_id)
+    if not db_job or db_job.status != RUNNING or db_job.lease_owner != worker_id:
+        return None
+
+    db_job.last_error = error
+    db_job.lease_owner = None
+    db_job.lease_expires_at = None
+
+    if retryable and db_job.attempts < db_job.max_attempts:
+        delay = retry_base_seconds * (2 ** (db_job.attempts - 1))
+        # Jitter spreads out retries of jobs that failed together
+        delay = delay * random.uniform(0.8, 1.2)
+        db_job.status = QUEUED
+        db_job.available_at = datetime.now() + timedelta(seconds=delay)
+    else:
+        db_job.status = FAILED
+        db_job.finished_at = datetime.now()
+
+    db.commit()
+    db.refresh(db_job)
+    return db_job
+
+
+def cancel_job(db: Session, job_id: int) -> Optional[ProcessingJob]:
+    """
+    Cancel a queued or running job.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+
+    Returns:
+        Updated ProcessingJob, or None if the job was not active
+    """
+    cancelled = db.execute(
+        update(ProcessingJob)
+        .where(ProcessingJob.id == job_id, ProcessingJob.status.in_(ACTIVE_STATUSES))
+        .values(
+            status=CANCELLED,
+            last_error="Job cancelled",
+            lease_owner=None,
+            lease_expires_at=None,
+            finished_at=datetime.now()
+        )
+    ).rowcount
+    db.commit()
+    return get_job(db, job_id) if cancelled else None
+
+
+def requeue_abandoned_jobs(db: Session) -> List[ProcessingJob]:
+    """
+    Requeue running jobs whose lease has expired, e.g. after a crash or restart.
+
+    Jobs that have used up their attempts are failed instead.
+
+    Args:
+        db: Database session
+
+    Returns:
+        List of jobs that were requeued or failed
+    """
+    now = datetime.now()
+    abandoned = db.query(ProcessingJob).filter(
+        ProcessingJob.status == RUNNING,
+        ProcessingJob.lease_expires_at < now
+    ).all()
+
+    for db_job in abandoned:
+        db_job.last_error = f"Lease held by {db_job.lease_owner} expired"
+        db_job.lease_owner = None
+        db_job.lease_expires_at = None
+        if db_job.attempts < db_job.max_attempts:
+            db_job.status = QUEUED
+            db_job.available_at = now
+        else:
+            db_job.status = FAILED
+            db_job.finished_at = now
+
+    db.commit()
+    return abandoned
+
+
+def release_job(db: Session, job_id: int, worker_id: str) -> bool:
+    """
+    Put a running job back on the queue without counting the attempt, e.g. on shutdown.
+
+    Args:
+        db: Database session
+        job_id: Job ID
+        worker_id: Worker holding the lease
+
+    Returns:
+        True if the job was released, False if the lease had been lost
+    """
+    released = db.execute(
+        update(ProcessingJob)
+        .where(
+            ProcessingJob.id == job_id,
+            ProcessingJob.status == RUNNING,
+            ProcessingJob.lease_owner == worker_id
+        )
+        .values(
+            status=QUEUED,
+            attempts=ProcessingJob.attempts - 1,
+            available_at=datetime.now(),
+            lease_owner=None,
+            lease_expires_at=None
+        )
+    ).rowcount
+    db.commit()
+    return bool(released)
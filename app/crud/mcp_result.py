@@ -0,0 +1,98 @@
+# app/crud/mcp_result.py
+from datetime import datetime, timedelta
+from typing import Optional, Dict, Any
+from sqlalchemy.orm import Session
+
+from app.database.models import MCPAnalysisResult
+
+
+def get_mcp_result(
+    db: Session,
+    content_hash: str,
+    options_hash: str,
+    model: str
+) -> Optional[MCPAnalysisResult]:
+    """
+    Get the newest unexpired MCP analysis of a file.
+
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the analyzed content
+        options_hash: SHA-256 of the analysis options
+        model: Model the analysis must come from
+
+    Returns:
+        MCPAnalysisResult model or None if there is no usable analysis
+    """
+    return db.query(MCPAnalysisResult).filter(
+        MCPAnalysisResult.content_hash == content_hash,
+        MCPAnalysisResult.options_hash == options_hash,
+        MCPAnalysisResult.model == model,
+        MCPAnalysisResult.expires_at > datetime.now()
+    ).order_by(MCPAnalysisResult.id.desc()).first()
+
+
+def save_mcp_result(
+    db: Session,
+    content_hash: str,
+    options_hash: str,
+    model: str,
+    result: Dict[str, Any],
+    ttl_seconds: int,
+    document_hash: Optional[str] = None
+) -> MCPAnalysisResult:
+    """
+    Store an MCP analysis, replacing earlier ones with the same key and dropping expired ones.
+
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the analyzed content
+        options_hash: SHA-256 of the analysis options
+        model: Model identifier reported by the server
+        result: Raw analysis result returned by the server
+        ttl_seconds: Seconds the analysis may be reused
+        document_hash: SHA-256 of the whole document when a chunk was analyzed
+
+    Returns:
+        Stored MCPAnalysisResult model
+    """
+    now = datetime.now()
+    db.query(MCPAnalysisResult).filter(
+        (MCPAnalysisResult.expires_at <= now) | (
+            (MCPAnalysisResult.content_hash == content_hash)
+            & (MCPAnalysisResult.options_hash == options_hash)
+            & (MCPAnalysisResult.model == model)
+        )
+    ).delete(synchronize_session=False)
+
+    db_result = MCPAnalysisResult(
+        content_hash=content_hash,
+        document_hash=document_hash or content_hash,
+        options_hash=options_hash,
+        model=model,
+        result=result,
+        expires_at=now + timedelta(seconds=ttl_seconds)
+    )
+    db.add(db_result)
+    db.commit()
+    db.refresh(db_result)
+    return db_result
+
+
+def delete_mcp_results(db: Session, document_hash: Optional[str] = None) -> int:
+    """
+    Drop cached MCP analyses of a document and its chunks, or all of them.
+
+    Args:
+        db: Database session
+        document_hash: SHA-256 of the document; None drops every analysis
+
+    Returns:
+        Number of deleted analyses
+    """
+    query = db.query(MCPAnalysisResult)
+    if document_hash is not None:
+        query = query.filter(MCPAnalysisResult.document_hash == document_hash)
+    deleted = query.delete(synchronize_session=False)
+    db.commit()
+    return deleted
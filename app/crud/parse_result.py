@@ -0,0 +1,152 @@
+# app/crud/parse_result.py
+import os
+from typing import Optional, Dict, Any, Iterable, List, Set
+from sqlalchemy import or_, cast, Text
+from sqlalchemy.orm import Session
+
+from app.database.models import ParseResult, ImportedDocument
+
+# Image keys checked per reference query in _delete_unreferenced_images
+IMAGE_KEY_BATCH = 100
+
+# Images written more recently than this are never deleted, as a parse that is
+# still running may have written them; keep it above DOCUMENT_JOB_TIMEOUT
+IMAGE_GRACE_SECONDS = int(os.getenv("IMAGE_GRACE_SECONDS", "900"))
+
+
+def get_parse_result(
+    db: Session,
+    content_hash: str,
+    parser: str,
+    parser_version: str
+) -> Optional[ParseResult]:
+    """
+    Get the cached parse output of a file.
+    
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the file content
+        parser: Parser class name
+        parser_version: Parser version the output must come from
+        
+    Returns:
+        ParseResult model or None if the file has not been parsed by this parser version
+    """
+    return db.query(ParseResult).filter(
+        ParseResult.content_hash == content_hash,
+        ParseResult.parser == parser,
+        ParseResult.parser_version == parser_version
+    ).first()
+
+
+def save_parse_result(
+    db: Session,
+    content_hash: str,
+    parser: str,
+    parser_version: str,
+    result: Dict[str, Any],
+    image_store=None
+) -> ParseResult:
+    """
+    Store the parse output of a file, replacing output of older parser versions.
+    
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the file content
+        parser: Parser class name
+        parser_version: Version of the parser that produced the output
+        result: JSON-safe dictionary with rules, metadata, images and image_count
+        image_store: Optional BlobStore; images only the replaced output
+            referred to are deleted from it
+        
+    Returns:
+        Stored ParseResult model
+    """
+    # Output of other versions can never be read again
+    replaced = db.query(ParseResult).filter(
+        ParseResult.content_hash == content_hash,
+        ParseResult.parser == parser,
+        ParseResult.parser_version != parser_version
+    ).all()
+    replaced_keys = _image_keys(replaced)
+    for db_replaced in replaced:
+        db.delete(db_replaced)
+    
+    db_result = get_parse_result(db, content_hash, parser, parser_version)
+    if db_result:
+        replaced_keys |= _image_keys([db_result])
+    else:
+        db_result = ParseResult(content_hash=content_hash, parser=parser, parser_version=parser_version)
+        db.add(db_result)
+    
+    db_result.rules = result["rules"]
+    db_result.result_metadata = result["metadata"]
+    db_result.images = result["images"]
+    db_result.image_count = result["image_count"]
+    
+    db.commit()
+    db.refresh(db_result)
+    if image_store is not None:
+        _delete_unreferenced_images(db, replaced_keys, image_store)
+    return db_result
+
+
+def delete_parse_results(db: Session, content_hash: str, image_store=None) -> int:
+    """
+    Drop all cached parse output of a file.
+    
+    Args:
+        db: Database session
+        content_hash: SHA-256 of the file content
+        image_store: Optional BlobStore; images no remaining output refers
+            to are deleted from it
+        
+    Returns:
+        Number of deleted results
+    """
+    deleted = db.query(ParseResult).filter(ParseResult.content_hash == content_hash).all()
+    image_keys = _image_keys(deleted)
+    for db_result in deleted:
+        db.delete(db_result)
+    db.commit()
+    if image_store is not None:
+        _delete_unreferenced_images(db, image_keys, image_store)
+    return len(deleted)
+
+
+def _image_keys(results: Iterable[ParseResult]) -> Set[str]:
+    """Blob keys of the images stored with parse results."""
+    return {
+        image["blob_key"]
+        for db_result in results
+        for image in db_result.images or []
+        if image.get("blob_key")
+    }
+
+
+def _delete_unreferenced_images(db: Session, keys: Set[str], image_store) -> int:
+    """
+    Delete image blobs that no parse result and no uploaded file refers to.
+    
+    Blobs are shared by content, so the same image may belong to several
+    files. A parse still running in a worker may have written one of the
+    images without having stored its output yet, so blobs written within
+    IMAGE_GRACE_SECONDS are kept; writing a blob again refreshes its age.
+    """
+    keys = sorted(keys)
+    unreferenced: List[str] = []
+    for start in range(0, len(keys), IMAGE_KEY_BATCH):
+        batch = set(keys[start:start + IMAGE_KEY_BATCH])
+        # Keys are hex digests, so matching them in the JSON text is exact enough to narrow the rows
+        rows = db.query(ParseResult).filter(
+            or_(*(cast(ParseResult.images, Text).contains(key) for key in batch))
+        ).all()
+        batch -= _image_keys(rows)
+        batch -= {content_hash for content_hash, in db.query(ImportedDocument.content_hash).filter(
+            ImportedDocument.content_hash.in_(batch)
+        )}
+        unreferenced.extend(batch)
+    return sum(
+        image_store.delete(key) for key in unreferenced
+        if (image_store.age(key) or 0) >= IMAGE_GRACE_SECONDS
+    )
@@ -3,6 +3,7 @@ from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_, func
 from app.crud.base import CRUDBase
+from app.core.stats_service import stats_service
 from app.database.models import Rule, RuleImage, RuleType as DBRuleType
 from app.models.schemas import RuleCreate, RuleUpdate, RuleType
 
@@ -89,24 +90,8 @@ class CRUDRule(CRUDBase[Rule, RuleCreate, RuleUpdate]):
         return db_query.filter(Rule.is_active == True).offset(skip).limit(limit).all()
     
     def get_stats(self, db: Session) -> Dict[str, Any]:
-        """Get overall rule statistics."""
-        total = db.query(func.count(Rule.id)).filter(Rule.is_active == True).scalar()
-        esd = db.query(func.count(Rule.id)).filter(
-            and_(Rule.rule_type == DBRuleType.ESD, Rule.is_active == True)
-        ).scalar()
-        latchup = db.query(func.count(Rule.id)).filter(
-            and_(Rule.rule_type == DBRuleType.LATCHUP, Rule.is_active == True)
-        ).scalar()
-        general = db.query(func.count(Rule.id)).filter(
-            and_(Rule.rule_type == DBRuleType.GENERAL, Rule.is_active == True)
-        ).scalar()
-        
-        return {
-            "total": total,
-            "esd": esd,
-            "latchup": latchup,
-            "general": general
-        }
+        """Get overall rule statistics, and the same counts per technology."""
+        return stats_service.rule_stats(db)
     
     def add_image(
         self,
@@ -156,9 +141,47 @@ class CRUDRule(CRUDBase[Rule, RuleCreate, RuleUpdate]):
         Returns:
             Created Rule database model
         """
-        # Extract content from the validated item
-        extracted_content = validation_item.extracted_content
+        db_rule = self.add_rules_from_validations(db, [validation_item])[0]
+        db.commit()
+        db.refresh(db_rule)
+        return db_rule
+    
+    def add_rules_from_validations(self, db: Session, validation_items: List[Any]) -> List[Rule]:
+        """
+        Add rules for validated queue items to the session without committing,
+        so a batch of approvals is stored in one transaction.
+        
+        Args:
+            db: Database session
+            validation_items: Validated queue items from which to create rules
+            
+        Returns:
+            Created Rule database models, in the order of validation_items
+        """
+        db_rules = [self._rule_from_extracted_content(item.extracted_content) for item in validation_items]
+        db.add_all(db_rules)
+        db.flush()  # Get rule ids
         
+        for validation_item, db_rule in zip(validation_items, db_rules):
+            # Link the validation item to the rule
+            validation_item.rule_id = db_rule.id
+            
+            # If there are images, create them too
+            images = validation_item.extracted_content.get("images")
+            if isinstance(images, list):
+                db.add_all([
+                    RuleImage(
+                        rule_id=db_rule.id,
+                        image_data=img_data.get("image_data"),
+                        mime_type=img_data.get("mime_type", "image/png"),
+                        caption=img_data.get("description", "")
+                    )
+                    for img_data in images
+                ])
+        return db_rules
+    
+    def _rule_from_extracted_content(self, extracted_content: Dict[str, Any]) -> Rule:
+        """Build an unsaved rule from the content of a validation queue item."""
         # Determine rule type 
         rule_type_str = extracted_content.get("rule_type", "general").lower()
         if rule_type_str == "esd":
@@ -171,8 +194,7 @@ class CRUDRule(CRUDBase[Rule, RuleCreate, RuleUpdate]):
         # Use technology_id if available, or a default
         technology_id = extracted_content.get("technology_id", 1)
         
-        # Create the rule
-        db_rule = Rule(
+        return Rule(
             technology_id=technology_id,
             rule_type=rule_type,
             title=extracted_content.get("title", "Untitled Rule"),
@@ -182,28 +204,5 @@ class CRUDRule(CRUDBase[Rule, RuleCreate, RuleUpdate]):
             is_active=True,
             order_index=0  # Will be updated later if needed
         )
-        
-        db.add(db_rule)
-        db.commit()
-        db.refresh(db_rule)
-        
-        # Link the validation item to the rule
-        validation_item.rule_id = db_rule.id
-        db.commit()
-        
-        # If there are images, create them too
-        if "images" in extracted_content and isinstance(extracted_content["images"], list):
-            for img_data in extracted_content["images"]:
-                # Create rule image
-                rule_image = RuleImage(
-                    rule_id=db_rule.id,
-                    image_data=img_data.get("image_data"),
-                    mime_type=img_data.get("mime_type", "image/png"),
-                    caption=img_data.get("description", "")
-                )
-                db.add(rule_image)
-        
-        db.commit()
-        return db_rule
 
 RuleCRUD = CRUDRule(Rule)
\ No newline at end of file
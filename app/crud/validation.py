@@ -1,10 +1,12 @@
 # app/crud/validation.py
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from sqlalchemy.orm import Session
 from datetime import datetime
 
 from app.database.models import ValidationQueue, ValidationStatus, ImportedDocument
 from app.models.schemas import ValidationQueueCreate, ValidationQueueUpdate
+from app.crud.rule import RuleCRUD
+from app.core.stats_service import stats_service
 
 def create_validation_item(db: Session, validation_item: ValidationQueueCreate) -> ValidationQueue:
     """
@@ -21,6 +23,8 @@ def create_validation_item(db: Session, validation_item: ValidationQueueCreate)
         document_id=validation_item.document_id,
         rule_id=validation_item.rule_id,
         extracted_content=validation_item.extracted_content,
+        source=validation_item.source,
+        confidence=validation_item.confidence,
         validation_status=validation_item.validation_status,
         validator_notes=validation_item.validator_notes
     )
@@ -97,6 +101,9 @@ def update_validation_status(
         
     # Update fields from status_update if they have values
     for field, value in status_update.dict(exclude_unset=True).items():
+        if field == "validation_status" and value is not None:
+            # The API schema has its own enum; the column stores the model's
+            value = ValidationStatus(getattr(value, "value", value))
         setattr(db_validation, field, value)
         
     db.commit()
@@ -104,9 +111,67 @@ def update_validation_status(
     return db_validation
 
 
+def bulk_review_validation_items(
+    db: Session,
+    validation_ids: List[int],
+    validation_status: ValidationStatus,
+    validator_notes: Optional[str] = None,
+    validated_by: Optional[str] = None
+) -> Tuple[List[ValidationQueue], List[int], List[int]]:
+    """
+    Set the status of many validation items in a single transaction.
+    
+    Approved items get a rule each, inserted in the same transaction. Items
+    that already have the requested status are left alone, so an approval
+    never creates a second rule for an item.
+    
+    Args:
+        db: Database session
+        validation_ids: IDs of the validation items to review
+        validation_status: Status to set
+        validator_notes: Notes stored on every reviewed item
+        validated_by: Reviewer stored on every reviewed item
+        
+    Returns:
+        Tuple of the reviewed items, the IDs skipped because they already
+        had the status, and the IDs that were not found
+    """
+    requested = list(dict.fromkeys(validation_ids))
+    items = {
+        item.id: item
+        for item in db.query(ValidationQueue).filter(ValidationQueue.id.in_(requested)).all()
+    }
+    not_found = [validation_id for validation_id in requested if validation_id not in items]
+    skipped = [
+        validation_id for validation_id in requested
+        if validation_id in items and items[validation_id].validation_status == validation_status
+    ]
+    reviewed = [
+        items[validation_id] for validation_id in requested
+        if validation_id in items and items[validation_id].validation_status != validation_status
+    ]
+    
+    # Only decisions are timestamped, as in the single-item review
+    decided = validation_status in (ValidationStatus.APPROVED, ValidationStatus.REJECTED)
+    validated_at = datetime.now() if decided else None
+    try:
+        for item in reviewed:
+            item.validation_status = validation_status
+            item.validator_notes = validator_notes
+            item.validated_by = validated_by
+            item.validated_at = validated_at
+        if validation_status == ValidationStatus.APPROVED:
+            RuleCRUD.add_rules_from_validations(db, [item for item in reviewed if item.rule_id is None])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return reviewed, skipped, not_found
+
+
 def get_pending_validation_count(db: Session) -> int:
     """
-    Get the number of pending validation items.
+    Get the number of pending validation items, from the cached status counts.
     
     Args:
         db: Database session
@@ -114,9 +179,7 @@ def get_pending_validation_count(db: Session) -> int:
     Returns:
         Count of pending validation items
     """
-    return db.query(ValidationQueue).filter(
-        ValidationQueue.validation_status == ValidationStatus.PENDING
-    ).count()
+    return stats_service.validation_status_counts(db)[ValidationStatus.PENDING.value]
 
 
 def delete_validation_items_for_document(db: Session, document_id: int) -> int:
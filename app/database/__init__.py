@@ -1,6 +1,6 @@
 # app/database/__init__.py
 from .database import Base, engine, SessionLocal, get_db
-from .models import Rule, Technology, Template, ImportedDocument, ValidationQueue, RuleImage
+from .models import Rule, Technology, Template, ImportedDocument, ValidationQueue, RuleImage, ProcessingJob, ParseResult, MCPAnalysisResult, ExtractionCandidate
 
 __all__ = [
     "Base", 
@@ -12,5 +12,9 @@ __all__ = [
     "Template",
     "ImportedDocument",
     "ValidationQueue",
-    "RuleImage"
+    "RuleImage",
+    "ProcessingJob",
+    "ParseResult",
+    "MCPAnalysisResult",
+    "ExtractionCandidate"
 ]
\ No newline at end of file
@@ -1,7 +1,7 @@
 # app/database/init_db.py
 from sqlalchemy import create_engine
 from .database import Base, engine
-from .models import Technology, Rule, Template, ImportedDocument, ValidationQueue, RuleImage
+from .models import Technology, Rule, Template, ImportedDocument, ValidationQueue, RuleImage, ProcessingJob, ParseResult, MCPAnalysisResult, ExtractionCandidate
 
 def init_database():
     """Initialize the database by creating all tables."""
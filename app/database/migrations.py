@@ -14,6 +14,7 @@ Run this script after updating the models.py file with the new schema changes.
 from sqlalchemy import create_engine, text, MetaData, Table, Column, inspect
 from sqlalchemy.types import Integer, String, Text, Boolean, JSON, DateTime
 import logging
+import hashlib
 import sys
 import os
 from datetime import datetime
@@ -107,6 +108,43 @@ def run_migration():
             {'name': 'latchup_strategy', 'type': 'JSON'}
         ])
         
+        # 5. Migrate the ImportedDocument table
+        logger.info("Migrating ImportedDocument table...")
+        add_columns_if_not_exist(conn, 'imported_documents', [
+            {'name': 'content_hash', 'type': 'VARCHAR(64)'},
+            {'name': 'duplicate_of_id', 'type': 'INTEGER'}
+        ])
+        add_index_if_not_exists(conn, 'imported_documents', 'idx_imported_documents_content_hash', 'content_hash')
+        backfill_content_hashes(conn)
+        
+        # 6. Migrate the ProcessingJob table
+        logger.info("Migrating ProcessingJob table...")
+        if inspector.has_table('processing_jobs'):
+            add_columns_if_not_exist(conn, 'processing_jobs', [
+                {'name': 'batch_id', 'type': 'VARCHAR(32)'}
+            ])
+            add_index_if_not_exists(conn, 'processing_jobs', 'idx_processing_jobs_batch_id', 'batch_id')
+        
+        # 7. Record where validation queue items came from
+        logger.info("Migrating ValidationQueue table...")
+        add_columns_if_not_exist(conn, 'validation_queue', [
+            {'name': 'source', 'type': 'VARCHAR(20)'},
+            {'name': 'confidence', 'type': 'FLOAT'}
+        ])
+        add_index_if_not_exists(conn, 'validation_queue', 'idx_validation_queue_source', 'source')
+        add_index_if_not_exists(conn, 'validation_queue', 'idx_validation_queue_confidence', 'confidence')
+        
+        # 8. Allow CSV documents
+        logger.info("Migrating DocumentType enum...")
+        add_enum_value_if_not_exists(conn, 'documenttype', 'CSV')
+        
+        # 9. Link validation queue items to the extraction candidates they were promoted from
+        logger.info("Linking ValidationQueue to extraction candidates...")
+        add_columns_if_not_exist(conn, 'validation_queue', [
+            {'name': 'candidate_id', 'type': 'INTEGER'}
+        ])
+        add_index_if_not_exists(conn, 'validation_queue', 'idx_validation_queue_candidate_id', 'candidate_id')
+        
         # Commit the transaction
         trans.commit()
         logger.info("Migration completed successfully")
@@ -172,6 +210,24 @@ def add_columns_if_not_exist(conn, table_name, columns):
         else:
             logger.info(f"Column '{column['name']}' already exists in table '{table_name}'")
             
+def backfill_content_hashes(conn):
+    """
+    Compute the content hash of documents stored before hashing was added
+    
+    Args:
+        conn: SQLAlchemy connection
+    """
+    result = conn.execute(text(
+        "SELECT id, file_data FROM imported_documents WHERE content_hash IS NULL AND file_data IS NOT NULL"
+    ))
+    rows = result.fetchall()
+    for document_id, file_data in rows:
+        conn.execute(
+            text("UPDATE imported_documents SET content_hash = :hash WHERE id = :id"),
+            {"hash": hashlib.sha256(file_data).hexdigest(), "id": document_id}
+        )
+    logger.info(f"Backfilled content hash for {len(rows)} documents")
+            
 def add_index_if_not_exists(conn, table_name, index_name, column_name):
     """
     Add an index to a table if it doesn't already exist
@@ -219,5 +275,22 @@ def create_enum_type_if_not_exists(conn, enum_name, values):
     else:
         logger.info(f"Enum type '{enum_name}' already exists")
 
+def add_enum_value_if_not_exists(conn, enum_name, value):
+    """
+    Add a value to an existing enum type if it is not there yet
+    
+    Args:
+        conn: SQLAlchemy connection
+        enum_name: Name of the enum type
+        value: Value to add
+    """
+    # SQLite stores enums as plain strings
+    if 'sqlite' in conn.engine.url.drivername:
+        logger.info(f"SQLite does not support enum types, skipping '{value}' for '{enum_name}'")
+        return
+    
+    conn.execute(text(f"ALTER TYPE {enum_name} ADD VALUE IF NOT EXISTS '{value}'"))
+    logger.info(f"Ensured enum type '{enum_name}' has value '{value}'")
+
 if __name__ == "__main__":
     run_migration()
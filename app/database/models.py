@@ -1,5 +1,5 @@
 # app/database/models.py
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Enum, LargeBinary, JSON
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, Boolean, ForeignKey, Enum, LargeBinary, JSON, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from .database import Base
@@ -21,6 +21,7 @@ class DocumentType(enum.Enum):
     PDF = "PDF"
     WORD = "WORD"
     MARKDOWN = "MARKDOWN"
+    CSV = "CSV"
 
 class Technology(Base):
     __tablename__ = "technologies"
@@ -133,7 +134,9 @@ class ImportedDocument(Base):
     filename = Column(String(255), nullable=False)
     document_type = Column(Enum(DocumentType), nullable=False)
     file_data = Column(LargeBinary)  # Store original file
-    file_path = Column(String(500))  # Alternative: store path
+    file_path = Column(String(500))  # Alternative: blob store key of the original file
+    content_hash = Column(String(64), index=True)  # SHA-256 of the uploaded file
+    duplicate_of_id = Column(Integer, ForeignKey("imported_documents.id"))  # Earlier upload with the same content
     processed = Column(Boolean, default=False)
     processing_status = Column(String(50))
     processing_notes = Column(Text)
@@ -143,6 +146,9 @@ class ImportedDocument(Base):
     
     # Relationships
     validation_queue = relationship("ValidationQueue", back_populates="document")
+    processing_jobs = relationship("ProcessingJob", back_populates="document", cascade="all, delete-orphan")
+    extraction_candidates = relationship("ExtractionCandidate", back_populates="document", cascade="all, delete-orphan")
+    duplicate_of = relationship("ImportedDocument", remote_side=[id], backref="duplicates")
 
 class ValidationQueue(Base):
     __tablename__ = "validation_queue"
@@ -150,7 +156,10 @@ class ValidationQueue(Base):
     id = Column(Integer, primary_key=True, index=True)
     document_id = Column(Integer, ForeignKey("imported_documents.id"))
     rule_id = Column(Integer, ForeignKey("rules.id"))
-    extracted_content = Column(JSON)  # JSON with extracted data
+    extracted_content = Column(JSON)  # JSON with extracted data, including its page, sheet/row or paragraph
+    source = Column(String(20), index=True)  # Extractor that produced the item: "parser" or "mcp"
+    confidence = Column(Float, index=True)  # Extraction confidence between 0 and 1
+    candidate_id = Column(Integer, ForeignKey("extraction_candidates.id"), index=True)  # Candidate the item was promoted from
     validation_status = Column(Enum(ValidationStatus), default=ValidationStatus.PENDING)
     validator_notes = Column(Text)
     validated_by = Column(String(100))
@@ -159,4 +168,67 @@ class ValidationQueue(Base):
     
     # Relationships
     document = relationship("ImportedDocument", back_populates="validation_queue")
-    rule = relationship("Rule", back_populates="validation_queue")
\ No newline at end of file
+    rule = relationship("Rule", back_populates="validation_queue")
+    candidate = relationship("ExtractionCandidate", back_populates="validation_items")
+
+class ExtractionCandidate(Base):
+    __tablename__ = "extraction_candidates"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("imported_documents.id"), nullable=False, index=True)
+    source = Column(String(20), nullable=False, index=True)  # Extractor that produced the rule: "parser" or "mcp"
+    content = Column(JSON)  # Extracted rule, as queued for validation
+    confidence = Column(Float, index=True)  # Extraction confidence between 0 and 1
+    created_at = Column(DateTime, server_default=func.now())
+    
+    # Relationships
+    document = relationship("ImportedDocument", back_populates="extraction_candidates")
+    validation_items = relationship("ValidationQueue", back_populates="candidate")
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    document_id = Column(Integer, ForeignKey("imported_documents.id"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # "parse" or "mcp"
+    batch_id = Column(String(32), index=True)  # Set when queued through the batch endpoint
+    status = Column(String(20), nullable=False, default="queued", index=True)  # queued, running, succeeded, failed, cancelled
+    attempts = Column(Integer, default=0)  # Number of times the job has been claimed
+    max_attempts = Column(Integer, default=3)
+    available_at = Column(DateTime, index=True)  # Earliest time the job may be claimed (retry backoff)
+    lease_owner = Column(String(100))  # Worker currently holding the job
+    lease_expires_at = Column(DateTime)  # Lease is abandoned after this time and the job requeued
+    last_error = Column(Text)
+    result = Column(JSON)  # Summary of the job outcome
+    created_at = Column(DateTime, server_default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    # Relationships
+    document = relationship("ImportedDocument", back_populates="processing_jobs")
+
+class ParseResult(Base):
+    __tablename__ = "parse_results"
+    __table_args__ = (UniqueConstraint("content_hash", "parser", "parser_version", name="uq_parse_results_key"),)
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 of the parsed file
+    parser = Column(String(50), nullable=False)  # Parser class name
+    parser_version = Column(String(20), nullable=False)  # PARSER_VERSION of the parser class
+    rules = Column(JSON)  # Extracted rules
+    result_metadata = Column(JSON)  # Document metadata reported by the parser
+    images = Column(JSON)  # Image references into the blob store
+    image_count = Column(Integer, default=0)
+    created_at = Column(DateTime, server_default=func.now())
+
+class MCPAnalysisResult(Base):
+    __tablename__ = "mcp_analysis_results"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False, index=True)  # SHA-256 of the analyzed file or chunk
+    document_hash = Column(String(64), index=True)  # SHA-256 of the whole document, for invalidation
+    options_hash = Column(String(64), nullable=False)  # SHA-256 of the analysis options sent
+    model = Column(String(100), nullable=False, default="")  # Model identifier reported by the server
+    result = Column(JSON)  # Raw analysis result returned by the server
+    created_at = Column(DateTime, server_default=func.now())
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,12 +1,33 @@
 # app/main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from app.api import endpoints, document_endpoints, validation_endpoints, template_endpoints, rule_endpoints, technology_endpoints
 from app.api.simple_rule_api import simple_router
+from app.core.job_manager import job_manager
+from app.core.job_queue import job_queue
+from app.core.document_processing import register_job_handlers
+from app.core.mcp_client import get_mcp_client, close_mcp_client
 
-app = FastAPI(title="ESD & Latch-up Guideline Generator")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop shared background resources."""
+    # Resume queued document jobs, including those interrupted by a restart
+    register_job_handlers(job_queue)
+    # One pooled MCP client serves every request and job
+    get_mcp_client()
+    await job_queue.start()
+    yield
+    # Stop queue workers first so their jobs are handed back, then the worker processes
+    await job_queue.stop()
+    await close_mcp_client()
+    job_manager.shutdown()
+
+
+app = FastAPI(title="ESD & Latch-up Guideline Generator", lifespan=lifespan)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -1,6 +1,6 @@
 # app/models/schemas.py
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, List, Dict, Any, Literal
 from datetime import datetime
 from enum import Enum
 
@@ -21,6 +21,7 @@ class DocumentType(str, Enum):
     PDF = "PDF"
     WORD = "WORD"
     MARKDOWN = "MARKDOWN"
+    CSV = "CSV"
 
 # Base schemas
 class TechnologyBase(BaseModel):
@@ -187,6 +188,9 @@ class ImportedDocumentBase(BaseModel):
 
 class ImportedDocumentCreate(ImportedDocumentBase):
     file_data: Optional[bytes] = None
+    file_path: Optional[str] = None
+    content_hash: Optional[str] = None
+    duplicate_of_id: Optional[int] = None
 
 class ImportedDocument(ImportedDocumentBase):
     id: int
@@ -194,6 +198,35 @@ class ImportedDocument(ImportedDocumentBase):
     processing_status: Optional[str] = None
     uploaded_at: datetime
     processed_at: Optional[datetime] = None
+    content_hash: Optional[str] = None
+    duplicate_of_id: Optional[int] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class BatchProcessRequest(BaseModel):
+    document_ids: Optional[List[int]] = None
+    filter: Optional[str] = None  # "unprocessed" or "failed", used when document_ids is not given
+    document_type: Optional[DocumentType] = None
+    kind: Literal["parse", "mcp"] = "parse"
+    force: bool = False
+
+# Processing Job schemas
+class ProcessingJob(BaseModel):
+    id: int
+    document_id: int
+    kind: str
+    batch_id: Optional[str] = None
+    status: str
+    attempts: int
+    max_attempts: int
+    available_at: Optional[datetime] = None
+    lease_owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
     
     model_config = ConfigDict(from_attributes=True)
 
@@ -202,6 +235,9 @@ class ValidationQueueBase(BaseModel):
     document_id: Optional[int] = None
     rule_id: Optional[int] = None
     extracted_content: Dict[str, Any]
+    source: Optional[str] = None
+    confidence: Optional[float] = None
+    candidate_id: Optional[int] = None
     validation_status: ValidationStatus = ValidationStatus.PENDING
     validator_notes: Optional[str] = None
 
@@ -221,6 +257,27 @@ class ValidationQueue(ValidationQueueBase):
     
     model_config = ConfigDict(from_attributes=True)
 
+class ExtractionCandidate(BaseModel):
+    id: int
+    document_id: int
+    source: str
+    content: Dict[str, Any]
+    confidence: Optional[float] = None
+    created_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+class BulkReviewRequest(BaseModel):
+    validation_ids: List[int] = Field(min_length=1, max_length=5000)
+    action: Literal["approve", "reject", "needs_review"]
+    validator_notes: Optional[str] = None
+    validator: Optional[str] = None
+
+class CandidatePromotion(BaseModel):
+    confidence_threshold: float = Field(ge=0.0, le=1.0)
+    document_id: Optional[int] = None  # All documents when not given
+    source: Optional[str] = None  # "parser" or "mcp"; all extractors when not given
+
 # Dashboard schemas
 class DashboardStats(BaseModel):
     total_rules: int
@@ -256,4 +313,4 @@ class TechnologyConfig(BaseModel):
     latch_up_rules: dict
     approved_clamps: List[dict]
     advanced_protection_scheme: Optional[bool] = False
-    advanced_protection_scheme_details: Optional[str] = None
\ No newline at end of file
+    advanced_protection_scheme_details: Optional[str] = None
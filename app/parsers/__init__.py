@@ -1,6 +1,13 @@
 # app/parsers/__init__.py
+from .registry import ParserRegistry, parser_registry
+# Importing the parsers registers them
 from .excel_parser import ExcelParser
 from .pdf_parser import PDFParser
 from .word_parser import WordParser
+from .markdown_parser import MarkdownParser
+from .csv_parser import CSVParser
 
-__all__ = ["ExcelParser", "PDFParser", "WordParser"]
+__all__ = [
+    "ParserRegistry", "parser_registry",
+    "ExcelParser", "PDFParser", "WordParser", "MarkdownParser", "CSVParser"
+]
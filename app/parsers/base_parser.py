@@ -1,24 +1,168 @@
 # app/parsers/base_parser.py
+import io
+import mmap
+import codecs
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional, Union, BinaryIO, TextIO
+
+# In-memory document content: raw bytes, a view of them, or a memory-mapped file
+ContentBuffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+# Bytes of a text document inspected to choose its encoding
+TEXT_SNIFF_BYTES = 64 * 1024
+
+
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable stream over a buffer that never copies the whole buffer."""
+    
+    def __init__(self, buffer: ContentBuffer):
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def readinto(self, b) -> int:
+        count = max(0, min(len(b), len(self._view) - self._position))
+        b[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+    
+    def readall(self) -> bytes:
+        data = self._view[self._position:].tobytes()
+        self._position = len(self._view)
+        return data
+    
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("Negative seek position")
+        self._position = offset
+        return self._position
+    
+    def tell(self) -> int:
+        return self._position
+    
+    def close(self) -> None:
+        # Release the view so an underlying mmap can be closed
+        self._view.release()
+        super().close()
 
 
 class BaseParser(ABC):
     """Abstract base class for document parsers."""
     
-    def __init__(self, file_path: Optional[str] = None, file_content: Optional[bytes] = None):
+    # Bump in a subclass whenever its output changes; cached parse results of
+    # older versions are then ignored and replaced
+    PARSER_VERSION = "1"
+    
+    # DocumentType value handled by the parser (see app.parsers.registry)
+    DOCUMENT_TYPE: Optional[str] = None
+    
+    # Accepted file extensions mapped to the magic bytes their files start
+    # with, or None for text formats that have no signature
+    EXTENSIONS: Dict[str, Optional[bytes]] = {}
+    
+    # Capability flags:
+    # SUPPORTS_STREAMING - reads the source incrementally, so it is handed the
+    #     stored file instead of a mapping of the whole document
+    # PARALLEL_SAFE - several documents may be parsed at the same time
+    # SUPPORTS_IMAGES - the format can contain images worth extracting
+    SUPPORTS_STREAMING = False
+    PARALLEL_SAFE = True
+    SUPPORTS_IMAGES = True
+    
+    def __init__(self, file_path: Optional[str] = None, file_content: Optional[ContentBuffer] = None):
         """
         Initialize parser with either file path or content.
         
         Args:
             file_path: Path to the document file
-            file_content: Raw bytes of the document
+            file_content: Document content as bytes, a memoryview or an mmap
         """
         if not file_path and not file_content:
             raise ValueError("Either file_path or file_content must be provided")
             
         self.file_path = file_path
         self.file_content = file_content
+        # Called with stage, done, total and extra counters while parsing
+        self.progress_callback: Optional[Callable[..., None]] = None
+    
+    @classmethod
+    def sniff(cls, head: bytes, extension: Optional[str] = None) -> bool:
+        """
+        Check whether the start of a file looks like this parser's format.
+        
+        Args:
+            head: First bytes of the file
+            extension: Claimed extension; without one, only formats with
+                magic bytes can be recognised
+            
+        Returns:
+            True if the content matches
+        """
+        if extension is None:
+            return any(signature and head.startswith(signature) for signature in cls.EXTENSIONS.values())
+        
+        signature = cls.EXTENSIONS.get(extension)
+        if signature is None:
+            # Text formats: binary files give themselves away with NUL bytes
+            return b"\x00" not in head
+        return head.startswith(signature)
+    
+    def _report_progress(self, stage: str, done: int, total: Optional[int] = None, **extra: Any) -> None:
+        """
+        Report parsing progress to the progress callback, if one is set.
+        
+        Args:
+            stage: What is being processed, e.g. "pages", "sheets" or "images"
+            done: Units of the stage processed so far
+            total: Total units in the stage, if known
+            **extra: Additional counters such as rules_found
+        """
+        if self.progress_callback is not None:
+            self.progress_callback(stage=stage, done=done, total=total, **extra)
+    
+    def _open_stream(self) -> Union[str, BinaryIO]:
+        """
+        Get a source that document libraries can open.
+        
+        Content is wrapped in a stream without copying it, so parsing never
+        needs a temporary file.
+        
+        Returns:
+            The file path, or a seekable binary stream over file_content
+        """
+        if self.file_path:
+            return self.file_path
+        if isinstance(self.file_content, bytes):
+            # BytesIO shares an immutable bytes buffer instead of copying it
+            return io.BytesIO(self.file_content)
+        return io.BufferedReader(BufferReader(self.file_content))
+    
+    def _open_text_stream(self) -> TextIO:
+        """
+        Open the content of a text document for reading line by line.
+        
+        UTF-8 is assumed unless the start of the file is not valid UTF-8, in
+        which case it is read as Windows-1252, the usual encoding of exports
+        from Office on Windows.
+        
+        Returns:
+            Text stream that keeps line endings as they are, as csv expects
+        """
+        source = self._open_stream()
+        binary = open(source, "rb") if isinstance(source, str) else source
+        head = binary.read(TEXT_SNIFF_BYTES)
+        binary.seek(0)
+        encoding = "utf-8-sig" if _is_utf8(head) else "cp1252"
+        return io.TextIOWrapper(binary, encoding=encoding, errors="replace", newline="")
     
     @abstractmethod
     def extract_rules(self) -> List[Dict[str, Any]]:
@@ -50,15 +194,68 @@ class BaseParser(ABC):
         """
         pass
     
-    def process(self) -> Dict[str, Any]:
+    def iter_images(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over document images.
+        
+        Parsers that can decode images one at a time override this so callers
+        never hold every image in memory at once.
+        
+        Yields:
+            Dictionaries with image data and metadata
+        """
+        yield from self.extract_images()
+    
+    def process(
+        self,
+        image_store=None,
+        include_images: bool = True,
+        progress_callback: Optional[Callable[..., None]] = None
+    ) -> Dict[str, Any]:
         """
         Process the document and extract all available information.
         
+        Args:
+            image_store: Optional BlobStore; images are written to it as they are
+                extracted and returned as references instead of raw bytes
+            include_images: If False, images are only counted, never kept
+            progress_callback: Optional callable receiving progress updates
+        
         Returns:
-            A dictionary with rules, metadata, and images
+            A dictionary with rules, metadata, images and the image count
         """
+        if progress_callback is not None:
+            self.progress_callback = progress_callback
+        
+        images = []
+        image_count = 0
+        
+        for image in self.iter_images() if self.SUPPORTS_IMAGES else ():
+            image_count += 1
+            self._report_progress("images", image_count)
+            if not include_images:
+                continue
+            if image_store is not None:
+                data = image.pop("image_data")
+                image["blob_key"] = image_store.put(data)
+                image["size"] = len(data)
+            images.append(image)
+        
+        rules = self.extract_rules()
+        self._report_progress("rules", len(rules), len(rules), rules_found=len(rules))
+        
         return {
-            "rules": self.extract_rules(),
+            "rules": rules,
             "metadata": self.extract_metadata(),
-            "images": self.extract_images()
+            "images": images,
+            "image_count": image_count
         }
+
+
+def _is_utf8(head: bytes) -> bool:
+    """Check that bytes are valid UTF-8; a character cut off at the end is allowed."""
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return False
+    return True
@@ -0,0 +1,103 @@
+# app/parsers/csv_parser.py
+import csv
+import logging
+from typing import Dict, Any, List, Optional
+from .base_parser import BaseParser, ContentBuffer
+from .registry import parser_registry
+from .table_rules import detect_column_mapping, rule_from_row, TABLE_ROW_CONFIDENCE
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Characters read to detect the delimiter
+CSV_SNIFF_CHARS = 16 * 1024
+
+# Delimiters seen in rule exports; Excel uses ";" in locales with a decimal comma
+CSV_DELIMITERS = ",;\t"
+
+# Rows between progress reports
+CSV_PROGRESS_ROWS = 1000
+
+
+@parser_registry.register
+class CSVParser(BaseParser):
+    """Parser to extract rule information from CSV files, such as the rule export."""
+
+    PARSER_VERSION = "1"
+    DOCUMENT_TYPE = "CSV"
+    EXTENSIONS = {".csv": None}
+    SUPPORTS_STREAMING = True
+    SUPPORTS_IMAGES = False
+
+    def __init__(self, file_path: Optional[str] = None, file_content: Optional[ContentBuffer] = None):
+        super().__init__(file_path, file_content)
+        self.columns: List[str] = []
+        self.row_count = 0
+        self._rules: Optional[List[Dict[str, Any]]] = None
+
+    def extract_rules(self) -> List[Dict[str, Any]]:
+        """
+        Extract rules from the rows of the file, one rule per row.
+
+        The header row is mapped to rule properties as for Excel sheets.
+
+        Returns:
+            List of dictionaries with rule data, a confidence and the
+            one-based row each rule was read from
+        """
+        if self._rules is not None:
+            return self._rules
+
+        rules = []
+        self.row_count = 0
+
+        with self._open_text_stream() as stream:
+            sample = stream.read(CSV_SNIFF_CHARS)
+            stream.seek(0)
+            try:
+                dialect = csv.Sniffer().sniff(sample, delimiters=CSV_DELIMITERS)
+            except csv.Error:
+                dialect = csv.excel
+
+            reader = csv.reader(stream, dialect)
+            header = next(reader, None)
+            if header:
+                self.columns = [column.strip().lower() for column in header]
+            column_mapping = detect_column_mapping(self.columns)
+            if "title" not in column_mapping or "content" not in column_mapping:
+                logger.warning(f"No rule columns found in CSV header: {self.columns}")
+
+            for row_number, row in enumerate(reader, start=2):
+                self.row_count += 1
+                if self.row_count % CSV_PROGRESS_ROWS == 0:
+                    self._report_progress("rows", self.row_count, rules_found=len(rules))
+
+                values = dict(zip(self.columns, (value.strip() for value in row)))
+                if any(column not in values for column in column_mapping.values()):
+                    continue
+
+                rule = rule_from_row(values, column_mapping)
+                if not rule or not rule["title"] or not rule["content"]:
+                    continue
+
+                rule["confidence"] = TABLE_ROW_CONFIDENCE
+                rule["row"] = row_number
+                rules.append(rule)
+
+        self._report_progress("rows", self.row_count, self.row_count, rules_found=len(rules))
+        self._rules = rules
+        return rules
+
+    def extract_metadata(self) -> Dict[str, Any]:
+        """
+        Extract metadata from the CSV file.
+
+        Returns:
+            Dictionary with metadata
+        """
+        self.extract_rules()
+        return {"columns": self.columns, "rows": self.row_count}
+
+    def extract_images(self) -> List[Dict[str, Any]]:
+        """CSV files hold no images."""
+        return []
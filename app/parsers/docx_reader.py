@@ -0,0 +1,502 @@
+# app/parsers/docx_reader.py
+"""
+Streaming reader for the body of a .docx package.
+
+python-docx builds a proxy object for every paragraph and run, and looks up
+a paragraph's style in the styles part on every access. This reader streams
+the main document part with lxml's iterparse instead, resolves paragraph
+style names once, and yields one light record per body-level paragraph with
+the values python-docx would report:
+
+    text   -> Paragraph.text (runs and hyperlinks, tabs and line breaks)
+    style  -> Paragraph.style.name
+    bold   -> any(run.bold for run in Paragraph.runs)
+
+Rows of body-level tables are yielded as they end, with one text per grid
+column as in python-docx's Row.cells.
+
+Body elements are cleared as soon as they have been read, so memory stays
+flat however long the document is. Once the body has been read, the
+paragraph and section counts are known as well. Core properties and images
+are read from their own parts. Packages the reader does not understand
+raise UnsupportedDocxError so callers can fall back to python-docx.
+
+Body-level elements can also be streamed as they are and written into a
+copy of the package, so a long document can be cut into smaller ones.
+"""
+import io
+import zipfile
+import posixpath
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+from lxml import etree
+from docx.opc.coreprops import CoreProperties
+from docx.oxml import parse_xml
+from docx.styles import BabelFish
+
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+PACKAGE_RELS_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+OFFICE_DOCUMENT_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"
+STYLES_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles"
+CORE_PROPERTIES_REL = "http://schemas.openxmlformats.org/package/2006/relationships/metadata/core-properties"
+CONTENT_TYPES_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+IMAGE_REL = f"{R_NS}/image"
+
+
+def _w(tag: str) -> str:
+    return f"{{{W_NS}}}{tag}"
+
+
+DOCUMENT = _w("document")
+BODY = _w("body")
+P = _w("p")
+R = _w("r")
+TBL = _w("tbl")
+TR = _w("tr")
+TC = _w("tc")
+P_PR = _w("pPr")
+SECT_PR = _w("sectPr")
+HYPERLINK = _w("hyperlink")
+VAL = _w("val")
+
+# Run children that carry text, mapped to the text python-docx gives them;
+# w:t and w:br are handled separately
+RUN_TEXT = {_w("tab"): "\t", _w("ptab"): "\t", _w("cr"): "\n", _w("noBreakHyphen"): "-"}
+T = _w("t")
+BR = _w("br")
+
+# ST_OnOff values that switch a property off
+OFF_VALUES = ("0", "false", "off")
+
+
+class UnsupportedDocxError(Exception):
+    """The package is not a transitional WordprocessingML document this reader handles."""
+
+
+class DocxParagraph(NamedTuple):
+    """A body-level paragraph as seen by the rule extractor."""
+    index: int
+    text: str
+    style: Optional[str]
+    bold: bool
+
+
+class DocxTableRow(NamedTuple):
+    """A row of a body-level table."""
+    table: int
+    row: int
+    cells: List[str]
+
+
+class DocxStreamReader:
+    """Read body paragraphs of a .docx file without building the python-docx object model."""
+
+    def __init__(self, source: Union[str, BinaryIO]):
+        """
+        Open the package and resolve its main document and paragraph styles.
+
+        Args:
+            source: File path or seekable binary stream of the .docx file
+
+        Raises:
+            UnsupportedDocxError: If the package layout is not understood
+            zipfile.BadZipFile: If the source is not a zip package
+        """
+        self._zip = zipfile.ZipFile(source)
+        self.main_part = self._main_part_name()
+        main_dir, main_name = posixpath.split(self.main_part)
+        self._main_rels = posixpath.join(main_dir, "_rels", f"{main_name}.rels")
+        # Attributes and namespace declarations of w:document, set by _check_root
+        self._root_attrib: Dict[str, str] = {}
+        self._root_nsmap: Dict[Optional[str], str] = {}
+        self._check_root()
+        self.styles, self.default_style = self._read_paragraph_styles()
+        # Set once iter_body has read the whole body, as python-docx counts them
+        self.paragraph_count: Optional[int] = None
+        self.section_count: Optional[int] = None
+
+    def close(self) -> None:
+        self._zip.close()
+
+    def __enter__(self) -> "DocxStreamReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def iter_paragraphs(self) -> Iterator[DocxParagraph]:
+        """
+        Stream the paragraphs directly under the document body, in order.
+
+        Paragraphs inside tables, text boxes and content controls are
+        skipped, as they are by python-docx's Document.paragraphs.
+
+        Yields:
+            One DocxParagraph per body paragraph
+        """
+        for item in self.iter_body():
+            if isinstance(item, DocxParagraph):
+                yield item
+
+    def iter_body(self) -> Iterator[Union[DocxParagraph, DocxTableRow]]:
+        """
+        Stream body paragraphs and the rows of body-level tables in document order.
+
+        Tables nested inside table cells are not read.
+
+        Yields:
+            DocxParagraph for each body paragraph and DocxTableRow for each table row
+        """
+        paragraph_index = 0
+        section_count = 0
+        table_index = 0
+        row_index = 0
+        previous_cells: List[str] = []
+
+        with self._zip.open(self.main_part) as stream:
+            for event, element in etree.iterparse(
+                stream, events=("start", "end"), tag=(P, TBL, TR, SECT_PR), resolve_entities=False, huge_tree=True
+            ):
+                parent = element.getparent()
+                if parent is None:
+                    continue
+
+                if element.tag == SECT_PR:
+                    # Sections end at w:body/w:p/w:pPr/w:sectPr and at the final w:body/w:sectPr
+                    if event == "end" and (parent.tag == BODY or (
+                        parent.tag == P_PR and parent.getparent().getparent() is not None
+                        and parent.getparent().getparent().tag == BODY
+                    )):
+                        section_count += 1
+                    continue
+
+                if event == "start":
+                    if element.tag == TBL and parent.tag == BODY:
+                        table_index += 1
+                        row_index = 0
+                        previous_cells = []
+                    continue
+
+                if element.tag == TR:
+                    # Rows of nested tables stay in their cell until the outer row is read
+                    if parent.getparent() is None or parent.getparent().tag != BODY:
+                        continue
+                    row_index += 1
+                    previous_cells = self._read_row(element, previous_cells)
+                    yield DocxTableRow(table=table_index, row=row_index, cells=previous_cells)
+                elif parent.tag != BODY:
+                    continue
+                elif element.tag == P:
+                    yield self._read_paragraph(paragraph_index, element)
+                    paragraph_index += 1
+
+                # Drop what has been read, including earlier siblings such as bookmarks
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+
+        self.paragraph_count = paragraph_index
+        self.section_count = section_count
+
+    def iter_blocks(self) -> Iterator[Tuple[Any, Optional[DocxParagraph]]]:
+        """
+        Stream the elements directly under the document body, in order.
+
+        Each element is cleared once the caller moves on to the next one,
+        so elements that are kept, e.g. for package_with_body, must be copied.
+
+        Yields:
+            Each body-level element, with its DocxParagraph if it is a paragraph
+        """
+        paragraph_index = 0
+        with self._zip.open(self.main_part) as stream:
+            for _, element in etree.iterparse(stream, events=("end",), resolve_entities=False, huge_tree=True):
+                parent = element.getparent()
+                if parent is None or parent.tag != BODY:
+                    continue
+                paragraph = None
+                if element.tag == P:
+                    paragraph = self._read_paragraph(paragraph_index, element)
+                    paragraph_index += 1
+                yield element, paragraph
+
+                element.clear()
+                while element.getprevious() is not None:
+                    del parent[0]
+
+    def package_with_body(self, blocks: Iterable[Any]) -> bytes:
+        """
+        Write a copy of the package whose body holds only the given elements.
+
+        Images that only the left-out elements used are dropped along with
+        their relationships. Entries keep their original timestamps, so the
+        same elements always give the same bytes.
+
+        Args:
+            blocks: Body-level elements, e.g. copies of those from iter_blocks
+
+        Returns:
+            The new .docx package
+        """
+        root = etree.Element(DOCUMENT, attrib=self._root_attrib, nsmap=self._root_nsmap)
+        body = etree.SubElement(root, BODY)
+        for block in blocks:
+            body.append(block)
+        used_ids = {
+            value
+            for element in body.iter()
+            for name, value in element.attrib.items()
+            if name.startswith(f"{{{R_NS}}}")
+        }
+
+        rels_root = None
+        dropped: Set[str] = set()
+        if self._main_rels in self._zip.NameToInfo:
+            rels_root = etree.fromstring(self._zip.read(self._main_rels), etree.XMLParser(resolve_entities=False))
+            main_dir = posixpath.dirname(self.main_part)
+            for rel in list(rels_root):
+                if (rel.get("Type") == IMAGE_REL and rel.get("TargetMode") != "External"
+                        and rel.get("Id") not in used_ids):
+                    rels_root.remove(rel)
+                    dropped.add(_resolve_target(main_dir, rel.get("Target", "")))
+            dropped -= self._targets_of_other_parts()
+
+        output = io.BytesIO()
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as package:
+            for info in self._zip.infolist():
+                if info.filename in dropped:
+                    continue
+                if info.filename == self.main_part:
+                    data = etree.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+                elif info.filename == self._main_rels and rels_root is not None:
+                    data = etree.tostring(rels_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+                else:
+                    data = self._zip.read(info)
+                package.writestr(zipfile.ZipInfo(info.filename, date_time=info.date_time), data, zipfile.ZIP_DEFLATED)
+        return output.getvalue()
+
+    def _targets_of_other_parts(self) -> Set[str]:
+        """Parts that relationships of parts other than the main document refer to."""
+        targets = set()
+        for name in self._zip.namelist():
+            if not name.endswith(".rels") or name == self._main_rels:
+                continue
+            # Relationships of dir/_rels/part.rels are relative to dir
+            source_dir = posixpath.dirname(posixpath.dirname(name))
+            root = etree.fromstring(self._zip.read(name), etree.XMLParser(resolve_entities=False))
+            for rel in root.iterchildren(f"{{{PACKAGE_RELS_NS}}}Relationship"):
+                if rel.get("TargetMode") != "External":
+                    targets.add(_resolve_target(source_dir, rel.get("Target", "")))
+        return targets
+
+    def core_properties(self) -> CoreProperties:
+        """
+        Read the core properties part, as python-docx's Document.core_properties.
+
+        Raises:
+            UnsupportedDocxError: If the package has no core properties part
+                (python-docx substitutes defaults for it)
+        """
+        core_part = self._relationship_target("_rels/.rels", "", CORE_PROPERTIES_REL)
+        if core_part is None or core_part not in self._zip.NameToInfo:
+            raise UnsupportedDocxError("Package has no core properties part")
+        return CoreProperties(parse_xml(self._zip.read(core_part)))
+
+    def iter_images(self) -> Iterator[Tuple[str, bytes]]:
+        """
+        Read the image parts the main document refers to, in relationship order.
+
+        Like python-docx, every internal relationship whose target mentions
+        "image" counts, and a part referred to twice is read twice.
+
+        Yields:
+            Tuple of content type and image bytes
+        """
+        if self._main_rels not in self._zip.NameToInfo:
+            return
+        main_dir = posixpath.dirname(self.main_part)
+        root = etree.fromstring(self._zip.read(self._main_rels), etree.XMLParser(resolve_entities=False))
+        content_types = None
+        for rel in root.iterchildren(f"{{{PACKAGE_RELS_NS}}}Relationship"):
+            target = rel.get("Target", "")
+            if "image" not in target or rel.get("TargetMode") == "External":
+                continue
+            part_name = _resolve_target(main_dir, target)
+            if part_name not in self._zip.NameToInfo:
+                continue
+            if content_types is None:
+                content_types = self._read_content_types()
+            yield self._content_type(content_types, part_name), self._zip.read(part_name)
+
+    def _read_content_types(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """Content type overrides by part name and defaults by extension."""
+        root = etree.fromstring(self._zip.read("[Content_Types].xml"), etree.XMLParser(resolve_entities=False))
+        overrides = {
+            element.get("PartName", "").lstrip("/").lower(): element.get("ContentType", "")
+            for element in root.iterchildren(f"{{{CONTENT_TYPES_NS}}}Override")
+        }
+        defaults = {
+            element.get("Extension", "").lower(): element.get("ContentType", "")
+            for element in root.iterchildren(f"{{{CONTENT_TYPES_NS}}}Default")
+        }
+        return overrides, defaults
+
+    @staticmethod
+    def _content_type(content_types: Tuple[Dict[str, str], Dict[str, str]], part_name: str) -> str:
+        overrides, defaults = content_types
+        if part_name.lower() in overrides:
+            return overrides[part_name.lower()]
+        extension = posixpath.splitext(part_name)[1].lstrip(".").lower()
+        if extension not in defaults:
+            raise UnsupportedDocxError(f"No content type for part {part_name}")
+        return defaults[extension]
+
+    def _read_row(self, tr, previous_cells: List[str]) -> List[str]:
+        """
+        Read the cell texts of one w:tr element.
+
+        Args:
+            tr: Table row element
+            previous_cells: Cell texts of the row above, used for vertically merged cells
+
+        Returns:
+            One text per grid column
+        """
+        cells = []
+        for tc in tr.iterchildren(TC):
+            tc_pr = tc.find(_w("tcPr"))
+            span = 1
+            continues_merge = False
+            if tc_pr is not None:
+                grid_span = tc_pr.find(_w("gridSpan"))
+                if grid_span is not None:
+                    span = int(grid_span.get(VAL, "1"))
+                v_merge = tc_pr.find(_w("vMerge"))
+                continues_merge = v_merge is not None and v_merge.get(VAL, "continue") == "continue"
+
+            if continues_merge and len(previous_cells) > len(cells):
+                # python-docx reports the text of the cell the merge started in
+                text = previous_cells[len(cells)]
+            else:
+                text = "\n".join(self._read_paragraph(0, p).text for p in tc.iterchildren(P))
+            # A cell spanning several grid columns appears once per column
+            cells.extend([text] * span)
+        return cells
+
+    def _read_paragraph(self, index: int, p) -> DocxParagraph:
+        """Build the record of one w:p element."""
+        texts = []
+        bold = False
+        for child in p:
+            if child.tag == R:
+                texts.append(_run_text(child))
+                bold = bold or _run_is_bold(child)
+            elif child.tag == HYPERLINK:
+                texts.extend(_run_text(run) for run in child.iterchildren(R))
+
+        style_id = None
+        p_pr = p.find(_w("pPr"))
+        if p_pr is not None:
+            p_style = p_pr.find(_w("pStyle"))
+            if p_style is not None:
+                style_id = p_style.get(VAL)
+        # Like python-docx, unknown style IDs resolve to the default paragraph style
+        style = self.styles.get(style_id, self.default_style) if style_id else self.default_style
+
+        return DocxParagraph(index=index, text="".join(texts), style=style, bold=bold)
+
+    def _main_part_name(self) -> str:
+        """Find the main document part through the package relationships."""
+        target = self._relationship_target("_rels/.rels", "", OFFICE_DOCUMENT_REL)
+        if target is None or target not in self._zip.NameToInfo:
+            raise UnsupportedDocxError("Package has no main document part")
+        return target
+
+    def _check_root(self) -> None:
+        """Make sure the main part is a transitional WordprocessingML document."""
+        with self._zip.open(self.main_part) as stream:
+            for _, root in etree.iterparse(stream, events=("start",), resolve_entities=False):
+                if root.tag != DOCUMENT:
+                    raise UnsupportedDocxError(f"Unsupported document root {root.tag}")
+                self._root_attrib = dict(root.attrib)
+                self._root_nsmap = dict(root.nsmap)
+                return
+
+    def _read_paragraph_styles(self):
+        """
+        Map paragraph style IDs to the UI names python-docx reports.
+
+        Returns:
+            Tuple of the style map and the default paragraph style name
+        """
+        styles_part = self._relationship_target(self._main_rels, posixpath.dirname(self.main_part), STYLES_REL)
+        if styles_part is None or styles_part not in self._zip.NameToInfo:
+            # python-docx substitutes its template styles; leave that case to it
+            raise UnsupportedDocxError("Package has no styles part")
+
+        styles: Dict[str, Optional[str]] = {}
+        seen_ids = set()
+        default_style = None
+        root = etree.fromstring(self._zip.read(styles_part), etree.XMLParser(resolve_entities=False))
+        for style in root.iterchildren(_w("style")):
+            style_id = style.get(_w("styleId"))
+            # The first style with an ID wins; one of another type means the default is used
+            first_with_id = style_id not in seen_ids
+            seen_ids.add(style_id)
+            if style.get(_w("type")) != "paragraph":
+                continue
+
+            name_element = style.find(_w("name"))
+            name = name_element.get(VAL) if name_element is not None else None
+            name = BabelFish.internal2ui(name) if name is not None else None
+            if first_with_id:
+                styles[style_id] = name
+            # The last default style in document order applies
+            if style.get(_w("default"), "false").lower() not in OFF_VALUES:
+                default_style = name
+
+        return styles, default_style
+
+    def _relationship_target(self, rels_name: str, base_dir: str, rel_type: str) -> Optional[str]:
+        """Resolve the part name targeted by the first relationship of a type."""
+        if rels_name not in self._zip.NameToInfo:
+            return None
+        root = etree.fromstring(self._zip.read(rels_name), etree.XMLParser(resolve_entities=False))
+        for rel in root.iterchildren(f"{{{PACKAGE_RELS_NS}}}Relationship"):
+            if rel.get("Type") == rel_type and rel.get("TargetMode") != "External":
+                return _resolve_target(base_dir, rel.get("Target", ""))
+        return None
+
+
+def _resolve_target(base_dir: str, target: str) -> str:
+    """Part name of a relationship target, relative to its source part's directory."""
+    if target.startswith("/"):
+        return target.lstrip("/")
+    return posixpath.normpath(posixpath.join(base_dir, target))
+
+
+def _run_text(run) -> str:
+    """Text of a w:r element, with tabs, breaks and hyphens translated like python-docx."""
+    parts = []
+    for child in run:
+        if child.tag == T:
+            parts.append(child.text or "")
+        elif child.tag == BR:
+            # Page and column breaks add no text
+            if child.get(_w("type"), "textWrapping") == "textWrapping":
+                parts.append("\n")
+        else:
+            text = RUN_TEXT.get(child.tag)
+            if text is not None:
+                parts.append(text)
+    return "".join(parts)
+
+
+def _run_is_bold(run) -> bool:
+    """Whether a w:r element is directly formatted bold."""
+    r_pr = run.find(_w("rPr"))
+    if r_pr is None:
+        return False
+    b = r_pr.find(_w("b"))
+    return b is not None and b.get(VAL, "true").lower() not in OFF_VALUES
@@ -0,0 +1,188 @@
+# app/parsers/markdown_parser.py
+import re
+import bisect
+from typing import Dict, Any, List, Optional
+from .base_parser import BaseParser, ContentBuffer
+from .registry import parser_registry
+from .rule_scanner import rule_scanner
+from .table_rules import detect_column_mapping, rule_from_row, TABLE_ROW_CONFIDENCE
+
+# ATX heading marker at the start of a line, e.g. "### "
+HEADING_MARKER = re.compile(r'#{1,6}[ \t]+')
+
+# Line below a pipe table header, e.g. "|---|:---:|"
+TABLE_SEPARATOR = re.compile(r'\|?[ \t]*:?-{3,}:?[ \t]*(?:\|[ \t]*:?-{3,}:?[ \t]*)*\|?[ \t]*$')
+
+
+def _table_cells(line: str) -> List[str]:
+    """Split a pipe table line into stripped cell texts."""
+    return [cell.strip() for cell in line.strip().strip("|").split("|")]
+
+
+@parser_registry.register
+class MarkdownParser(BaseParser):
+    """Parser to extract rule information from Markdown documents, such as exported guidelines."""
+
+    PARSER_VERSION = "1"
+    DOCUMENT_TYPE = "MARKDOWN"
+    EXTENSIONS = {".md": None, ".markdown": None}
+    SUPPORTS_STREAMING = True
+    SUPPORTS_IMAGES = False
+
+    def __init__(self, file_path: Optional[str] = None, file_content: Optional[ContentBuffer] = None):
+        super().__init__(file_path, file_content)
+        self.title: Optional[str] = None
+        self.heading_count = 0
+        self.line_count = 0
+        self._text: Optional[str] = None
+        self._line_offsets: List[int] = []
+        self._table_rules: List[Dict[str, Any]] = []
+
+    def _read(self) -> str:
+        """
+        Read the document in one pass.
+
+        Heading markers are stripped so numbered headings ("### 2.1 Title")
+        reach the rule scanner as plain numbered lines, and rows of pipe
+        tables are turned into rules through the table column mapping.
+
+        Returns:
+            Document text with heading markers removed and table lines,
+            header and separator included, blanked
+        """
+        if self._text is not None:
+            return self._text
+
+        lines = []
+        offset = 0
+        previous_line = ""
+        table_columns: Optional[List[str]] = None
+        column_mapping: Dict[str, str] = {}
+
+        with self._open_text_stream() as stream:
+            for line_number, raw_line in enumerate(stream, start=1):
+                line = raw_line.rstrip("\r\n")
+                self._line_offsets.append(offset)
+                self.line_count = line_number
+
+                if table_columns is not None and line.lstrip().startswith("|"):
+                    rule = self._rule_from_table_line(line, line_number, table_columns, column_mapping)
+                    if rule:
+                        self._table_rules.append(rule)
+                    line = ""
+                elif previous_line.lstrip().startswith("|") and TABLE_SEPARATOR.match(line.strip()):
+                    # The previous line was the header of a pipe table; blank it too
+                    table_columns = [cell.lower() for cell in _table_cells(previous_line)]
+                    column_mapping = detect_column_mapping(table_columns)
+                    offset -= len(lines[-1])
+                    self._line_offsets[-1] = offset
+                    lines[-1] = ""
+                    line = ""
+                else:
+                    table_columns = None
+                    heading = HEADING_MARKER.match(line)
+                    if heading:
+                        line = line[heading.end():].rstrip().rstrip("#").rstrip()
+                        self.heading_count += 1
+                        if self.title is None and heading.group().startswith("# "):
+                            self.title = line
+
+                previous_line = raw_line.rstrip("\r\n")
+                lines.append(line)
+                offset += len(line) + 1
+
+                if line_number % 1000 == 0:
+                    self._report_progress("lines", line_number)
+
+        self._text = "\n".join(lines)
+        return self._text
+
+    def _rule_from_table_line(
+        self,
+        line: str,
+        line_number: int,
+        columns: List[str],
+        column_mapping: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Turn a pipe table row into a rule.
+
+        Args:
+            line: Table row line
+            line_number: One-based line number of the row
+            columns: Lower-case header names of the table
+            column_mapping: Mapping of rule properties to header names
+
+        Returns:
+            Rule dictionary, or None if the table is not a rule table or the row is empty
+        """
+        values = dict(zip(columns, _table_cells(line)))
+        if any(column not in values for column in column_mapping.values()):
+            return None
+
+        rule = rule_from_row(values, column_mapping)
+        if not rule or not rule["title"] or not rule["content"]:
+            return None
+
+        if "rule_type" not in rule:
+            rule["rule_type"] = self._detect_rule_type(rule["title"] + " " + rule["content"])
+        rule["confidence"] = TABLE_ROW_CONFIDENCE
+        rule["line"] = line_number
+        return rule
+
+    def extract_rules(self) -> List[Dict[str, Any]]:
+        """
+        Extract rules from numbered headings and rule tables.
+
+        Returns:
+            List of dictionaries with rule data, a confidence and the
+            one-based line each rule starts at
+        """
+        text = self._read()
+        rules = []
+
+        for span in rule_scanner.scan(text):
+            rules.append({
+                "title": span["title"],
+                "content": span["content"],
+                "rule_type": self._detect_rule_type(span["title"] + " " + span["content"]),
+                "confidence": span["confidence"],
+                "line": bisect.bisect_right(self._line_offsets, span["start"])
+            })
+
+        return rules + self._table_rules
+
+    def _detect_rule_type(self, text: str) -> str:
+        """
+        Detect rule type based on text.
+
+        Args:
+            text: Text to analyze
+
+        Returns:
+            Rule type (esd, latchup, or general)
+        """
+        text_lower = text.lower()
+
+        if "esd" in text_lower:
+            return "esd"
+        elif any(term in text_lower for term in ["latchup", "latch-up", "latch up"]):
+            return "latchup"
+        return "general"
+
+    def extract_metadata(self) -> Dict[str, Any]:
+        """
+        Extract metadata from the Markdown document.
+
+        Returns:
+            Dictionary with metadata
+        """
+        self._read()
+        metadata = {"lines": self.line_count, "headings": self.heading_count}
+        if self.title:
+            metadata["title"] = self.title
+        return metadata
+
+    def extract_images(self) -> List[Dict[str, Any]]:
+        """Markdown only links to images, so there are none to extract."""
+        return []
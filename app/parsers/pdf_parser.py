@@ -1,94 +1,277 @@
 # app/parsers/pdf_parser.py
 import io
-from typing import Dict, Any, List, Optional
+import os
+import bisect
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterator, List, Optional, Tuple, Union
 import PyPDF2
-from PIL import Image
-import re
-from .base_parser import BaseParser
+from .base_parser import BaseParser, ContentBuffer
+from .registry import parser_registry
+from .rule_scanner import rule_scanner
 
+# Configure logging
+logger = logging.getLogger(__name__)
 
+# Page-parallel text extraction settings
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "40"))  # Below this, extract serially
+PDF_PAGE_CHUNK_SIZE = int(os.getenv("PDF_PAGE_CHUNK_SIZE", "25"))  # Pages per worker task
+PDF_TEXT_WORKERS = int(os.getenv("PDF_TEXT_WORKERS", "0"))  # 0 = one worker per CPU available to the job
+
+# Image extraction limits
+PDF_IMAGE_BYTE_BUDGET_MB = int(os.getenv("PDF_IMAGE_BYTE_BUDGET_MB", "256"))  # 0 = unlimited
+PDF_IMAGE_MIN_DIMENSION = int(os.getenv("PDF_IMAGE_MIN_DIMENSION", "0"))  # Pixels, 0 = keep all
+
+# Reader opened once per pool worker by _init_text_worker
+_worker_reader = None
+
+
+def _init_text_worker(source: Union[str, bytes]) -> None:
+    """Open the PDF once in a pool worker so tasks only carry page indices."""
+    global _worker_reader
+    _worker_reader = PyPDF2.PdfReader(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def _extract_text_chunk(start: int, end: int) -> List[str]:
+    """
+    Extract the text of pages [start, end) in a pool worker.
+    
+    Args:
+        start: Zero-based index of the first page
+        end: Zero-based index one past the last page
+        
+    Returns:
+        List with the text of each page in the chunk
+    """
+    return [_extract_page_text(_worker_reader.pages[index]) for index in range(start, end)]
+
+
+def _extract_page_text(page) -> str:
+    """Extract text from a single page, returning an empty string on failure."""
+    try:
+        return page.extract_text() or ""
+    except Exception:
+        # Skip pages that cause extraction errors
+        return ""
+
+
+def parse_page_range(value: str) -> Tuple[int, int]:
+    """
+    Parse a page range string such as "5-7" or "12".
+    
+    Args:
+        value: One-based page number or inclusive range
+        
+    Returns:
+        Tuple of (first_page, last_page), both one-based and inclusive
+        
+    Raises:
+        ValueError: If the range is malformed
+    """
+    parts = value.replace(" ", "").split("-")
+    try:
+        if len(parts) == 1:
+            first = last = int(parts[0])
+        elif len(parts) == 2:
+            first, last = int(parts[0]), int(parts[1])
+        else:
+            raise ValueError
+    except ValueError:
+        raise ValueError(f"Invalid page range '{value}'. Use a page number or a range like '5-7'")
+    
+    if first < 1 or last < first:
+        raise ValueError(f"Invalid page range '{value}'. Pages start at 1 and the range must be ascending")
+    return first, last
+
+
+@parser_registry.register
 class PDFParser(BaseParser):
     """Parser to extract rule information from PDF documents."""
     
-    def __init__(self, file_path: Optional[str] = None, file_content: Optional[bytes] = None):
+    PARSER_VERSION = "2"
+    DOCUMENT_TYPE = "PDF"
+    EXTENSIONS = {".pdf": b"%PDF-"}
+    
+    @classmethod
+    def sniff(cls, head: bytes, extension: Optional[str] = None) -> bool:
+        """Check for a PDF header; PDF readers accept one anywhere in the first kilobyte."""
+        return b"%PDF-" in head[:1024]
+    
+    def __init__(
+        self,
+        file_path: Optional[str] = None,
+        file_content: Optional[ContentBuffer] = None,
+        page_range: Optional[Tuple[int, int]] = None,
+        max_workers: Optional[int] = None,
+        max_image_bytes: Optional[int] = None,
+        min_image_dimension: Optional[int] = None
+    ):
+        """
+        Initialize the PDF parser.
+        
+        Args:
+            file_path: Path to the PDF file
+            file_content: PDF content as bytes, a memoryview or an mmap
+            page_range: Optional one-based inclusive (first, last) pages to restrict extraction to
+            max_workers: Worker processes for text extraction (defaults to PDF_TEXT_WORKERS,
+                else the CPUs the job manager gave this job, else one per CPU)
+            max_image_bytes: Per-document image byte budget (defaults to PDF_IMAGE_BYTE_BUDGET_MB)
+            min_image_dimension: Skip images whose width or height is below this many pixels
+        """
         super().__init__(file_path, file_content)
         # Open PDF from file path or content
-        if file_path:
-            self.pdf = PyPDF2.PdfReader(file_path)
-        else:
-            self.pdf = PyPDF2.PdfReader(io.BytesIO(file_content))
+        self.pdf = PyPDF2.PdfReader(self._open_stream())
+        
+        self.page_range = page_range
+        self.max_workers = max_workers if max_workers is not None else (
+            PDF_TEXT_WORKERS or int(os.getenv("DOCUMENT_JOB_CPUS", "0")) or os.cpu_count() or 1
+        )
+        self.max_image_bytes = max_image_bytes if max_image_bytes is not None else PDF_IMAGE_BYTE_BUDGET_MB * 1024 * 1024
+        self.min_image_dimension = min_image_dimension if min_image_dimension is not None else PDF_IMAGE_MIN_DIMENSION
+        self.images_truncated = False
+        
+        # Per-page text, filled on first extraction and kept for provenance
+        self.page_texts: Optional[List[str]] = None
+        self._page_offsets: List[int] = []
+        self._full_text: Optional[str] = None
+    
+    @property
+    def page_indices(self) -> range:
+        """Zero-based indices of the pages selected by page_range."""
+        page_count = len(self.pdf.pages)
+        if not self.page_range:
+            return range(page_count)
+        
+        first, last = self.page_range
+        if first < 1 or last < first or first > page_count:
+            raise ValueError(f"Page range {first}-{last} is outside the document (1-{page_count})")
+        return range(first - 1, min(last, page_count))
         
     def extract_rules(self) -> List[Dict[str, Any]]:
         """
         Extract rules from PDF content.
-        Uses pattern matching to identify rule-like content.
+        Uses the shared rule scanner to identify rule-like content.
         
         Returns:
-            List of dictionaries with rule data
+            List of dictionaries with rule data, the scanner's confidence and
+            the page each rule starts on
         """
         rules = []
         full_text = self._extract_full_text()
         
-        # Look for rule patterns
-        # Pattern 1: "Rule X: [Title]" followed by content
-        rule_pattern1 = re.compile(r'Rule\s+(\d+):?\s+(.*?)(?:\n|$)(.*?)(?=Rule\s+\d+:|$)', re.DOTALL)
-        for match in rule_pattern1.finditer(full_text):
-            rule_number, title, content = match.groups()
-            content = content.strip()
-            if title and content:
-                rule = {
-                    "title": f"Rule {rule_number}: {title.strip()}",
-                    "content": content,
-                    "rule_type": self._detect_rule_type(title, content)
-                }
-                rules.append(rule)
-        
-        # Pattern 2: "X.Y [Title]" followed by content (common in technical docs)
-        rule_pattern2 = re.compile(r'(\d+\.\d+)\s+(.*?)(?:\n|$)(.*?)(?=\d+\.\d+\s+|$)', re.DOTALL)
-        if not rules:  # Only try alternative pattern if first didn't find any
-            for match in rule_pattern2.finditer(full_text):
-                rule_number, title, content = match.groups()
-                content = content.strip()
-                if title and content:
-                    rule = {
-                        "title": f"{rule_number} {title.strip()}",
-                        "content": content,
-                        "rule_type": self._detect_rule_type(title, content)
-                    }
-                    rules.append(rule)
-        
-        # Fall back to section headers if no rules found with previous patterns
-        if not rules:
-            # Look for sections that might be rules
-            section_pattern = re.compile(r'(\d+\s+.*?)(?:\n|$)(.*?)(?=\d+\s+|$)', re.DOTALL)
-            for match in section_pattern.finditer(full_text):
-                title, content = match.groups()
-                content = content.strip()
-                if len(title) < 100 and content and len(content) > 20:  # Filter out non-rule sections
-                    rule = {
-                        "title": title.strip(),
-                        "content": content,
-                        "rule_type": self._detect_rule_type(title, content)
-                    }
-                    rules.append(rule)
+        # One pass over the text: "Rule X: [Title]", then "X.Y [Title]", then numbered sections
+        for span in rule_scanner.scan(full_text):
+            rule = {
+                "title": span["title"],
+                "content": span["content"],
+                "rule_type": self._detect_rule_type(span["title"], span["content"]),
+                "confidence": span["confidence"],
+                "page": self.page_for_offset(span["start"])
+            }
+            rules.append(rule)
         
         return rules
     
     def _extract_full_text(self) -> str:
         """
-        Extract all text from the PDF.
+        Extract all text from the selected pages of the PDF.
         
         Returns:
             The full text content
         """
-        text = ""
-        for page in self.pdf.pages:
+        if self._full_text is None:
+            page_texts = self._get_page_texts()
+            
+            # Record where each page starts so offsets can be mapped back to pages
+            self._page_offsets = []
+            offset = 0
+            for text in page_texts:
+                self._page_offsets.append(offset)
+                offset += len(text) + 2
+            
+            self._full_text = "".join(text + "\n\n" for text in page_texts)
+        return self._full_text
+    
+    def _get_page_texts(self) -> List[str]:
+        """
+        Extract text page by page, fanning out to a process pool for large documents.
+        
+        Returns:
+            List with the text of each selected page
+        """
+        if self.page_texts is not None:
+            return self.page_texts
+        
+        indices = self.page_indices
+        if self.max_workers > 1 and len(indices) >= PDF_PARALLEL_MIN_PAGES:
             try:
-                text += page.extract_text() + "\n\n"
-            except:
-                # Skip pages that cause extraction errors
-                pass
-        return text
+                self.page_texts = self._extract_page_texts_parallel(indices)
+                return self.page_texts
+            except Exception as e:
+                logger.warning(f"Parallel PDF text extraction failed, falling back to serial: {str(e)}")
+        
+        self.page_texts = []
+        for index in indices:
+            self.page_texts.append(_extract_page_text(self.pdf.pages[index]))
+            self._report_progress("pages", len(self.page_texts), len(indices))
+        return self.page_texts
+    
+    def _extract_page_texts_parallel(self, indices: range) -> List[str]:
+        """
+        Extract page text in chunks on a process pool.
+        
+        Args:
+            indices: Zero-based page indices to extract
+            
+        Returns:
+            List with the text of each page, in page order
+        """
+        chunks = [
+            (start, min(start + PDF_PAGE_CHUNK_SIZE, indices.stop))
+            for start in range(indices.start, indices.stop, PDF_PAGE_CHUNK_SIZE)
+        ]
+        # Pool workers need a picklable source; views and mmaps are copied once here
+        source = self.file_path if self.file_path else bytes(self.file_content)
+        workers = min(self.max_workers, len(chunks))
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_text_worker,
+            initargs=(source,)
+        ) as executor:
+            texts = []
+            for chunk_texts in executor.map(_extract_text_chunk, *zip(*chunks)):
+                texts.extend(chunk_texts)
+                self._report_progress("pages", len(texts), len(indices))
+            return texts
+    
+    def extract_page_texts(self) -> List[Dict[str, Any]]:
+        """
+        Extract the text of each selected page.
+        
+        Returns:
+            List of dictionaries with the one-based page number and its text
+        """
+        return [
+            {"page": index + 1, "text": text}
+            for index, text in zip(self.page_indices, self._get_page_texts())
+        ]
+    
+    def page_for_offset(self, offset: int) -> Optional[int]:
+        """
+        Map a character offset in the full text back to its page.
+        
+        Args:
+            offset: Character offset into the text returned by _extract_full_text
+            
+        Returns:
+            One-based page number, or None if the text has not been extracted
+        """
+        self._extract_full_text()
+        if not self._page_offsets:
+            return None
+        position = bisect.bisect_right(self._page_offsets, offset) - 1
+        return self.page_indices[max(position, 0)] + 1
     
     def _detect_rule_type(self, title: str, content: str) -> str:
         """
@@ -143,35 +326,106 @@ class PDFParser(BaseParser):
         
         # Add page count
         metadata["pages"] = len(self.pdf.pages)
+        if self.page_range:
+            metadata["page_range"] = f"{self.page_indices.start + 1}-{self.page_indices.stop}"
+        if self.images_truncated:
+            metadata["images_truncated"] = True
         
         return metadata
     
     def extract_images(self) -> List[Dict[str, Any]]:
         """
         Extract images from the PDF document.
-        This is a simplified implementation and might not work for all PDFs.
+        
+        Only image XObjects are extracted; inline images are not.
         
         Returns:
             List of dictionaries with image data
         """
-        images = []
+        return list(self.iter_images())
+    
+    def iter_images(self) -> Iterator[Dict[str, Any]]:
+        """
+        Lazily extract images from the selected pages, one page at a time.
+        
+        Images are decoded through PyPDF2's page.images, so only one page's
+        images are held at once. Image size is read from the XObject
+        dictionary first, so pages without an image of at least
+        min_image_dimension are not decoded at all. Extraction stops once
+        max_image_bytes of image data has been yielded.
+        
+        Yields:
+            Dictionaries with image data
+        """
+        total_bytes = 0
+        self.images_truncated = False
         
-        # Extracting images from PDFs is complex and unreliable
-        # This is a simplified approach that works for some PDFs
-        for page_num, page in enumerate(self.pdf.pages):
+        for page_index in self.page_indices:
+            page = self.pdf.pages[page_index]
+            sizes = self._image_sizes(page)
+            if not any(self._keep_image(width, height) for width, height in sizes.values()):
+                continue
+            try:
+                page_images = page.images
+            except Exception as e:
+                # Skip pages whose images can't be decoded
+                logger.warning(f"Could not extract images from page {page_index + 1}: {str(e)}")
+                continue
+            
             count = 0
-            for img in page.images:
-                try:
-                    image_data = {
-                        "page": page_num + 1,
-                        "filename": f"image_page{page_num+1}_{count}.{img.ext}",
-                        "image_data": img.data,
-                        "mime_type": f"image/{img.ext}"
-                    }
-                    images.append(image_data)
-                    count += 1
-                except (KeyError, AttributeError):
-                    # Skip images that can't be processed
-                    pass
+            for image in page_images:
+                # page.images names each image after its XObject, plus the extension
+                name, _, ext = image.name.rpartition(".")
+                width, height = sizes.get(name, (0, 0))
+                if not self._keep_image(width, height):
+                    continue
+                data = image.data
+                
+                if self.max_image_bytes and total_bytes + len(data) > self.max_image_bytes:
+                    self.images_truncated = True
+                    logger.warning(
+                        f"PDF image byte budget of {self.max_image_bytes} bytes reached on page "
+                        f"{page_index + 1}; skipping remaining images"
+                    )
+                    return
+                total_bytes += len(data)
+                
+                yield {
+                    "page": page_index + 1,
+                    "filename": f"image_page{page_index + 1}_{count}.{ext}",
+                    "image_data": data,
+                    "mime_type": f"image/{'jpeg' if ext == 'jpg' else ext}",
+                    "width": width,
+                    "height": height
+                }
+                count += 1
+    
+    @staticmethod
+    def _image_sizes(page) -> Dict[str, Tuple[int, int]]:
+        """
+        Read the size of a page's image XObjects without decoding them.
+        
+        Args:
+            page: PyPDF2 page
+            
+        Returns:
+            Width and height by XObject name, without the leading slash
+        """
+        try:
+            x_objects = page["/Resources"]["/XObject"].get_object()
+        except (KeyError, TypeError, AttributeError):
+            return {}
         
-        return images
+        sizes = {}
+        for name in x_objects:
+            try:
+                x_object = x_objects[name].get_object()
+                if x_object.get("/Subtype") == "/Image":
+                    sizes[name[1:]] = (int(x_object.get("/Width", 0)), int(x_object.get("/Height", 0)))
+            except Exception:
+                continue
+        return sizes
+    
+    def _keep_image(self, width: int, height: int) -> bool:
+        """Check an image against min_image_dimension."""
+        return not self.min_image_dimension or min(width, height) >= self.min_image_dimension
@@ -0,0 +1,135 @@
+# app/parsers/registry.py
+"""
+Registry of document parsers.
+
+Built-in parsers register themselves with the @parser_registry.register
+decorator. Parsers shipped in other packages are picked up from the
+"esd_guidelines.parsers" entry point group, e.g. in a plugin's pyproject.toml:
+
+    [project.entry-points."esd_guidelines.parsers"]
+    visio = "esd_visio.parser:VisioParser"
+
+Each parser class declares the DocumentType value it handles, the file
+extensions it accepts with their magic bytes, and capability flags (see
+BaseParser). A parser registered later for the same document type or
+extension replaces the earlier one, so plugins can override built-ins.
+"""
+import os
+import logging
+import threading
+from importlib.metadata import entry_points
+from typing import Dict, List, Optional, Type
+
+from .base_parser import BaseParser
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+ENTRY_POINT_GROUP = "esd_guidelines.parsers"
+
+
+class ParserRegistry:
+    """Look up parsers by document type, by extension or by sniffing file content."""
+
+    def __init__(self):
+        self._by_type: Dict[str, Type[BaseParser]] = {}
+        self._by_extension: Dict[str, Type[BaseParser]] = {}
+        self._entry_points_loaded = False
+        self._lock = threading.Lock()
+
+    def register(self, parser_class: Type[BaseParser]) -> Type[BaseParser]:
+        """
+        Register a parser class; usable as a class decorator.
+
+        Args:
+            parser_class: BaseParser subclass with DOCUMENT_TYPE and EXTENSIONS set
+
+        Returns:
+            The parser class, unchanged
+        """
+        if not parser_class.DOCUMENT_TYPE:
+            raise ValueError(f"{parser_class.__name__} does not declare a DOCUMENT_TYPE")
+
+        replaced = self._by_type.get(parser_class.DOCUMENT_TYPE)
+        if replaced is not None and replaced is not parser_class:
+            logger.info(f"{parser_class.__name__} replaces {replaced.__name__} for {parser_class.DOCUMENT_TYPE} documents")
+        self._by_type[parser_class.DOCUMENT_TYPE] = parser_class
+        for extension in parser_class.EXTENSIONS:
+            self._by_extension[extension.lower()] = parser_class
+        return parser_class
+
+    def load_entry_points(self) -> None:
+        """Register parsers advertised by installed packages; runs once."""
+        with self._lock:
+            if self._entry_points_loaded:
+                return
+            self._entry_points_loaded = True
+
+            for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+                try:
+                    parser_class = entry_point.load()
+                    if not (isinstance(parser_class, type) and issubclass(parser_class, BaseParser)):
+                        raise TypeError(f"{entry_point.value} is not a BaseParser subclass")
+                    self.register(parser_class)
+                    logger.info(f"Loaded parser plugin {entry_point.name} ({parser_class.__name__})")
+                except Exception as e:
+                    # A broken plugin must not take the built-in parsers down with it
+                    logger.error(f"Error loading parser plugin {entry_point.name}: {str(e)}")
+
+    def for_document_type(self, document_type: str) -> Optional[Type[BaseParser]]:
+        """
+        Get the parser for a document type.
+
+        Args:
+            document_type: DocumentType value, e.g. "PDF"
+
+        Returns:
+            Parser class, or None if no parser handles the type
+        """
+        self.load_entry_points()
+        return self._by_type.get(document_type)
+
+    def for_extension(self, extension: str) -> Optional[Type[BaseParser]]:
+        """
+        Get the parser for a file extension.
+
+        Args:
+            extension: Extension including the dot, e.g. ".pdf"
+
+        Returns:
+            Parser class, or None if the extension is not supported
+        """
+        self.load_entry_points()
+        return self._by_extension.get(extension.lower())
+
+    def extensions(self) -> List[str]:
+        """Get every supported file extension."""
+        self.load_entry_points()
+        return sorted(self._by_extension)
+
+    def detect(self, filename: str, head: bytes) -> Optional[Type[BaseParser]]:
+        """
+        Find the parser for an uploaded file from its name and first bytes.
+
+        A known extension selects the parser, whose magic bytes must then
+        match. Files with an unknown extension are identified by their magic
+        bytes alone, provided exactly one parser claims them.
+
+        Args:
+            filename: Original filename
+            head: First bytes of the file
+
+        Returns:
+            Parser class, or None if the content does not match any parser
+        """
+        extension = os.path.splitext(filename)[1].lower()
+        parser_class = self.for_extension(extension)
+        if parser_class is not None:
+            return parser_class if parser_class.sniff(head, extension) else None
+
+        matches = {parser_class for parser_class in self._by_type.values() if parser_class.sniff(head)}
+        return matches.pop() if len(matches) == 1 else None
+
+
+# Shared parser registry
+parser_registry = ParserRegistry()
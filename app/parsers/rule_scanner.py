@@ -0,0 +1,137 @@
+# app/parsers/rule_scanner.py
+"""
+Single-pass rule boundary scanner shared by the PDF and Word parsers.
+
+The text is tokenized line by line with one precompiled pattern that
+recognises the three heading styles used in design manuals:
+
+    Rule 12: Title      -> "rule"
+    3.4 Title           -> "decimal"
+    7 Title             -> "section"
+
+Content spans are then assigned between consecutive headings of the
+selected kind, so the whole scan is linear in the length of the text.
+"""
+import re
+from typing import Dict, Any, List, Sequence
+
+# One anchored match per line; alternation order gives "Rule N" priority over "X.Y" over "N"
+HEADING_PATTERN = re.compile(
+    r'[ \t]*(?:Rule[ \t]+(?P<rule>\d+):?|(?P<decimal>\d+\.\d+)|(?P<section>\d+))[ \t]+(?P<title>\S.*)'
+)
+
+# Used by the Word parser to spot numbered titles on a single paragraph
+RULE_TITLE_PATTERN = re.compile(r'(?:Rule\s+\d+|\d+\.\d+|\d+\.)\s+')
+
+# Kinds in fallback order: later kinds are only used when earlier ones find nothing
+DEFAULT_KINDS = ("rule", "decimal", "section")
+
+# Confidence that a heading of each kind really starts a rule
+KIND_CONFIDENCE = {"rule": 0.9, "decimal": 0.75, "section": 0.5}
+
+# Section headings are noisy, so require a short title and some body text
+SECTION_MAX_TITLE_LENGTH = 100
+SECTION_MIN_CONTENT_LENGTH = 20
+
+
+class RuleScanner:
+    """Tokenize rule headings in one pass and assign content spans to them."""
+
+    def scan(self, text: str, kinds: Sequence[str] = DEFAULT_KINDS) -> List[Dict[str, Any]]:
+        """
+        Find rules in text.
+
+        Args:
+            text: Full document text
+            kinds: Heading kinds to try, in fallback order
+
+        Returns:
+            List of dictionaries with kind, number, title, content, confidence
+            and the start/end character offsets of each rule
+        """
+        headings = self.tokenize(text)
+
+        for kind in kinds:
+            rules = self._assign_spans(text, headings.get(kind, []), kind)
+            if rules:
+                return rules
+        return []
+
+    def tokenize(self, text: str) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Find every heading line in text.
+
+        Args:
+            text: Full document text
+
+        Returns:
+            Dictionary mapping heading kind to its headings in document order
+        """
+        headings: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in DEFAULT_KINDS}
+        offset = 0
+
+        for line in text.splitlines(keepends=True):
+            match = HEADING_PATTERN.match(line)
+            if match:
+                kind = self._kind_of(match)
+                headings[kind].append({
+                    "number": match.group(kind),
+                    "heading": match.group("title").rstrip(),
+                    "start": offset,
+                    "body_start": offset + len(line)
+                })
+            offset += len(line)
+
+        return headings
+
+    def _kind_of(self, match) -> str:
+        """Return which number group matched."""
+        for kind in DEFAULT_KINDS:
+            if match.group(kind) is not None:
+                return kind
+        return "section"
+
+    def _assign_spans(self, text: str, headings: List[Dict[str, Any]], kind: str) -> List[Dict[str, Any]]:
+        """
+        Turn headings of one kind into rules, each running to the next heading.
+
+        Args:
+            text: Full document text
+            headings: Headings of a single kind in document order
+            kind: Heading kind
+
+        Returns:
+            List of rule dictionaries that pass the kind's filters
+        """
+        rules = []
+        for i, heading in enumerate(headings):
+            end = headings[i + 1]["start"] if i + 1 < len(headings) else len(text)
+            content = text[heading["body_start"]:end].strip()
+
+            if kind == "rule":
+                title = f"Rule {heading['number']}: {heading['heading']}"
+            else:
+                title = f"{heading['number']} {heading['heading']}"
+
+            if not content:
+                continue
+            if kind == "section" and (
+                len(title) >= SECTION_MAX_TITLE_LENGTH or len(content) <= SECTION_MIN_CONTENT_LENGTH
+            ):
+                continue
+
+            rules.append({
+                "kind": kind,
+                "number": heading["number"],
+                "title": title,
+                "content": content,
+                "confidence": KIND_CONFIDENCE[kind],
+                "start": heading["start"],
+                "end": end
+            })
+
+        return rules
+
+
+# Shared scanner instance used by the parsers
+rule_scanner = RuleScanner()
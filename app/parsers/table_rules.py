@@ -0,0 +1,98 @@
+# app/parsers/table_rules.py
+"""
+Rule table heuristics shared by the Excel and Word parsers.
+
+A table's header names are mapped to rule properties by matching them
+against common column names; each row below the header then becomes one
+rule through that mapping.
+"""
+from typing import Dict, Any, Mapping, Optional, Sequence
+
+# Confidence of rules read from a table whose title and content columns were recognised
+TABLE_ROW_CONFIDENCE = 0.9
+
+# Column names that identify each rule property, matched exactly or as a substring
+COLUMN_PATTERNS = {
+    "title": ["title", "name", "rule name", "rule", "rule title", "rule id", "id"],
+    "content": ["content", "description", "rule", "text", "rule content", "rule text", "requirement"],
+    "rule_type": ["type", "rule type", "category", "classification"],
+    "severity": ["severity", "priority", "importance", "criticality"],
+    "category": ["category", "group", "area", "domain"],
+}
+
+
+def detect_column_mapping(columns: Sequence[str]) -> Dict[str, str]:
+    """
+    Try to map table columns to rule properties.
+
+    Exact name matches are preferred over substring matches, and a column
+    already mapped to another property is only reused when nothing else fits,
+    so "Rule ID" and "Description" become title and content rather than both
+    mapping to "Rule ID". Remaining ties go to the column matching the
+    earlier pattern, so "Title" beats "Rule ID" in the rule exports.
+
+    Args:
+        columns: Lower-case column names in table order
+
+    Returns:
+        Dictionary mapping rule properties to column names
+    """
+    mapping = {}
+    used = set()
+
+    for prop, patterns in COLUMN_PATTERNS.items():
+        candidates = [col for col in columns if any(pattern == col or pattern in col for pattern in patterns)]
+        if not candidates:
+            continue
+        # sorted() is stable, so ties keep table order
+        best = sorted(candidates, key=lambda col: (col not in patterns, col in used, _pattern_rank(col, patterns)))[0]
+        mapping[prop] = best
+        used.add(best)
+
+    return mapping
+
+
+def _pattern_rank(column: str, patterns: Sequence[str]) -> int:
+    """Position of the first pattern matching a column, exact matches first."""
+    if column in patterns:
+        return patterns.index(column)
+    return next(index for index, pattern in enumerate(patterns) if pattern in column)
+
+
+def rule_from_row(row: Mapping[str, Any], column_mapping: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Extract a rule from a table row using the column mapping.
+
+    Args:
+        row: Row values by column name, e.g. a pandas Series or a dict
+        column_mapping: Dictionary mapping rule properties to column names
+
+    Returns:
+        Dictionary with rule data or None if required fields missing
+    """
+    rule = {}
+
+    # Get required fields
+    for prop in ["title", "content"]:
+        if prop in column_mapping:
+            rule[prop] = str(row[column_mapping[prop]])
+        else:
+            # If we can't find required fields, can't create a valid rule
+            return None
+
+    # Get optional fields
+    for prop in ["rule_type", "severity", "category"]:
+        if prop in column_mapping:
+            rule[prop] = str(row[column_mapping[prop]])
+
+    # Map rule_type to enum values if applicable
+    if "rule_type" in rule:
+        rule_type = rule["rule_type"].lower()
+        if "esd" in rule_type:
+            rule["rule_type"] = "esd"
+        elif "latchup" in rule_type:
+            rule["rule_type"] = "latchup"
+        else:
+            rule["rule_type"] = "general"
+
+    return rule
@@ -1,38 +1,141 @@
 # app/parsers/word_parser.py
-import io
-from typing import Dict, Any, List, Optional
+import bisect
+import logging
+import zipfile
+from functools import cached_property
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Union
 from docx import Document
-import re
+from lxml import etree
 from PIL import Image
-from .base_parser import BaseParser
+from .base_parser import BaseParser, ContentBuffer
+from .registry import parser_registry
+from .docx_reader import DocxStreamReader, DocxParagraph, DocxTableRow, UnsupportedDocxError
+from .rule_scanner import rule_scanner, RULE_TITLE_PATTERN
+from .table_rules import detect_column_mapping, rule_from_row, TABLE_ROW_CONFIDENCE
 
+# Configure logging
+logger = logging.getLogger(__name__)
 
+# Confidence of style-based rules by what marked the paragraph as a title
+NUMBERED_TITLE_CONFIDENCE = 0.85
+HEADING_TITLE_CONFIDENCE = 0.7
+BOLD_TITLE_CONFIDENCE = 0.6
+
+# Longest title taken from the text of a table row that has no title
+TABLE_TITLE_LENGTH = 100
+
+# Errors on which the streaming reader gives way to python-docx
+STREAMING_ERRORS = (UnsupportedDocxError, zipfile.BadZipFile, KeyError, etree.XMLSyntaxError)
+
+
+@parser_registry.register
 class WordParser(BaseParser):
     """Parser to extract rule information from Word documents."""
     
-    def __init__(self, file_path: Optional[str] = None, file_content: Optional[bytes] = None):
+    PARSER_VERSION = "4"
+    DOCUMENT_TYPE = "WORD"
+    EXTENSIONS = {
+        ".docx": b"PK\x03\x04",
+        ".doc": b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+    }
+    
+    def __init__(self, file_path: Optional[str] = None, file_content: Optional[ContentBuffer] = None):
         super().__init__(file_path, file_content)
-        # Load document from file_path or file_content
-        if file_path:
-            self.doc = Document(file_path)
-        else:
-            self.doc = Document(io.BytesIO(file_content))
+        # Body paragraph and section counts, known once the body has been streamed
+        self._body_counts: Optional[Dict[str, int]] = None
+    
+    @cached_property
+    def doc(self) -> Document:
+        """python-docx model of the document, built only when the streaming reader cannot be used."""
+        return Document(self._open_stream())
             
     def extract_rules(self) -> List[Dict[str, Any]]:
         """
         Extract rules from the Word document.
-        Uses paragraph styles and formatting to identify rule-like content.
+        Uses paragraph styles and formatting to identify rule-like content,
+        and reads rule tables whose header names the title and content columns.
+        
+        Paragraphs and table rows are streamed from the document XML;
+        python-docx is only used for packages the streaming reader does not handle.
         
         Returns:
-            List of dictionaries with rule data
+            List of dictionaries with rule data and a confidence; paragraph
+            rules record the paragraph they start at, table rules their table
+            and row
+        """
+        try:
+            with DocxStreamReader(self._open_stream()) as reader:
+                rules = self._extract_rules_from(reader.iter_body())
+                self._save_body_counts(reader)
+                return rules
+        except STREAMING_ERRORS as e:
+            logger.info(f"Streaming read of Word document failed, using python-docx: {str(e)}")
+            return self._extract_rules_from(self._docx_body())
+    
+    def _save_body_counts(self, reader: DocxStreamReader) -> None:
+        """Keep the counts of a fully read body for the metadata."""
+        self._body_counts = {"paragraphs": reader.paragraph_count, "sections": reader.section_count}
+    
+    def _docx_body(self) -> Iterator[Union[DocxParagraph, DocxTableRow]]:
+        """
+        Read body paragraphs and table rows through the python-docx object model.
+        
+        Yields:
+            The same records the streaming reader produces, paragraphs first
+        """
+        for i, para in enumerate(self.doc.paragraphs):
+            yield DocxParagraph(
+                index=i,
+                text=para.text,
+                style=para.style.name if para.style is not None else None,
+                bold=any(run.bold for run in para.runs if run.bold is not None)
+            )
+        for table_index, table in enumerate(self.doc.tables):
+            for row_index, row in enumerate(table.rows):
+                yield DocxTableRow(
+                    table=table_index + 1,
+                    row=row_index + 1,
+                    cells=[cell.text for cell in row.cells]
+                )
+    
+    def _extract_rules_from(self, items: Iterable[Union[DocxParagraph, DocxTableRow]]) -> List[Dict[str, Any]]:
+        """
+        Classify paragraphs and table rows into rules in a single pass.
+        
+        Args:
+            items: Body paragraphs and table rows
+            
+        Returns:
+            List of rule dictionaries, paragraph rules first
         """
         rules = []
-        paragraphs = self.doc.paragraphs
+        table_rules = []
+        paragraph_texts = []
+        
+        # Column mapping of the current table, from its header row
+        table_columns: List[str] = []
+        column_mapping: Dict[str, str] = {}
         
         # Try to identify rule structures based on headings and paragraph styles
         current_rule = None
         
-        for i, para in enumerate(paragraphs):
+        for item in items:
+            if isinstance(item, DocxTableRow):
+                if item.row == 1:
+                    table_columns = [cell.strip().lower() for cell in item.cells]
+                    column_mapping = detect_column_mapping(table_columns)
+                else:
+                    rule = self._rule_from_table_row(item, table_columns, column_mapping)
+                    if rule:
+                        table_rules.append(rule)
+                continue
+            
+            para = item
+            i = para.index
+            paragraph_texts.append(para.text)
+            if i % 1000 == 0:
+                self._report_progress("paragraphs", i, rules_found=len(rules) + len(table_rules))
+            
             text = para.text.strip()
             
             # Skip empty paragraphs
@@ -49,7 +152,9 @@ class WordParser(BaseParser):
                 current_rule = {
                     "title": text,
                     "content": "",
-                    "rule_type": self._detect_rule_type(text)
+                    "rule_type": self._detect_rule_type(text),
+                    "confidence": self._title_confidence(para),
+                    "paragraph": i + 1
                 }
             
             # If we have a current rule and this isn't a heading, add to content
@@ -65,46 +170,98 @@ class WordParser(BaseParser):
             
         # If we didn't find any rules with the style-based approach, try based on text patterns
         if not rules:
-            rules = self._extract_rules_by_patterns(paragraphs)
+            rules = self._extract_rules_by_patterns(paragraph_texts)
             
-        return rules
+        return rules + table_rules
     
-    def _is_rule_title(self, paragraph) -> bool:
+    def _rule_from_table_row(
+        self,
+        row: DocxTableRow,
+        columns: List[str],
+        column_mapping: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Turn a table row into a rule using the column mapping of its table's header.
+        
+        Args:
+            row: Table row below the header
+            columns: Lower-case header names of the table
+            column_mapping: Mapping of rule properties to header names
+            
+        Returns:
+            Rule dictionary, or None if the table is not a rule table or the row is empty
+        """
+        values = dict(zip(columns, (cell.strip() for cell in row.cells)))
+        if any(column not in values for column in column_mapping.values()):
+            # Row is shorter than the header
+            return None
+        
+        rule = rule_from_row(values, column_mapping)
+        if not rule or not rule["content"]:
+            return None
+        if not rule["title"]:
+            # Rows without an ID are titled by the start of their text
+            rule["title"] = rule["content"].splitlines()[0][:TABLE_TITLE_LENGTH]
+        
+        if "rule_type" not in rule:
+            rule["rule_type"] = self._detect_rule_type(rule["title"] + " " + rule["content"])
+        rule["confidence"] = TABLE_ROW_CONFIDENCE
+        rule["table"] = row.table
+        rule["row"] = row.row
+        return rule
+    
+    def _is_rule_title(self, paragraph: DocxParagraph) -> bool:
         """
         Check if paragraph looks like a rule title.
         
         Args:
-            paragraph: docx Paragraph object
+            paragraph: Paragraph record
             
         Returns:
             True if likely a rule title
         """
         # Check style
-        is_heading = paragraph.style.name.startswith('Heading')
+        is_heading = self._is_heading(paragraph)
         
         # Check formatting (bold text often indicates titles)
-        is_bold = any(run.bold for run in paragraph.runs if run.bold is not None)
+        is_bold = paragraph.bold
         
         # Check for rule number patterns
         text = paragraph.text.strip()
-        has_rule_pattern = bool(re.match(r'(Rule\s+\d+|^\d+\.\d+|^\d+\.)\s+', text))
+        has_rule_pattern = bool(RULE_TITLE_PATTERN.match(text))
         
         # Check if reasonably short (titles usually aren't long)
         is_short = len(text) < 150
         
         return is_short and (is_heading or is_bold or has_rule_pattern)
     
-    def _is_heading(self, paragraph) -> bool:
+    def _title_confidence(self, paragraph: DocxParagraph) -> float:
+        """
+        Rate how strongly a rule title paragraph marks the start of a rule.
+        
+        Args:
+            paragraph: Paragraph record accepted by _is_rule_title
+            
+        Returns:
+            Confidence between 0 and 1
+        """
+        if RULE_TITLE_PATTERN.match(paragraph.text.strip()):
+            return NUMBERED_TITLE_CONFIDENCE
+        if self._is_heading(paragraph):
+            return HEADING_TITLE_CONFIDENCE
+        return BOLD_TITLE_CONFIDENCE
+    
+    def _is_heading(self, paragraph: DocxParagraph) -> bool:
         """
         Check if paragraph is a heading.
         
         Args:
-            paragraph: docx Paragraph object
+            paragraph: Paragraph record
             
         Returns:
             True if it's a heading
         """
-        return paragraph.style.name.startswith('Heading')
+        return paragraph.style is not None and paragraph.style.startswith('Heading')
     
     def _detect_rule_type(self, text: str) -> str:
         """
@@ -124,47 +281,36 @@ class WordParser(BaseParser):
             return "latchup"
         return "general"
     
-    def _extract_rules_by_patterns(self, paragraphs) -> List[Dict[str, Any]]:
+    def _extract_rules_by_patterns(self, paragraph_texts: List[str]) -> List[Dict[str, Any]]:
         """
         Extract rules by looking for text patterns.
         
         Args:
-            paragraphs: List of document paragraphs
+            paragraph_texts: Text of each body paragraph
             
         Returns:
             List of rule dictionaries
         """
         rules = []
-        full_text = "\n".join(p.text for p in paragraphs)
-        
-        # Look for rule patterns
-        # Pattern: "Rule X: [Title]" followed by content
-        rule_pattern = re.compile(r'Rule\s+(\d+):?\s+(.*?)(?:\n|$)(.*?)(?=Rule\s+\d+:|$)', re.DOTALL)
-        for match in rule_pattern.finditer(full_text):
-            rule_number, title, content = match.groups()
-            content = content.strip()
-            if title and content:
-                rule = {
-                    "title": f"Rule {rule_number}: {title.strip()}",
-                    "content": content,
-                    "rule_type": self._detect_rule_type(title + " " + content)
-                }
-                rules.append(rule)
+        full_text = "\n".join(paragraph_texts)
         
-        # Alternative pattern if no rules found
-        if not rules:
-            # Look for sections with numbering that might be rules
-            section_pattern = re.compile(r'(\d+\.\d+\s+.*?)(?:\n|$)(.*?)(?=\d+\.\d+\s+|$)', re.DOTALL)
-            for match in section_pattern.finditer(full_text):
-                title, content = match.groups()
-                content = content.strip()
-                if title and content:
-                    rule = {
-                        "title": title.strip(),
-                        "content": content,
-                        "rule_type": self._detect_rule_type(title + " " + content)
-                    }
-                    rules.append(rule)
+        # Start offset of each paragraph, to map rules back to paragraphs
+        paragraph_offsets = []
+        offset = 0
+        for text in paragraph_texts:
+            paragraph_offsets.append(offset)
+            offset += len(text) + 1
+        
+        # Look for "Rule X: [Title]" headings, then numbered "X.Y" sections
+        for span in rule_scanner.scan(full_text, kinds=("rule", "decimal")):
+            rule = {
+                "title": span["title"],
+                "content": span["content"],
+                "rule_type": self._detect_rule_type(span["title"] + " " + span["content"]),
+                "confidence": span["confidence"],
+                "paragraph": bisect.bisect_right(paragraph_offsets, span["start"])
+            }
+            rules.append(rule)
         
         return rules
     
@@ -172,11 +318,27 @@ class WordParser(BaseParser):
         """
         Extract metadata from the Word document.
         
+        Core properties are read from their own part; the paragraph and section
+        counts come from extract_rules, or from streaming the body if it has
+        not been read yet.
+        
         Returns:
             Dictionary with metadata
         """
+        try:
+            with DocxStreamReader(self._open_stream()) as reader:
+                props = reader.core_properties()
+                if self._body_counts is None:
+                    for _ in reader.iter_body():
+                        pass
+                    self._save_body_counts(reader)
+                counts = self._body_counts
+        except STREAMING_ERRORS as e:
+            logger.info(f"Streaming read of Word metadata failed, using python-docx: {str(e)}")
+            props = self.doc.core_properties
+            counts = {"paragraphs": len(self.doc.paragraphs), "sections": len(self.doc.sections)}
+        
         metadata = {}
-        props = self.doc.core_properties
         
         # Extract common properties
         if props.title:
@@ -193,8 +355,7 @@ class WordParser(BaseParser):
             metadata["comments"] = props.comments
             
         # Add document statistics
-        metadata["paragraphs"] = len(self.doc.paragraphs)
-        metadata["sections"] = len(self.doc.sections)
+        metadata.update(counts)
         
         return metadata
     
@@ -205,6 +366,19 @@ class WordParser(BaseParser):
         Returns:
             List of dictionaries with image data
         """
+        try:
+            with DocxStreamReader(self._open_stream()) as reader:
+                return [
+                    {
+                        "filename": f"image_{i}.{content_type.split('/')[-1]}",
+                        "image_data": blob,
+                        "mime_type": content_type
+                    }
+                    for i, (content_type, blob) in enumerate(reader.iter_images())
+                ]
+        except STREAMING_ERRORS as e:
+            logger.info(f"Streaming read of Word images failed, using python-docx: {str(e)}")
+        
         images = []
         
         # Word stores images as relationships in the document
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark the streaming Word parser against the python-docx object model
+walk the Word parser used before it.
+
+Usage:
+    python benchmark_docx_reader.py [--paragraphs N] [--body N] [--repeat N]
+"""
+
+import argparse
+import io
+import re
+import sys
+import time
+from pathlib import Path
+
+from docx import Document
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.parsers.word_parser import WordParser
+
+
+def legacy_extract(data):
+    """The paragraph walk WordParser.extract_rules did over python-docx objects previously."""
+    rules = []
+    current_rule = None
+    for para in Document(io.BytesIO(data)).paragraphs:
+        text = para.text.strip()
+        if not text:
+            continue
+        is_heading = para.style.name.startswith("Heading")
+        is_bold = any(run.bold for run in para.runs if run.bold is not None)
+        has_rule_pattern = bool(re.match(r"(Rule\s+\d+|^\d+\.\d+|^\d+\.)\s+", text))
+        if len(text) < 150 and (is_heading or is_bold or has_rule_pattern):
+            if current_rule and current_rule.get("content"):
+                rules.append(current_rule)
+            current_rule = {"title": text, "content": ""}
+        elif current_rule and not is_heading:
+            current_rule["content"] = current_rule["content"] + "\n\n" + text if current_rule["content"] else text
+    if current_rule and current_rule.get("content"):
+        rules.append(current_rule)
+    return rules
+
+
+def streaming_extract(data):
+    return WordParser(file_content=data).extract_rules()
+
+
+def build_document(paragraph_count, body_paragraphs):
+    """Build a synthetic specification: a heading per rule followed by body paragraphs."""
+    document = Document()
+    document.add_heading("Foundry ESD Design Manual", level=0)
+    written = 1
+    rule = 0
+    while written < paragraph_count:
+        rule += 1
+        document.add_heading(f"Rule {rule}: Clamp spacing requirement {rule}", level=2)
+        written += 1
+        for _ in range(min(body_paragraphs, paragraph_count - written)):
+            paragraph = document.add_paragraph("The clamp shall be placed within ")
+            paragraph.add_run("50 um").italic = True
+            paragraph.add_run(" of the pad ring, measured from the ESD device edge.")
+            written += 1
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def time_call(func, data, repeat):
+    """Return the best wall time of repeat calls and the last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(data)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Word rule extraction")
+    parser.add_argument("--paragraphs", type=int, default=25000, help="Paragraphs in the synthetic document")
+    parser.add_argument("--body", type=int, default=4, help="Body paragraphs per rule")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    args = parser.parse_args()
+    
+    print(f"{'paragraphs':>10} {'bytes':>10} {'legacy s':>10} {'stream s':>10} {'speedup':>8} {'rules':>12}")
+    print("-" * 66)
+    
+    for paragraph_count in sorted({args.paragraphs // 10, args.paragraphs}):
+        data = build_document(paragraph_count, args.body)
+        legacy_time, legacy_rules = time_call(legacy_extract, data, args.repeat)
+        streaming_time, streaming_rules = time_call(streaming_extract, data, args.repeat)
+        speedup = legacy_time / streaming_time if streaming_time else float("inf")
+        counts = f"{len(legacy_rules)}/{len(streaming_rules)}"
+        print(f"{paragraph_count:>10} {len(data):>10} {legacy_time:>10.3f} {streaming_time:>10.3f} {speedup:>7.1f}x {counts:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Load-test MCP processing against the stand-in MCP server.
+
+Starts mock_mcp_server.py in-process (or uses --server-url), uploads
+synthetic PDFs into a scratch database, sends each one through
+POST /documents/{id}/process-with-mcp and reports documents per minute,
+end-to-end latency percentiles, failures, and the MCP dispatcher's and
+stand-in server's counters.
+
+Usage:
+    python benchmark_mcp.py [--documents N] [--pages N] [--concurrency N]
+        [--mode sync|async|mixed] [--latency S] [--error-rate P] ...
+
+Every stand-in option of mock_mcp_server.py is accepted. The dispatcher
+limits in config/mcp_config.json apply, as in production.
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+import httpx
+import PyPDF2
+
+from mock_mcp_server import add_settings_arguments, settings_from_arguments, create_app
+
+
+def build_pdf(index, pages):
+    """Build a blank PDF whose content differs per index, so uploads are not deduplicated."""
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    writer.add_metadata({"/Title": f"Load test document {index}"})
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def start_stand_in(settings):
+    """Run the stand-in server on a free local port and return its URL."""
+    import uvicorn
+
+    config = uvicorn.Config(create_app(settings), host="127.0.0.1", port=0, log_level="warning")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of sorted values."""
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test MCP document processing")
+    parser.add_argument("--documents", type=int, default=50, help="Documents to process")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per document")
+    parser.add_argument("--concurrency", type=int, default=4, help="Jobs the job queue runs at once")
+    parser.add_argument("--timeout", type=float, default=600, help="Seconds to wait for all documents")
+    parser.add_argument("--server-url", help="Use a running MCP server instead of starting the stand-in")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    # The application reads these at import time, so they are set first
+    scratch = tempfile.mkdtemp(prefix="mcp_benchmark_")
+    server_url = args.server_url or start_stand_in(settings_from_arguments(args))
+    os.environ["DATABASE_URL"] = f"sqlite:///{scratch}/benchmark.db"
+    os.environ["BLOB_STORE_PATH"] = f"{scratch}/blobs"
+    os.environ["MCP_SERVER_URL"] = server_url
+    os.environ["JOB_QUEUE_CONCURRENCY"] = str(args.concurrency)
+    os.environ.setdefault("JOB_POLL_INTERVAL", "0.2")
+    os.environ.setdefault("JOB_RETRY_BASE_SECONDS", "1")
+
+    from fastapi.testclient import TestClient
+    from app.database.init_db import init_database
+    from app.main import app
+
+    init_database()
+    with TestClient(app) as client:
+        document_ids = []
+        for index in range(args.documents):
+            response = client.post(
+                "/documents/upload",
+                files={"file": (f"load_{index}.pdf", build_pdf(index, args.pages), "application/pdf")}
+            )
+            response.raise_for_status()
+            document_ids.append(response.json()["id"])
+
+        print(f"Processing {len(document_ids)} documents through {server_url} ...", file=sys.stderr)
+        started = {}
+        for document_id in document_ids:
+            client.post(f"/documents/{document_id}/process-with-mcp").raise_for_status()
+            started[document_id] = time.perf_counter()
+        first_started = min(started.values())
+
+        latencies, failures = [], {}
+        pending = set(document_ids)
+        deadline = first_started + args.timeout
+        while pending and time.perf_counter() < deadline:
+            time.sleep(0.2)
+            for document_id in list(pending):
+                document = client.get(f"/documents/{document_id}").json()
+                if document["processing_status"] == "processing":
+                    continue
+                pending.discard(document_id)
+                if document["processing_status"] == "success":
+                    latencies.append(time.perf_counter() - started[document_id])
+                else:
+                    failures[document_id] = document["processing_notes"]
+        elapsed = time.perf_counter() - first_started
+
+        mcp_status = client.get("/documents/mcp-status").json()
+    # Only the stand-in counts the failures it injected
+    server_stats = None if args.server_url else httpx.get(f"{server_url}/stats").json()
+
+    latencies.sort()
+    report = {
+        "documents": len(document_ids),
+        "succeeded": len(latencies),
+        "failed": len(failures),
+        "timed_out": len(pending),
+        "elapsed_seconds": round(elapsed, 2),
+        "documents_per_minute": round(len(latencies) / elapsed * 60, 1) if elapsed else 0.0,
+        "latency_seconds": {
+            name: round(percentile(latencies, fraction), 3)
+            for name, fraction in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99), ("max", 1.0))
+        } if latencies else {},
+        "dispatcher": mcp_status.get("dispatcher"),
+        "server": server_stats,
+        "failures": dict(list(failures.items())[:5])
+    }
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"{'documents':<22} {report['documents']}")
+    print(f"{'succeeded':<22} {report['succeeded']}")
+    print(f"{'failed / timed out':<22} {report['failed']} / {report['timed_out']}")
+    print(f"{'elapsed s':<22} {report['elapsed_seconds']}")
+    print(f"{'documents/minute':<22} {report['documents_per_minute']}")
+    for name, value in report["latency_seconds"].items():
+        print(f"{'latency ' + name + ' s':<22} {value}")
+    if report["dispatcher"]:
+        dispatcher = report["dispatcher"]
+        print(f"{'dispatcher':<22} circuit={dispatcher['circuit']} succeeded={dispatcher['succeeded']} "
+              f"failed={dispatcher['failed']} rejected={dispatcher['rejected']}")
+    if report["server"]:
+        print(f"{'server':<22} " + " ".join(f"{name}={value}" for name, value in report["server"].items()))
+    for document_id, notes in report["failures"].items():
+        print(f"  document {document_id}: {notes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark the shared rule scanner against the regexes the PDF and Word
+parsers used before it.
+
+Usage:
+    python benchmark_rule_scanner.py [--rules N] [--filler N] [--repeat N]
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.parsers.rule_scanner import RuleScanner
+
+
+def legacy_extract(full_text):
+    """The three-pass extraction PDFParser.extract_rules used previously."""
+    rules = []
+    rule_pattern1 = re.compile(r'Rule\s+(\d+):?\s+(.*?)(?:\n|$)(.*?)(?=Rule\s+\d+:|$)', re.DOTALL)
+    for match in rule_pattern1.finditer(full_text):
+        rule_number, title, content = match.groups()
+        content = content.strip()
+        if title and content:
+            rules.append({"title": f"Rule {rule_number}: {title.strip()}", "content": content})
+    
+    rule_pattern2 = re.compile(r'(\d+\.\d+)\s+(.*?)(?:\n|$)(.*?)(?=\d+\.\d+\s+|$)', re.DOTALL)
+    if not rules:
+        for match in rule_pattern2.finditer(full_text):
+            rule_number, title, content = match.groups()
+            content = content.strip()
+            if title and content:
+                rules.append({"title": f"{rule_number} {title.strip()}", "content": content})
+    
+    if not rules:
+        section_pattern = re.compile(r'(\d+\s+.*?)(?:\n|$)(.*?)(?=\d+\s+|$)', re.DOTALL)
+        for match in section_pattern.finditer(full_text):
+            title, content = match.groups()
+            content = content.strip()
+            if len(title) < 100 and content and len(content) > 20:
+                rules.append({"title": title.strip(), "content": content})
+    
+    return rules
+
+
+def build_document(style, rule_count, filler_lines):
+    """Build a synthetic manual with the given heading style."""
+    lines = ["Foundry ESD Design Manual", ""]
+    for i in range(1, rule_count + 1):
+        if style == "rule":
+            lines.append(f"Rule {i}: Clamp spacing requirement {i}")
+        elif style == "decimal":
+            lines.append(f"{i // 10 + 1}.{i % 10} Clamp spacing requirement {i}")
+        else:
+            lines.append(f"{i} Clamp spacing requirement {i}")
+        for _ in range(filler_lines):
+            lines.append("The clamp shall be placed within the specified distance of the pad ring.")
+    return "\n".join(lines) + "\n"
+
+
+def time_call(func, text, repeat):
+    """Return the best wall time of repeat calls and the last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(text)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rule extraction")
+    parser.add_argument("--rules", type=int, default=2000, help="Rules per synthetic document")
+    parser.add_argument("--filler", type=int, default=8, help="Body lines per rule")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions")
+    args = parser.parse_args()
+    
+    scanner = RuleScanner()
+    print(f"{'style':<10} {'chars':>10} {'legacy s':>10} {'scanner s':>10} {'speedup':>8} {'rules':>12}")
+    print("-" * 66)
+    
+    for style in ("rule", "decimal", "section"):
+        text = build_document(style, args.rules, args.filler)
+        legacy_time, legacy_rules = time_call(legacy_extract, text, args.repeat)
+        scanner_time, scanner_rules = time_call(scanner.scan, text, args.repeat)
+        speedup = legacy_time / scanner_time if scanner_time else float("inf")
+        counts = f"{len(legacy_rules)}/{len(scanner_rules)}"
+        print(f"{style:<10} {len(text):>10} {legacy_time:>10.3f} {scanner_time:>10.3f} {speedup:>7.1f}x {counts:>12}")
+
+
+if __name__ == "__main__":
+    main()
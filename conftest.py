@@ -0,0 +1,65 @@
+# conftest.py
+"""
+Shared pytest fixtures for the root-level tests.
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.database.database import Base, get_db
+from app.database.models import ImportedDocument, DocumentType
+
+
+@pytest.fixture
+def db():
+    """Session on a fresh in-memory database holding document 1, manual.pdf."""
+    # One shared connection, so sessions opened in other threads see the same database
+    engine = create_engine(
+        "sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(ImportedDocument(id=1, filename="manual.pdf", document_type=DocumentType.PDF))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def client(db, tmp_path, monkeypatch):
+    """Test client for the document endpoints, on the db fixture's database and a temporary blob store."""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.api import document_endpoints
+    from app.core import document_processing, job_queue
+    from app.core.blob_store import BlobStore
+
+    session_factory = sessionmaker(bind=db.get_bind())
+    store = BlobStore(str(tmp_path / "blobs"))
+    for module in (document_endpoints, document_processing, job_queue):
+        monkeypatch.setattr(module, "SessionLocal", session_factory)
+    for module in (document_endpoints, document_processing):
+        monkeypatch.setattr(module, "blob_store", store)
+
+    def get_test_db():
+        session = session_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(document_endpoints.router)
+    app.dependency_overrides[get_db] = get_test_db
+    with TestClient(app) as test_client:
+        test_client.blob_store = store
+        yield test_client
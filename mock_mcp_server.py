@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Stand-in MCP server for offline and load testing.
+
+Implements the parts of the MCP server API that MCPClient uses:
+
+    GET  /ping             status, model and capabilities
+    POST /analyze          JSON (base64) or multipart upload; answers 200 with
+                           the result, or 202 with a task ID in async mode
+    GET  /tasks/{task_id}  status of an asynchronous analysis
+
+plus GET /stats with the requests served and the failures injected.
+
+Analyses take a configurable time, fail at configurable rates and return
+a configurable number of rules and images, so throughput and failure
+handling can be measured without a live server (see benchmark_mcp.py).
+
+Usage:
+    python mock_mcp_server.py [--port 3000] [--mode sync|async|mixed]
+        [--latency S] [--jitter F] [--error-rate P] [--busy-rate P] ...
+
+Then point the application at it with MCP_SERVER_URL=http://localhost:3000.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Dict, Optional
+
+import httpx
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
+
+# Ways /analyze answers: with the result (200), with a task ID (202), or either at random
+MODES = ("sync", "async", "mixed")
+
+RULE_TYPES = ("esd", "latchup", "general")
+SEVERITIES = ("high", "medium", "low")
+
+# A 1x1 transparent PNG, repeated to the requested image size
+PNG_PIXEL = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+
+@dataclass
+class StandInSettings:
+    """Behaviour of the stand-in server."""
+    mode: str = "sync"
+    # Seconds an analysis takes, plus seconds per MB of document
+    latency: float = 1.0
+    latency_per_mb: float = 0.5
+    # Relative spread of the latency, e.g. 0.2 for +/-20%
+    jitter: float = 0.2
+    # Share of analyses that take slow_factor times as long, for tail latency
+    slow_rate: float = 0.0
+    slow_factor: float = 5.0
+    # Share of /analyze requests answered with 500, and with 503 and Retry-After
+    error_rate: float = 0.0
+    busy_rate: float = 0.0
+    # Share of asynchronous tasks that end as failed
+    task_failure_rate: float = 0.0
+    # Size of each result
+    rules: int = 10
+    rule_chars: int = 400
+    images: int = 0
+    image_bytes: int = 20000
+    multipart: bool = True
+    model: str = "stand-in-1"
+    seed: Optional[int] = None
+
+
+def create_app(settings: StandInSettings) -> FastAPI:
+    """
+    Create the stand-in server application.
+
+    Args:
+        settings: How the server behaves
+
+    Returns:
+        FastAPI application
+    """
+    if settings.mode not in MODES:
+        raise ValueError(f"Invalid mode '{settings.mode}'. Valid options: {', '.join(MODES)}")
+
+    app = FastAPI(title="MCP stand-in server")
+    rng = random.Random(settings.seed)
+    tasks: Dict[str, Dict[str, Any]] = {}
+    stats = {"analyze_requests": 0, "completed": 0, "errors_injected": 0, "busy_injected": 0,
+             "tasks_failed": 0, "task_polls": 0, "callbacks_sent": 0, "bytes_received": 0}
+    background = set()
+
+    def analysis_seconds(size: int) -> float:
+        seconds = settings.latency + settings.latency_per_mb * size / (1024 * 1024)
+        seconds *= rng.uniform(1 - settings.jitter, 1 + settings.jitter)
+        if rng.random() < settings.slow_rate:
+            seconds *= settings.slow_factor
+        return max(seconds, 0.0)
+
+    def build_result(name: str) -> Dict[str, Any]:
+        filler = "The clamp shall be placed within the specified distance of the pad ring. "
+        body = (filler * (settings.rule_chars // len(filler) + 1))[:settings.rule_chars]
+        image = base64.b64encode((PNG_PIXEL * (settings.image_bytes // len(PNG_PIXEL) + 1))[:settings.image_bytes]).decode()
+        return {
+            "model": settings.model,
+            "metadata": {"title": name, "analyzer": "stand-in"},
+            "rules": [
+                {
+                    "title": f"{name} rule {i + 1}",
+                    "content": body,
+                    "type": RULE_TYPES[i % len(RULE_TYPES)],
+                    "severity": SEVERITIES[i % len(SEVERITIES)],
+                    "category": "stand-in",
+                    "confidence": round(rng.uniform(0.5, 0.99), 2)
+                }
+                for i in range(settings.rules)
+            ],
+            "images": [
+                {"name": f"image_{i}.png", "content": image, "mime_type": "image/png", "description": f"Figure {i + 1}"}
+                for i in range(settings.images)
+            ]
+        }
+
+    def task_status(task: Dict[str, Any]) -> Dict[str, Any]:
+        remaining = task["finishes_at"] - time.monotonic()
+        if remaining > 0:
+            progress = 1 - remaining / task["seconds"] if task["seconds"] else 1.0
+            return {"task_id": task["id"], "status": "processing",
+                    "progress": round(progress, 2), "eta_seconds": round(remaining, 2)}
+        if task["failed"]:
+            return {"task_id": task["id"], "status": "failed", "error": "Stand-in task failure"}
+        return {"task_id": task["id"], "status": "completed", "result": task["result"]}
+
+    async def send_callback(task: Dict[str, Any], callback_url: str) -> None:
+        await asyncio.sleep(task["seconds"])
+        try:
+            async with httpx.AsyncClient(timeout=10) as client:
+                await client.post(callback_url, json=task_status(task))
+            stats["callbacks_sent"] += 1
+        except httpx.HTTPError:
+            # The client polls for tasks whose callback was lost
+            pass
+
+    @app.get("/ping")
+    async def ping():
+        return {
+            "status": "ok",
+            "model": settings.model,
+            "capabilities": ["multipart_upload"] if settings.multipart else []
+        }
+
+    @app.get("/stats")
+    async def get_stats():
+        return {**stats, "tasks_pending": sum(1 for task in tasks.values() if task["finishes_at"] > time.monotonic())}
+
+    @app.post("/analyze")
+    async def analyze(request: Request):
+        stats["analyze_requests"] += 1
+        if request.headers.get("content-type", "").startswith("multipart/form-data"):
+            if not settings.multipart:
+                raise HTTPException(status_code=415, detail="Multipart uploads are not supported")
+            form = await request.form()
+            upload = form.get("file")
+            if upload is None:
+                raise HTTPException(status_code=422, detail="Missing file")
+            size = len(await upload.read())
+            name = form.get("name") or upload.filename or "document"
+            callback_url = form.get("callback_url")
+        else:
+            try:
+                payload = await request.json()
+                document = payload["document"]
+                size = len(base64.b64decode(document["content"]))
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=422, detail="Expected a JSON body with a base64 document")
+            name = document.get("name") or "document"
+            callback_url = payload.get("callback_url")
+        stats["bytes_received"] += size
+
+        if rng.random() < settings.busy_rate:
+            stats["busy_injected"] += 1
+            return JSONResponse({"detail": "Server busy"}, status_code=503, headers={"Retry-After": "1"})
+        if rng.random() < settings.error_rate:
+            stats["errors_injected"] += 1
+            return JSONResponse({"detail": "Stand-in analysis error"}, status_code=500)
+
+        seconds = analysis_seconds(size)
+        if settings.mode == "sync" or (settings.mode == "mixed" and rng.random() < 0.5):
+            await asyncio.sleep(seconds)
+            stats["completed"] += 1
+            return build_result(name)
+
+        failed = rng.random() < settings.task_failure_rate
+        stats["tasks_failed" if failed else "completed"] += 1
+        task = {"id": uuid.uuid4().hex, "seconds": seconds, "finishes_at": time.monotonic() + seconds,
+                "failed": failed, "result": None if failed else build_result(name)}
+        tasks[task["id"]] = task
+        if callback_url:
+            callback = asyncio.create_task(send_callback(task, callback_url))
+            background.add(callback)
+            callback.add_done_callback(background.discard)
+        return JSONResponse({"task_id": task["id"], "status": "queued", "eta_seconds": round(seconds, 2)}, status_code=202)
+
+    @app.get("/tasks/{task_id}")
+    async def get_task(task_id: str):
+        stats["task_polls"] += 1
+        task = tasks.get(task_id)
+        if task is None:
+            raise HTTPException(status_code=404, detail=f"Task {task_id} not found")
+        return task_status(task)
+
+    return app
+
+
+def add_settings_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an argument for each StandInSettings field."""
+    defaults = StandInSettings()
+    parser.add_argument("--mode", choices=MODES, default=defaults.mode, help="Answer /analyze with 200, 202, or either")
+    parser.add_argument("--latency", type=float, default=defaults.latency, help="Seconds per analysis")
+    parser.add_argument("--latency-per-mb", type=float, default=defaults.latency_per_mb, help="Extra seconds per MB")
+    parser.add_argument("--jitter", type=float, default=defaults.jitter, help="Relative latency spread")
+    parser.add_argument("--slow-rate", type=float, default=defaults.slow_rate, help="Share of slow analyses")
+    parser.add_argument("--slow-factor", type=float, default=defaults.slow_factor, help="Latency multiplier of slow analyses")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of 500 responses")
+    parser.add_argument("--busy-rate", type=float, default=defaults.busy_rate, help="Share of 503 responses")
+    parser.add_argument("--task-failure-rate", type=float, default=defaults.task_failure_rate, help="Share of failed tasks")
+    parser.add_argument("--rules", type=int, default=defaults.rules, help="Rules per result")
+    parser.add_argument("--rule-chars", type=int, default=defaults.rule_chars, help="Characters per rule")
+    parser.add_argument("--images", type=int, default=defaults.images, help="Images per result")
+    parser.add_argument("--image-bytes", type=int, default=defaults.image_bytes, help="Bytes per image")
+    parser.add_argument("--no-multipart", dest="multipart", action="store_false", help="Accept JSON uploads only")
+    parser.add_argument("--model", default=defaults.model, help="Model identifier reported on /ping")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed")
+
+
+def settings_from_arguments(args: argparse.Namespace) -> StandInSettings:
+    """Build StandInSettings from parsed arguments."""
+    return StandInSettings(
+        mode=args.mode, latency=args.latency, latency_per_mb=args.latency_per_mb, jitter=args.jitter,
+        slow_rate=args.slow_rate, slow_factor=args.slow_factor, error_rate=args.error_rate,
+        busy_rate=args.busy_rate, task_failure_rate=args.task_failure_rate, rules=args.rules,
+        rule_chars=args.rule_chars, images=args.images, image_bytes=args.image_bytes,
+        multipart=args.multipart, model=args.model, seed=args.seed
+    )
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a stand-in MCP server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=3000, help="Port to listen on")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    settings = settings_from_arguments(args)
+    print(f"Stand-in MCP server on http://{args.host}:{args.port}: {json.dumps(settings.__dict__)}")
+    uvicorn.run(create_app(settings), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
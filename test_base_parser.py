@@ -0,0 +1,63 @@
+# test_base_parser.py
+"""
+Tests for parsing from memory: BufferReader streams over bytes, views and
+memory-mapped files without copying them, and parsers read every kind of
+content buffer alike.
+"""
+
+import io
+import mmap
+
+import pytest
+
+from app.parsers import CSVParser
+from app.parsers.base_parser import BufferReader
+
+CSV_CONTENT = b"Title,Description\nClamp placement,Place clamps close to the pad\n"
+
+
+def test_reads_and_seeks_like_a_file():
+    reader = BufferReader(b"0123456789")
+    chunk = bytearray(4)
+    assert reader.readinto(chunk) == 4 and chunk == b"0123"
+    assert reader.seek(-2, io.SEEK_END) == 8
+    assert reader.readall() == b"89"
+    assert reader.readinto(chunk) == 0
+    assert reader.seek(3, io.SEEK_SET) == 3
+    assert reader.seek(2, io.SEEK_CUR) == reader.tell() == 5
+    assert io.BufferedReader(BufferReader(b"0123456789")).read(3) == b"012"
+    with pytest.raises(ValueError):
+        reader.seek(-1)
+
+
+def test_reads_the_buffer_without_copying():
+    """Reads see the caller's buffer itself, so writes to it show up."""
+    buffer = bytearray(b"before")
+    reader = BufferReader(buffer)
+    buffer[:3] = b"BEF"
+    assert reader.read(6) == b"BEFore"
+
+
+def test_close_releases_mapped_file(tmp_path):
+    """Closing the reader releases its view, so the mapping can be closed."""
+    path = tmp_path / "content"
+    path.write_bytes(CSV_CONTENT)
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    reader = BufferReader(mapped)
+    assert reader.read(5) == b"Title"
+    with pytest.raises(BufferError):
+        mapped.close()
+    reader.close()
+    mapped.close()
+
+
+@pytest.mark.parametrize("wrap", [bytes, bytearray, memoryview])
+def test_parsers_read_any_buffer(wrap):
+    """Parsing a view gives the same rules as parsing bytes."""
+    rules = CSVParser(file_content=wrap(CSV_CONTENT)).extract_rules()
+    assert [(rule["title"], rule["content"]) for rule in rules] == [("Clamp placement", "Place clamps close to the pad")]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
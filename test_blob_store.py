@@ -0,0 +1,90 @@
+# test_blob_store.py
+"""
+Tests for the content-addressed blob store and its chunked writer: blobs
+are keyed by SHA-256, and a writer that is not committed leaves nothing
+behind.
+"""
+
+import hashlib
+
+import pytest
+
+from app.core.blob_store import BlobStore, BlobTooLargeError, map_file
+
+
+def stored_files(store):
+    return [path for path in store.root.rglob("*") if path.is_file()]
+
+
+def test_put_is_keyed_by_content(tmp_path):
+    """Equal content is stored once under its SHA-256."""
+    store = BlobStore(str(tmp_path))
+    key = store.put(b"rule table")
+    assert key == hashlib.sha256(b"rule table").hexdigest()
+    assert store.put(b"rule table") == key
+    assert store.path(key) == tmp_path / key[:2] / key[2:4] / key
+    assert (store.get(key), store.size(key)) == (b"rule table", 10)
+    assert len(stored_files(store)) == 1
+
+    assert store.delete(key)
+    assert not store.delete(key)
+    assert (store.exists(key), store.size(key), store.age(key)) == (False, None, None)
+
+
+@pytest.mark.parametrize("key", ["", "abc", "../../etc/passwd", "ABCDEF0123"])
+def test_invalid_keys(tmp_path, key):
+    with pytest.raises(ValueError):
+        BlobStore(str(tmp_path)).path(key)
+
+
+def test_writer_commits_chunks(tmp_path):
+    """Chunks written one by one are hashed and stored like put() would store them."""
+    store = BlobStore(str(tmp_path))
+    with store.open_writer() as writer:
+        for chunk in (b"first ", b"second ", b"third"):
+            writer.write(chunk)
+        key = writer.commit()
+
+    assert key == store.put(b"first second third")
+    assert writer.size == 18
+    assert stored_files(store) == [store.path(key)]
+
+
+def test_writer_without_commit_leaves_nothing(tmp_path):
+    """Leaving the writer without commit, e.g. on an error, removes the spooled chunks."""
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(RuntimeError):
+        with store.open_writer() as writer:
+            writer.write(b"partial upload")
+            raise RuntimeError("client went away")
+    assert stored_files(store) == []
+
+    writer = store.open_writer()
+    writer.write(b"partial upload")
+    writer.abort()
+    assert stored_files(store) == []
+
+
+def test_writer_size_limit(tmp_path):
+    """Writing past max_bytes raises before the chunk is stored, and the writer cleans up."""
+    store = BlobStore(str(tmp_path))
+    with pytest.raises(BlobTooLargeError):
+        with store.open_writer(max_bytes=8) as writer:
+            writer.write(b"12345678")
+            writer.write(b"9")
+    assert writer.size == 9
+    assert stored_files(store) == []
+
+
+def test_map_file(tmp_path):
+    """Stored blobs are mapped read-only; empty files map to empty bytes."""
+    store = BlobStore(str(tmp_path))
+    with store.open_mapped(store.put(b"mapped content")) as content:
+        assert content[:6] == b"mapped"
+    (tmp_path / "empty").write_bytes(b"")
+    with map_file(tmp_path / "empty") as content:
+        assert content == b""
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
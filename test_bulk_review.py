@@ -0,0 +1,62 @@
+# test_bulk_review.py
+"""
+Tests for bulk review of the validation queue: one transaction approves or
+rejects many items, and approved items get exactly one rule each.
+"""
+
+import pytest
+
+from app.database.models import Rule, RuleType, ValidationQueue, ValidationStatus
+from app.crud.candidate import save_candidates
+from app.crud.validation import bulk_review_validation_items, update_validation_status
+from app.models.schemas import ValidationQueueUpdate, ValidationStatus as SchemaValidationStatus
+
+
+def queue_rules(db, rule_count):
+    """Queue rules of document 1 for validation."""
+    rules = [{"title": f"Rule {i}", "content": "x", "rule_type": "latchup" if i % 2 else "esd"} for i in range(rule_count)]
+    save_candidates(db, 1, rules, "parser")
+
+
+def test_bulk_approve_creates_one_rule_per_item(db):
+    """Approving creates rules in order; approving again skips the items."""
+    queue_rules(db, 4)
+    ids = [item.id for item in db.query(ValidationQueue).order_by(ValidationQueue.id)]
+
+    reviewed, skipped, not_found = bulk_review_validation_items(
+        db, ids[:3] + [ids[0], 999], ValidationStatus.APPROVED, validated_by="ann"
+    )
+    assert [item.id for item in reviewed] == ids[:3]
+    assert (skipped, not_found) == ([], [999])
+    rules = db.query(Rule).order_by(Rule.id).all()
+    assert [rule.title for rule in rules] == ["Rule 0", "Rule 1", "Rule 2"]
+    assert rules[1].rule_type == RuleType.LATCHUP
+    assert [item.rule_id for item in reviewed] == [rule.id for rule in rules]
+    assert all(item.validated_by == "ann" and item.validated_at for item in reviewed)
+
+    reviewed, skipped, _ = bulk_review_validation_items(db, ids, ValidationStatus.APPROVED)
+    assert ([item.id for item in reviewed], skipped) == ([ids[3]], ids[:3])
+    assert db.query(Rule).count() == 4
+
+
+def test_bulk_reject_creates_no_rules(db):
+    """Rejections store the notes and leave the rules table alone."""
+    queue_rules(db, 3)
+    ids = [item.id for item in db.query(ValidationQueue)]
+
+    reviewed, _, _ = bulk_review_validation_items(db, ids, ValidationStatus.REJECTED, validator_notes="duplicate")
+    assert len(reviewed) == 3 and db.query(Rule).count() == 0
+    assert {item.validator_notes for item in db.query(ValidationQueue)} == {"duplicate"}
+
+
+def test_single_update_stores_model_status(db):
+    """Statuses from the API schema are stored as the model's enum and read back."""
+    queue_rules(db, 1)
+    item = db.query(ValidationQueue).one()
+    update_validation_status(db, item.id, ValidationQueueUpdate(validation_status=SchemaValidationStatus.REJECTED))
+    db.expire_all()
+    assert db.query(ValidationQueue).one().validation_status == ValidationStatus.REJECTED
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
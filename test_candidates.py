@@ -0,0 +1,78 @@
+# test_candidates.py
+"""
+Tests for extraction candidates: every extracted rule is stored, and
+candidates are promoted to the validation queue by confidence threshold
+without extracting again.
+"""
+
+import pytest
+
+from app.database.models import ImportedDocument, DocumentType, ValidationQueue, ValidationStatus
+from app.crud.candidate import save_candidates, promote_candidates, get_candidates
+
+RULES = [{"title": f"Rule {i}", "content": "x", "confidence": confidence}
+         for i, confidence in enumerate((0.9, 0.75, 0.5, None))]
+
+
+def queued(db):
+    """Titles and confidences of the validation queue."""
+    return sorted((item.extracted_content["title"], item.confidence) for item in db.query(ValidationQueue).all())
+
+
+def test_save_stores_all_and_queues_above_threshold(db):
+    """Rules below the threshold are stored but not queued."""
+    assert save_candidates(db, 1, RULES, "mcp", confidence_threshold=0.7) == 2
+    assert [candidate.confidence for candidate in get_candidates(db, document_id=1)] == [0.9, 0.75, 0.5, None]
+    assert queued(db) == [("Rule 0", 0.9), ("Rule 1", 0.75)]
+
+
+def test_promote_lower_threshold_once(db):
+    """Promoting queues only candidates that are not queued or reviewed yet."""
+    db.add(ImportedDocument(id=2, filename="other.pdf", document_type=DocumentType.PDF))
+    db.commit()
+    save_candidates(db, 1, RULES, "mcp", confidence_threshold=0.7)
+    save_candidates(db, 2, RULES[:1], "parser")
+
+    assert promote_candidates(db, 0.5, document_id=1) == 1
+    assert promote_candidates(db, 0.5, document_id=1) == 0
+    assert promote_candidates(db, 0.0, source="mcp") == 1
+    assert len(queued(db)) == 5
+
+
+def test_reprocessing_keeps_reviewed_items(db):
+    """Saving again replaces candidates and pending items but not reviewed ones."""
+    save_candidates(db, 1, RULES, "mcp", confidence_threshold=0.7)
+    reviewed = db.query(ValidationQueue).filter(ValidationQueue.confidence == 0.9).one()
+    reviewed.validation_status = ValidationStatus.APPROVED
+    db.commit()
+
+    assert save_candidates(db, 1, RULES[1:], "mcp", confidence_threshold=0.7) == 1
+    db.refresh(reviewed)
+    assert reviewed.candidate_id is None
+    assert queued(db) == [("Rule 0", 0.9), ("Rule 1", 0.75)]
+    assert len(get_candidates(db, document_id=1)) == 3
+
+
+def test_reprocessing_does_not_requeue_reviewed_rules(db):
+    """A reviewed rule extracted again links to its new candidate instead of being queued again."""
+    save_candidates(db, 1, RULES, "mcp", confidence_threshold=0.7)
+    items = db.query(ValidationQueue).order_by(ValidationQueue.id).all()
+    items[0].validation_status = ValidationStatus.APPROVED
+    items[1].validation_status = ValidationStatus.REJECTED
+    db.commit()
+
+    # Same rules with other punctuation and case, plus a new one
+    rules = [{**RULES[0], "title": "RULE 0."}] + RULES[1:] + [{"title": "Rule 4", "content": "y", "confidence": 0.8}]
+    assert save_candidates(db, 1, rules, "mcp", confidence_threshold=0.7) == 1
+    assert queued(db) == [("Rule 0", 0.9), ("Rule 1", 0.75), ("Rule 4", 0.8)]
+    for item in items:
+        db.refresh(item)
+        assert item.candidate.content["title"].lower().startswith(item.extracted_content["title"].lower())
+
+    assert promote_candidates(db, 0.0, document_id=1) == 2
+    assert save_candidates(db, 1, rules, "mcp", confidence_threshold=0.7) == 1
+    assert len(queued(db)) == 3
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
@@ -0,0 +1,240 @@
+# test_document_endpoints.py
+"""
+Tests for the document endpoints: streaming uploads into the blob store,
+queueing processing jobs, waiting for them for at most
+PROCESS_WAIT_SECONDS, and following them as Server-Sent Events.
+"""
+
+import hashlib
+import json
+import threading
+import time
+
+import pytest
+
+from app.api import document_endpoints
+from app.core.job_queue import job_queue
+from app.core.progress import progress_broker
+from app.crud.job import claim_next_job, complete_job
+from app.database.models import ImportedDocument, ProcessingJob
+
+PDF_CONTENT = b"%PDF-1.4\n" + b"0123456789abcdef" * 8
+
+
+def upload(client, filename="spec.pdf", content=PDF_CONTENT, **form):
+    return client.post("/documents/upload", files={"file": (filename, content)}, data=form)
+
+
+def test_upload_streams_into_blob_store(client, db, monkeypatch):
+    """The upload is written in chunks and stored under its SHA-256, which the document records as its key."""
+    monkeypatch.setattr(document_endpoints, "UPLOAD_CHUNK_SIZE", 16)
+
+    response = upload(client)
+    assert response.status_code == 200
+    key = response.json()["content_hash"]
+    assert key == hashlib.sha256(PDF_CONTENT).hexdigest()
+    assert response.json()["document_type"] == "PDF"
+
+    db_document = db.get(ImportedDocument, response.json()["id"])
+    assert (db_document.file_path, db_document.file_data) == (key, None)
+    assert client.blob_store.get(key) == PDF_CONTENT
+
+
+def test_upload_over_size_limit(client, monkeypatch):
+    """Uploads beyond MAX_UPLOAD_MB are refused with 413 and leave nothing in the store."""
+    monkeypatch.setattr(document_endpoints, "UPLOAD_CHUNK_SIZE", 16)
+    monkeypatch.setattr(document_endpoints, "MAX_UPLOAD_MB", 64 / (1024 * 1024))
+
+    assert upload(client).status_code == 413
+    assert [path for path in client.blob_store.root.rglob("*") if path.is_file()] == []
+
+
+@pytest.mark.parametrize("filename, content, status_code", [
+    ("spec.pdf", b"PK\x03\x04 not a pdf", 400),
+    ("spec.pdf", b"", 400),
+    ("spec.xyz", b"plain text", 400),
+    ("spec.bin", PDF_CONTENT, 200),
+])
+def test_upload_checks_first_chunk(client, filename, content, status_code):
+    """The first chunk must match the extension's format, or identify the format when the extension is unknown."""
+    response = upload(client, filename, content)
+    assert response.status_code == status_code
+    if status_code == 200:
+        assert response.json()["document_type"] == "PDF"
+
+
+def test_upload_duplicate_policies(client, db):
+    """link records the duplicate, reuse returns the original and allow stores an independent document."""
+    original = upload(client).json()
+
+    linked = upload(client, on_duplicate="link").json()
+    assert linked["id"] != original["id"]
+    assert linked["duplicate_of_id"] == original["id"]
+    assert upload(client, on_duplicate="reuse").json()["id"] == original["id"]
+    allowed = upload(client, on_duplicate="allow").json()
+    assert allowed["id"] not in (original["id"], linked["id"])
+    assert allowed["duplicate_of_id"] is None
+    assert upload(client, on_duplicate="skip").status_code == 400
+    assert db.query(ImportedDocument).filter(ImportedDocument.content_hash == original["content_hash"]).count() == 3
+
+
+def test_linked_duplicate_shares_processing(client, db):
+    """A linked duplicate takes over the original's status and outlives it as an independent document."""
+    original = upload(client).json()
+    db_original = db.get(ImportedDocument, original["id"])
+    db_original.processed, db_original.processing_status = True, "success"
+    db.commit()
+
+    duplicate = upload(client, filename="copy.pdf").json()
+    assert (duplicate["processed"], duplicate["processing_status"]) == (True, "success")
+    assert duplicate["processing_notes"] == f"Duplicate of document {original['id']} (spec.pdf)"
+    # Duplicates of a duplicate link to the original
+    assert upload(client, filename="copy2.pdf").json()["duplicate_of_id"] == original["id"]
+
+    assert client.delete(f"/documents/{original['id']}").status_code == 200
+    db.expire_all()
+    assert db.get(ImportedDocument, duplicate["id"]).duplicate_of_id is None
+    assert client.blob_store.exists(original["content_hash"])
+
+
+def test_delete_keeps_blob_until_last_document(client):
+    """The stored upload is removed with the last document that refers to it."""
+    first = upload(client).json()
+    second = upload(client, on_duplicate="allow").json()
+    key = first["content_hash"]
+
+    assert client.delete(f"/documents/{first['id']}").status_code == 200
+    assert client.blob_store.exists(key)
+    assert client.delete(f"/documents/{second['id']}").status_code == 200
+    assert not client.blob_store.exists(key)
+
+
+def test_process_without_wait_queues_a_job(client, db):
+    """wait=false answers 202 with the queued job; a second call reuses it."""
+    response = client.post("/documents/1/process", params={"wait": "false"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    assert client.post("/documents/1/process", params={"wait": "false"}).json()["job_id"] == job_id
+    db_job = db.get(ProcessingJob, job_id)
+    assert (db_job.kind, db_job.status) == ("parse", "queued")
+    assert db.get(ImportedDocument, 1).processing_status == "processing"
+
+
+def test_process_wait_is_bounded(client, monkeypatch):
+    """Without a worker to run the job, the request gives up waiting and answers 202."""
+    monkeypatch.setattr(document_endpoints, "PROCESS_WAIT_SECONDS", 0.2)
+    monkeypatch.setattr(job_queue, "poll_interval", 0.05)
+
+    response = client.post("/documents/1/process")
+    assert response.status_code == 202
+    assert response.json()["status"] == "processing"
+
+
+def test_process_returns_result_of_finished_job(client, db, monkeypatch):
+    """A job finished within the wait is answered with its result."""
+    monkeypatch.setattr(document_endpoints, "PROCESS_WAIT_SECONDS", 5)
+    monkeypatch.setattr(job_queue, "poll_interval", 0.05)
+
+    def run_job():
+        # Stand in for a queue worker once the request has queued the job
+        db_job = None
+        while db_job is None and not stopped.wait(0.05):
+            db_job = claim_next_job(db, "test-worker", 60)
+        if db_job is not None:
+            complete_job(db, db_job.id, "test-worker", {"rules_extracted": 3})
+
+    stopped = threading.Event()
+    worker = threading.Thread(target=run_job)
+    worker.start()
+    response = client.post("/documents/1/process")
+    stopped.set()
+    worker.join()
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "success"
+    assert response.json()["rules_extracted"] == 3
+
+
+def test_process_unknown_or_processed_document(client, db):
+    """Unknown documents are 404; processed ones are only queued again with force."""
+    assert client.post("/documents/99/process").status_code == 404
+
+    db.get(ImportedDocument, 1).processed = True
+    db.get(ImportedDocument, 1).processing_status = "success"
+    db.commit()
+    assert client.post("/documents/1/process").json() == {"message": "Document already processed", "status": "success"}
+    assert client.post("/documents/1/process", params={"wait": "false", "force": "true"}).status_code == 202
+
+
+def test_process_with_mcp_queues_an_mcp_job(client, db):
+    """The MCP endpoint queues an "mcp" job without waiting for it."""
+    response = client.post("/documents/1/process-with-mcp")
+    assert response.status_code == 200
+    assert db.get(ProcessingJob, response.json()["job_id"]).kind == "mcp"
+
+
+def sse_events(body):
+    """Event names and payloads of a Server-Sent Events stream."""
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(("retry:", ":")))
+        if "event" in fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def queue_and_claim(client, db):
+    job_id = client.post("/documents/1/process", params={"wait": "false"}).json()["job_id"]
+    assert claim_next_job(db, "test-worker", 60).id == job_id
+    return job_id
+
+
+def test_events_of_finished_job(client, db):
+    """Subscribing to a job that already finished yields its state and terminal event, then closes."""
+    job_id = queue_and_claim(client, db)
+    complete_job(db, job_id, "test-worker", {"rules_extracted": 3})
+
+    events = sse_events(client.get("/documents/1/events", params={"job_id": job_id}).text)
+    assert [name for name, _ in events] == ["state", "succeeded"]
+    assert events[1][1]["result"] == {"rules_extracted": 3}
+    assert client.get("/documents/1/events", params={"job_id": 99}).status_code == 404
+
+
+def test_events_follow_published_progress(client, db):
+    """Events published while the client listens are forwarded until the terminal one."""
+    job_id = queue_and_claim(client, db)
+
+    def run_job():
+        # Publish once the stream has subscribed, like a worker in this process
+        while not progress_broker._subscribers.get(1):
+            time.sleep(0.01)
+        progress_broker.publish(1, "progress", job_id=job_id + 1, stage="pages", done=1, total=2)
+        progress_broker.publish(1, "progress", job_id=job_id, stage="pages", done=1, total=2)
+        progress_broker.publish(1, "succeeded", job_id=job_id)
+
+    worker = threading.Thread(target=run_job)
+    worker.start()
+    body = client.get("/documents/1/events").text
+    worker.join()
+
+    events = sse_events(body)
+    assert [name for name, _ in events] == ["state", "progress", "succeeded"]
+    assert events[1][1]["job_id"] == job_id
+
+
+def test_events_notice_job_finished_elsewhere(client, db, monkeypatch):
+    """A job finished by a worker in another process is caught from the database between keepalives."""
+    monkeypatch.setattr(document_endpoints, "EVENT_KEEPALIVE_SECONDS", 0.05)
+    job_id = queue_and_claim(client, db)
+    finisher = threading.Timer(0.2, complete_job, (db, job_id, "test-worker", {"rules_extracted": 1}))
+    finisher.start()
+    body = client.get("/documents/1/events").text
+    finisher.join()
+
+    assert ": keepalive" in body
+    assert [name for name, _ in sse_events(body)] == ["state", "succeeded"]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
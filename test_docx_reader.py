@@ -0,0 +1,111 @@
+# test_docx_reader.py
+"""
+Tests for the streaming Word reader: it must see the same paragraphs,
+styles and bold flags as python-docx, so both paths extract the same rules.
+"""
+
+import io
+import sys
+from pathlib import Path
+
+from docx import Document
+from docx.enum.text import WD_BREAK
+from docx.shared import Inches
+from PIL import Image
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.parsers.word_parser import WordParser
+from app.parsers.docx_reader import DocxStreamReader, DocxParagraph
+
+
+def make_docx():
+    """Build a small spec with headings, bold titles, breaks and a table."""
+    doc = Document()
+    doc.add_heading("ESD Design Manual", 0)
+    doc.add_heading("Input Protection", 1)
+    title = doc.add_paragraph()
+    title.add_run("Rule 1: Clamp placement").bold = True
+    body = doc.add_paragraph("Clamps shall be placed\twithin 50 um of the pad.")
+    body.add_run().add_break()
+    body.add_run("Applies to all IO cells.")
+    body.add_run().add_break(WD_BREAK.PAGE)
+    table = doc.add_table(rows=3, cols=3)
+    for cell, text in zip(table.rows[0].cells, ["Rule ID", "Description", "Severity"]):
+        cell.text = text
+    for cell, text in zip(table.rows[1].cells, ["ESD-1", "Use a secondary clamp on every input", "critical"]):
+        cell.text = text
+    # Merged cells repeat their text in each grid column
+    table.cell(2, 1).merge(table.cell(2, 2)).text = "Rule 9: inside a table"
+    doc.add_paragraph("2.1 Latchup guard rings", style="List Bullet")
+    doc.add_paragraph("Guard rings shall surround every IO driver.")
+    doc.core_properties.title = "ESD Design Manual"
+    doc.core_properties.author = "ESD team"
+    doc.add_section()
+    picture = io.BytesIO()
+    Image.new("RGB", (4, 4), "red").save(picture, "PNG")
+    doc.add_picture(picture, width=Inches(1))
+    data = io.BytesIO()
+    doc.save(data)
+    return data.getvalue()
+
+
+def test_stream_matches_python_docx():
+    """Streamed paragraph records equal those built through python-docx."""
+    data = make_docx()
+    parser = WordParser(file_content=data)
+
+    with DocxStreamReader(io.BytesIO(data)) as reader:
+        streamed = list(reader.iter_body())
+
+    # python-docx yields paragraphs before table rows
+    streamed.sort(key=lambda item: not isinstance(item, DocxParagraph))
+    assert streamed == list(parser._docx_body())
+    assert streamed[1].style == "Heading 1"
+    assert streamed[2].bold
+    assert streamed[3].text == "Clamps shall be placed\twithin 50 um of the pad.\nApplies to all IO cells."
+
+
+def test_rules_match_python_docx():
+    """The fast path extracts exactly the rules the python-docx path does."""
+    parser = WordParser(file_content=make_docx())
+
+    rules = parser.extract_rules()
+    assert rules == parser._extract_rules_from(parser._docx_body())
+    assert [rule["title"] for rule in rules] == [
+        "Rule 1: Clamp placement", "2.1 Latchup guard rings", "ESD-1", "Rule 9: inside a table"
+    ]
+
+    table_rule = rules[2]
+    assert table_rule["content"] == "Use a secondary clamp on every input"
+    assert table_rule["severity"] == "critical"
+    assert (table_rule["table"], table_rule["row"]) == (1, 2)
+
+
+def test_metadata_and_images_without_python_docx():
+    """Metadata and images are read from the package and match python-docx, which is never loaded."""
+    data = make_docx()
+    parser = WordParser(file_content=data)
+    result = parser.process()
+    assert "doc" not in parser.__dict__
+
+    doc = Document(io.BytesIO(data))
+    assert result["metadata"]["title"] == "ESD Design Manual"
+    assert result["metadata"]["author"] == "ESD team"
+    assert result["metadata"]["created"] == doc.core_properties.created
+    assert (result["metadata"]["paragraphs"], result["metadata"]["sections"]) == (len(doc.paragraphs), len(doc.sections))
+    assert WordParser(file_content=data).extract_metadata() == result["metadata"]
+
+    images = parser.extract_images()
+    assert [(image["filename"], image["mime_type"]) for image in images] == [("image_0.png", "image/png")]
+    assert [image["image_data"] for image in images] == [
+        rel.target_part.blob for rel in doc.part.rels.values() if "image" in rel.target_ref
+    ]
+
+
+if __name__ == "__main__":
+    test_stream_matches_python_docx()
+    test_rules_match_python_docx()
+    test_metadata_and_images_without_python_docx()
+    print("All Word reader tests passed")
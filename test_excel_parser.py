@@ -0,0 +1,73 @@
+# test_excel_parser.py
+"""
+Tests for rule extraction from Excel sheets and the column mapping it
+shares with the Word and Markdown parsers.
+
+The shared mapping prefers exact header names, does not map one column to
+both title and content while another fits, and breaks ties by pattern
+order. Headers the original Excel heuristic already mapped sensibly keep
+their mapping; the cases below pin both kinds.
+"""
+
+import io
+
+import pandas as pd
+import pytest
+
+from app.parsers.excel_parser import ExcelParser
+from app.parsers.table_rules import detect_column_mapping
+
+
+@pytest.mark.parametrize("columns, mapping", [
+    (["title", "content", "type", "severity", "category"],
+     {"title": "title", "content": "content", "rule_type": "type", "severity": "severity", "category": "category"}),
+    (["name", "rule text", "priority"], {"title": "name", "content": "rule text", "severity": "priority"}),
+    (["id", "requirement", "area"], {"title": "id", "content": "requirement", "category": "area"}),
+])
+def test_mapping_unchanged_from_excel_heuristic(columns, mapping):
+    """Sheets the original first-match heuristic read correctly map the same way."""
+    assert detect_column_mapping(columns) == mapping
+
+
+@pytest.mark.parametrize("columns, mapping", [
+    # Was content "rule id": the ID doubled as the rule text
+    (["rule id", "description", "severity"], {"title": "rule id", "content": "description", "severity": "severity"}),
+    # Was title and content "rule id"
+    (["rule id", "title", "content"], {"title": "title", "content": "content"}),
+    # Was content "rule" and rule_type "category"
+    (["rule", "description", "category", "type"],
+     {"title": "rule", "content": "description", "rule_type": "type", "category": "category"}),
+])
+def test_mapping_changed_from_excel_heuristic(columns, mapping):
+    """Sheets whose ID or category column was read twice now map each property to its own column."""
+    assert detect_column_mapping(columns) == mapping
+
+
+def build_workbook(sheets):
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        for name, rows in sheets.items():
+            pd.DataFrame(rows).to_excel(writer, sheet_name=name, index=False)
+    return output.getvalue()
+
+
+def test_rules_from_rule_sheets():
+    """Rows of sheets named like rule sheets become rules with their sheet and row."""
+    data = build_workbook({
+        "ESD Rules": {
+            "Rule ID": ["ESD-1", "ESD-2"],
+            "Description": ["Use a secondary clamp on every input", "Keep clamps within 50 um of the pad"],
+            "Severity": ["critical", "high"]
+        },
+        "Notes": {"Title": ["Not a rule"], "Content": ["Sheet name does not suggest rules"]}
+    })
+
+    rules = ExcelParser(file_content=data).extract_rules()
+    assert [(rule["title"], rule["content"], rule["severity"], rule["sheet"], rule["row"]) for rule in rules] == [
+        ("ESD-1", "Use a secondary clamp on every input", "critical", "ESD Rules", 2),
+        ("ESD-2", "Keep clamps within 50 um of the pad", "high", "ESD Rules", 3)
+    ]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
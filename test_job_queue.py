@@ -0,0 +1,78 @@
+# test_job_queue.py
+"""
+Tests for the durable processing job queue: leased claims, retries with
+backoff and recovery of jobs abandoned by a crashed worker.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.crud import job as job_crud
+
+
+def test_claim_is_exclusive(db):
+    """A queued job can only be claimed by one worker."""
+    db_job = job_crud.enqueue_job(db, 1, "parse")
+
+    claimed = job_crud.claim_next_job(db, "worker-a", lease_seconds=60)
+    assert claimed.id == db_job.id
+    assert claimed.status == job_crud.RUNNING
+    assert claimed.attempts == 1
+    assert job_crud.claim_next_job(db, "worker-b", lease_seconds=60) is None
+
+    assert job_crud.renew_lease(db, db_job.id, "worker-a", 60)
+    assert not job_crud.renew_lease(db, db_job.id, "worker-b", 60)
+    assert job_crud.complete_job(db, db_job.id, "worker-a", {"rules_extracted": 3})
+    assert job_crud.get_job(db, db_job.id).result == {"rules_extracted": 3}
+
+
+def test_failed_attempts_back_off_then_fail(db):
+    """Retryable failures are requeued with growing delays until max_attempts."""
+    db_job = job_crud.enqueue_job(db, 1, "parse", max_attempts=2)
+
+    job_crud.claim_next_job(db, "worker-a", lease_seconds=60)
+    retried = job_crud.fail_job(db, db_job.id, "worker-a", "timeout", retry_base_seconds=30)
+    assert retried.status == job_crud.QUEUED
+    assert retried.available_at > datetime.now() + timedelta(seconds=20)
+    # Not claimable until the backoff has passed
+    assert job_crud.claim_next_job(db, "worker-a", lease_seconds=60) is None
+
+    retried.available_at = datetime.now()
+    db.commit()
+    job_crud.claim_next_job(db, "worker-a", lease_seconds=60)
+    failed = job_crud.fail_job(db, db_job.id, "worker-a", "timeout", retry_base_seconds=30)
+    assert failed.status == job_crud.FAILED
+    assert failed.attempts == 2
+
+
+def test_permanent_failure_is_not_retried(db):
+    """Non-retryable failures end the job on the first attempt."""
+    db_job = job_crud.enqueue_job(db, 1, "parse")
+    job_crud.claim_next_job(db, "worker-a", lease_seconds=60)
+
+    failed = job_crud.fail_job(db, db_job.id, "worker-a", "corrupt file", retry_base_seconds=30, retryable=False)
+    assert failed.status == job_crud.FAILED
+    assert failed.last_error == "corrupt file"
+
+
+def test_abandoned_job_is_requeued(db):
+    """A job whose lease expired is requeued and the old worker can no longer complete it."""
+    db_job = job_crud.enqueue_job(db, 1, "parse")
+    job_crud.claim_next_job(db, "worker-a", lease_seconds=60)
+
+    db_job = job_crud.get_job(db, db_job.id)
+    db_job.lease_expires_at = datetime.now() - timedelta(seconds=1)
+    db.commit()
+
+    requeued = job_crud.requeue_abandoned_jobs(db)
+    assert [j.id for j in requeued] == [db_job.id]
+    assert requeued[0].status == job_crud.QUEUED
+    assert not job_crud.complete_job(db, db_job.id, "worker-a")
+
+    claimed = job_crud.claim_next_job(db, "worker-b", lease_seconds=60)
+    assert claimed.attempts == 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
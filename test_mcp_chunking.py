@@ -0,0 +1,173 @@
+# test_mcp_chunking.py
+"""
+Tests for chunked MCP analysis: where PDFs and Word documents are cut,
+and how the analyses of the chunks are merged.
+"""
+
+import io
+import zipfile
+
+import docx
+import PyPDF2
+import pytest
+from docx.shared import Inches
+from PIL import Image
+
+from app.core.mcp_chunking import DocumentChunk, split_document, merge_chunk_results, _page_runs
+
+PDF_CONFIG = {"chunk_min_pages": 30, "chunk_pages": 15}
+
+
+def build_pdf(pages):
+    writer = PyPDF2.PdfWriter()
+    for _ in range(pages):
+        writer.add_blank_page(width=612, height=792)
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+
+def build_docx(sections, picture_in=None):
+    """A Word document with one Heading 1 and its paragraphs per section, and optionally a picture."""
+    document = docx.Document()
+    for heading, paragraphs in sections:
+        document.add_heading(heading, level=1)
+        for text in paragraphs:
+            document.add_paragraph(text)
+        if heading == picture_in:
+            picture = io.BytesIO()
+            Image.new("RGB", (4, 4), "red").save(picture, "PNG")
+            document.add_picture(picture, width=Inches(1))
+    output = io.BytesIO()
+    document.save(output)
+    return output.getvalue()
+
+
+def chunk_text(chunk):
+    return [paragraph.text for paragraph in docx.Document(io.BytesIO(chunk.content)).paragraphs]
+
+
+def test_page_runs_end_at_rule_headings():
+    """Runs end before a heading at the top of a page, or share the page a heading starts on."""
+    pages = [
+        "Rule 1: Clamp placement\nClamps go near the pad.",
+        "More about clamps.",
+        "Rule 2: Diode width\nWidth of at least 2 um.",
+        "More about diodes.",
+        "The end of the diode rule.\nRule 3: Guard rings\nRings around drivers.",
+        "More about rings.",
+        "The end."
+    ]
+    assert _page_runs(pages, 3) == [(0, 2), (2, 5), (4, 7)]
+    # Without headings the runs are cut at fixed pages
+    assert _page_runs(["No rules here."] * 7, 3) == [(0, 3), (3, 6), (6, 7)]
+
+
+def test_split_pdf_is_lazy():
+    """Only PDFs above chunk_min_pages are cut; chunks are built as they are consumed."""
+    assert list(split_document("PDF", "spec.pdf", build_pdf(30), None, PDF_CONFIG)) == []
+
+    chunks = split_document("PDF", "spec.pdf", build_pdf(31), None, PDF_CONFIG)
+    first = next(chunks)
+    assert (first.label, first.count) == ("pages 1-15", 3)
+    chunks = [first] + list(chunks)
+    assert [chunk.name for chunk in chunks] == ["spec.pages-1-15.pdf", "spec.pages-16-30.pdf", "spec.pages-31-31.pdf"]
+    assert [len(PyPDF2.PdfReader(io.BytesIO(chunk.content)).pages) for chunk in chunks] == [15, 15, 1]
+
+
+def test_split_word_at_headings():
+    """Whole sections are packed into Word chunks of at most max_chars; images go with their section."""
+    sections = [(f"Section {i}", [f"Rule {i}.{j}: clamps shall be placed near the pad." for j in range(3)])
+                for i in range(4)]
+    data = build_docx(sections, picture_in="Section 3")
+    assert list(split_document("WORD", "spec.docx", data, None, {"chunk_max_chars": 100000})) == []
+
+    chunks = list(split_document("WORD", "spec.docx", data, None, {"chunk_max_chars": 400}))
+    assert [chunk.document_type for chunk in chunks] == ["WORD", "WORD"]
+    assert [chunk.name for chunk in chunks] == ["spec.part-1.docx", "spec.part-2.docx"]
+    assert [chunk_text(chunk)[0] for chunk in chunks] == ["Section 0", "Section 2"]
+    assert [sum(text.startswith("Section") for text in chunk_text(chunk)) for chunk in chunks] == [2, 2]
+    assert [chunk.label for chunk in chunks] == ["part 1 of 2", "part 2 of 2"]
+
+    media = [[name for name in zipfile.ZipFile(io.BytesIO(chunk.content)).namelist() if "/media/" in name]
+             for chunk in chunks]
+    assert media[0] == [] and len(media[1]) == 1
+    assert len(docx.Document(io.BytesIO(chunks[1].content)).inline_shapes) == 1
+
+    # The same chunk always has the same bytes, so its cached analysis is found again
+    again = list(split_document("WORD", "spec.docx", data, None, {"chunk_max_chars": 400}))
+    assert [chunk.content for chunk in again] == [chunk.content for chunk in chunks]
+
+
+def test_split_word_cuts_long_section_at_paragraphs():
+    """A section longer than max_chars is cut itself, between paragraphs."""
+    data = build_docx([("Long", [f"Paragraph {i} of a very long section." for i in range(20)])])
+    chunks = list(split_document("WORD", "spec.docx", data, None, {"chunk_max_chars": 200}))
+    texts = [chunk_text(chunk) for chunk in chunks]
+    assert len(texts) > 1 and all(len("".join(text)) <= 200 for text in texts)
+    assert [paragraph for text in texts for paragraph in text] == ["Long"] + [
+        f"Paragraph {i} of a very long section." for i in range(20)
+    ]
+
+
+def test_unreadable_document_is_sent_whole():
+    """Documents the splitter cannot read give no chunks."""
+    config = {"chunk_min_pages": 1, "chunk_pages": 1}
+    assert list(split_document("PDF", "broken.pdf", b"%PDF-1.4 broken", None, config)) == []
+    assert list(split_document("WORD", "broken.docx", b"not a zip", None, config)) == []
+
+
+def test_merge_keeps_most_confident_duplicate():
+    """Rules repeated across chunks are kept once, with the highest confidence, in document order."""
+    chunks = [DocumentChunk(i, f"spec.part-{i + 1}.docx", "WORD", b"", f"part {i + 1} of 2", 2) for i in range(2)]
+    results = [
+        {
+            "rules": [
+                {"title": "Clamp spacing", "content": "Keep clamps 50um apart.", "confidence": 0.6},
+                {"title": "Diode width", "content": "Width >= 2um.", "confidence": 0.9}
+            ],
+            "metadata": {"title": "Spec"},
+            "images": [{"filename": "a.png"}],
+            "cached": True
+        },
+        {
+            "rules": [
+                {"title": "clamp  spacing", "content": "Keep clamps 50um apart", "confidence": 0.8},
+                {"title": "Latch-up", "content": "Guard rings required.", "confidence": 0.7}
+            ],
+            "metadata": {"title": "Page 16", "author": "ESD team"},
+            "images": [],
+            "cached": False
+        }
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+    assert [(rule["title"], rule["confidence"], rule["chunk"]) for rule in merged["rules"]] == [
+        ("clamp  spacing", 0.8, "part 2 of 2"),
+        ("Diode width", 0.9, "part 1 of 2"),
+        ("Latch-up", 0.7, "part 2 of 2")
+    ]
+    assert merged["metadata"] == {"title": "Spec", "author": "ESD team", "chunks": 2}
+    assert merged["images"] == [{"filename": "a.png"}]
+    assert merged["cached"] is False
+
+
+def test_merge_prefers_whole_rule_over_cut_copy():
+    """A rule cut off at the end of a chunk gives way to the copy that continues it."""
+    chunks = [DocumentChunk(i, f"spec.pages-{i}.pdf", "PDF", b"", f"run {i + 1}", 2) for i in range(2)]
+    results = [
+        {"rules": [{"title": "Guard rings", "content": "Rings shall surround", "confidence": 0.9}],
+         "metadata": {}, "images": []},
+        {"rules": [{"title": "Guard rings", "content": "Rings shall surround every driver.", "confidence": 0.7},
+                   {"title": "Guard rings", "content": "Other text entirely.", "confidence": 0.7}],
+         "metadata": {}, "images": []}
+    ]
+
+    merged = merge_chunk_results(chunks, results)
+    assert [(rule["content"], rule["chunk"]) for rule in merged["rules"]] == [
+        ("Rings shall surround every driver.", "run 2"), ("Other text entirely.", "run 2")
+    ]
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
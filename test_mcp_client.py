@@ -0,0 +1,131 @@
+# test_mcp_client.py
+"""
+Tests for the MCP client: choosing between multipart and JSON uploads,
+and polling asynchronous tasks with Retry-After headers in both forms and
+waits that back off unless the server says how long to wait.
+"""
+
+import asyncio
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from app.core.mcp_client import MCPClient, _retry_after_seconds
+
+
+def upload_server(requests, rejected_status=None, capabilities=("multipart_upload",)):
+    """Handler for a stand-in server that records /analyze uploads and answers JSON ones."""
+    def handle(request):
+        if request.url.path == "/ping":
+            return httpx.Response(200, json={"capabilities": list(capabilities), "model": "m-1"})
+        multipart = request.headers["content-type"].startswith("multipart/form-data")
+        requests.append(("multipart" if multipart else "json", request.read()))
+        if multipart and rejected_status:
+            return httpx.Response(rejected_status, json={"detail": "Expected a JSON body"})
+        return httpx.Response(200, json={"rules": [{"title": "Clamp placement"}]})
+    return handle
+
+
+def analyze(requests, documents, **client_options):
+    """Send each (content, file_path) document and return the results."""
+    async def scenario():
+        client = MCPClient("http://mcp.test", **client_options)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(requests))
+        async with client:
+            return [
+                await client.analyze_document(content, "spec.pdf", "pdf", file_path=file_path)
+                for content, file_path in documents
+            ]
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("rejected_status", [415, 422])
+def test_rejected_multipart_falls_back_to_json(rejected_status):
+    """A server that advertises multipart but rejects it gets JSON, now and for later documents."""
+    requests = []
+    results = analyze(upload_server(requests, rejected_status), [(b"%PDF-1.4", None), (b"%PDF-1.5", None)])
+
+    assert results == [{"rules": [{"title": "Clamp placement"}]}] * 2
+    assert [transport for transport, _ in requests] == ["multipart", "json", "json"]
+    assert json.loads(requests[1][1])["document"]["content"] == base64.b64encode(b"%PDF-1.4").decode()
+
+
+def test_multipart_streams_stored_file(tmp_path):
+    """Servers that accept multipart receive the raw file, read from its path."""
+    path = tmp_path / "spec.pdf"
+    path.write_bytes(b"%PDF-1.4 stored")
+    requests = []
+    assert analyze(upload_server(requests), [(None, str(path))])[0]["rules"]
+    assert [transport for transport, _ in requests] == ["multipart"]
+    assert b"%PDF-1.4 stored" in requests[0][1]
+
+
+def test_transport_choice():
+    """Servers without the capability get JSON; a forced multipart transport does not fall back."""
+    requests = []
+    analyze(upload_server(requests, capabilities=()), [(b"%PDF-1.4", None)])
+    assert [transport for transport, _ in requests] == ["json"]
+
+    requests = []
+    results = analyze(upload_server(requests, 415), [(b"%PDF-1.4", None)], transport="multipart")
+    assert results[0]["error"].startswith("Error analyzing document: 415")
+    assert [transport for transport, _ in requests] == ["multipart"]
+
+
+def response_with(retry_after=None):
+    headers = {"Retry-After": retry_after} if retry_after is not None else {}
+    return httpx.Response(503, headers=headers)
+
+
+def test_retry_after_seconds():
+    """Delay-seconds values are read as given, never below zero."""
+    assert _retry_after_seconds(response_with("7")) == 7.0
+    assert _retry_after_seconds(response_with("1.5")) == 1.5
+    assert _retry_after_seconds(response_with("-3")) == 0.0
+    assert _retry_after_seconds(response_with()) is None
+    assert _retry_after_seconds(response_with("soon")) is None
+
+
+def test_retry_after_http_date():
+    """HTTP dates count from now; dates in the past mean no wait."""
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    assert 28 <= _retry_after_seconds(response_with(format_datetime(retry_at, usegmt=True))) <= 30
+    assert _retry_after_seconds(response_with("Wed, 21 Oct 2015 07:28:00 GMT")) == 0.0
+
+
+def test_poll_waits_follow_server_hints_then_back_off():
+    """Retry-After and eta_seconds set the next wait; otherwise waits double up to the maximum."""
+    answers = [
+        httpx.Response(503, headers={"Retry-After": "4"}),
+        httpx.Response(200, json={"status": "processing", "eta_seconds": 3}),
+        httpx.Response(200, json={"status": "processing"}),
+        httpx.Response(200, json={"status": "processing"}),
+        httpx.Response(200, json={"status": "processing"}),
+        httpx.Response(200, json={"status": "completed", "result": {"rules": []}})
+    ]
+    waits = []
+
+    async def record_wait(callback_queue, timeout):
+        waits.append(timeout)
+        return None
+
+    async def scenario():
+        client = MCPClient("http://mcp.test", poll_initial_delay=1, poll_max_delay=3)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: answers.pop(0)))
+        client._wait_for_callback = record_wait
+        async with client:
+            return await client._poll_task_result("task-1", retry_after=10)
+
+    assert asyncio.run(scenario()) == {"rules": []}
+    # Hints are capped at poll_max_delay; jittered waits lie between half and all of the delay
+    assert waits[:3] == [3, 3, 3]
+    for wait, delay in zip(waits[3:], (1, 2, 3)):
+        assert delay / 2 <= wait <= delay
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
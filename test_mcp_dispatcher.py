@@ -0,0 +1,128 @@
+# test_mcp_dispatcher.py
+"""
+Tests for the MCP dispatcher's circuit breaker: it opens after repeated
+failures, lets one trial call through once the reset time has passed and
+closes again when the trial succeeds.
+"""
+
+import asyncio
+
+import pytest
+
+from app.core.mcp_dispatcher import MCPDispatcher, CircuitOpenError, CLOSED, OPEN, HALF_OPEN
+
+
+async def fail():
+    raise RuntimeError("MCP server error")
+
+
+async def succeed(seconds=0.0):
+    await asyncio.sleep(seconds)
+    return {"rules": []}
+
+
+def make_dispatcher():
+    """A dispatcher without rate limit whose circuit opens after two failures."""
+    return MCPDispatcher(max_concurrency=4, rate_per_second=0, failure_threshold=2, reset_seconds=0.1)
+
+
+async def open_circuit(dispatcher):
+    for _ in range(dispatcher.failure_threshold):
+        with pytest.raises(RuntimeError):
+            await dispatcher.run(fail)
+
+
+def test_opens_after_failure_threshold():
+    """Failures below the threshold keep it closed; error results count as failures too."""
+    async def scenario():
+        dispatcher = make_dispatcher()
+        with pytest.raises(RuntimeError):
+            await dispatcher.run(fail)
+        assert dispatcher.state == CLOSED
+        await dispatcher.run(lambda: succeed(), is_failure=lambda result: True)
+        assert dispatcher.state == OPEN
+
+        with pytest.raises(CircuitOpenError) as error:
+            await dispatcher.run(succeed)
+        assert 0 < error.value.retry_in <= 0.1
+        assert (dispatcher.failed, dispatcher.rejected) == (2, 1)
+
+    asyncio.run(scenario())
+
+
+def test_success_resets_failure_count():
+    """Only consecutive failures open the circuit."""
+    async def scenario():
+        dispatcher = make_dispatcher()
+        for operation in (fail, succeed, fail):
+            try:
+                await dispatcher.run(operation)
+            except RuntimeError:
+                pass
+        assert dispatcher.state == CLOSED
+        assert dispatcher.stats()["consecutive_failures"] == 1
+
+        with pytest.raises(RuntimeError):
+            await dispatcher.run(fail)
+        assert dispatcher.state == OPEN
+
+    asyncio.run(scenario())
+
+
+def test_single_half_open_trial_closes_on_success():
+    """After the reset time one trial call runs, others are rejected until it succeeds."""
+    async def scenario():
+        dispatcher = make_dispatcher()
+        await open_circuit(dispatcher)
+        await asyncio.sleep(0.15)
+        assert dispatcher.state == HALF_OPEN
+
+        trial = asyncio.create_task(dispatcher.run(lambda: succeed(0.05)))
+        await asyncio.sleep(0.01)
+        with pytest.raises(CircuitOpenError):
+            await dispatcher.run(succeed)
+        await trial
+
+        assert dispatcher.state == CLOSED
+        assert await dispatcher.run(succeed) == {"rules": []}
+
+    asyncio.run(scenario())
+
+
+def test_failed_trial_reopens_circuit():
+    """A failing trial opens the circuit again right away, for a full reset period."""
+    async def scenario():
+        dispatcher = make_dispatcher()
+        await open_circuit(dispatcher)
+        await asyncio.sleep(0.15)
+
+        with pytest.raises(RuntimeError):
+            await dispatcher.run(fail)
+        assert dispatcher.state == OPEN
+        with pytest.raises(CircuitOpenError):
+            await dispatcher.run(succeed)
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_trial_frees_the_slot():
+    """A cancelled trial says nothing about the server; the next call becomes the trial."""
+    async def scenario():
+        dispatcher = make_dispatcher()
+        await open_circuit(dispatcher)
+        await asyncio.sleep(0.15)
+
+        trial = asyncio.create_task(dispatcher.run(lambda: succeed(1)))
+        await asyncio.sleep(0.01)
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+
+        await dispatcher.run(succeed)
+        assert dispatcher.state == CLOSED
+
+    asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
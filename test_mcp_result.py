@@ -0,0 +1,103 @@
+# test_mcp_result.py
+"""
+Tests for the MCP analysis cache: lookups match content, options and model,
+skip expired analyses, and invalidation drops a document's chunks too. The
+client pings for the model once per model_ttl and never uses the cache
+while the model is unknown.
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.core import mcp_client
+from app.database.models import MCPAnalysisResult
+from app.crud.mcp_result import get_mcp_result, save_mcp_result, delete_mcp_results
+
+WEEK = 7 * 24 * 3600
+
+
+def test_lookup_matches_model_and_options(db):
+    """Analyses by another model or with other options are not reused."""
+    save_mcp_result(db, "doc", "options-a", "model-1", {"rules": [1]}, WEEK)
+    save_mcp_result(db, "doc", "options-a", "model-2", {"rules": [2]}, WEEK)
+
+    assert get_mcp_result(db, "doc", "options-a", "model-1").result == {"rules": [1]}
+    assert get_mcp_result(db, "doc", "options-a", "model-2").result == {"rules": [2]}
+    assert get_mcp_result(db, "doc", "options-a", "model-3") is None
+    assert get_mcp_result(db, "doc", "options-b", "model-1") is None
+    assert get_mcp_result(db, "other", "options-a", "model-1") is None
+
+
+def test_expired_analyses_are_skipped_and_dropped(db):
+    """An expired analysis is never returned and is removed on the next save."""
+    save_mcp_result(db, "doc", "options", "model", {"rules": []}, WEEK)
+    db.query(MCPAnalysisResult).update({MCPAnalysisResult.expires_at: datetime.now() - timedelta(seconds=1)})
+    db.commit()
+    assert get_mcp_result(db, "doc", "options", "model") is None
+
+    save_mcp_result(db, "other", "options", "model", {"rules": []}, WEEK)
+    assert [result.content_hash for result in db.query(MCPAnalysisResult)] == ["other"]
+
+
+def test_save_replaces_same_key(db):
+    """Saving again under the same key keeps only the newest analysis."""
+    save_mcp_result(db, "doc", "options", "model", {"rules": [1]}, WEEK)
+    save_mcp_result(db, "doc", "options", "model", {"rules": [2]}, WEEK)
+    assert db.query(MCPAnalysisResult).count() == 1
+    assert get_mcp_result(db, "doc", "options", "model").result == {"rules": [2]}
+
+
+def test_delete_by_document_includes_chunks(db):
+    """Invalidating a document drops its chunk analyses; other documents keep theirs."""
+    save_mcp_result(db, "doc", "options", "model", {}, WEEK)
+    save_mcp_result(db, "chunk-1", "options", "model", {}, WEEK, document_hash="doc")
+    save_mcp_result(db, "other", "options", "model", {}, WEEK)
+
+    assert delete_mcp_results(db, "doc") == 2
+    assert get_mcp_result(db, "other", "options", "model") is not None
+    assert delete_mcp_results(db) == 1
+
+
+def test_client_checks_model_once_and_skips_cache_when_unknown(monkeypatch):
+    """Lookups share one ping per model_ttl; without a model nothing is read or stored."""
+    server = {"model": "model-1", "pings": 0, "analyses": 0}
+    cache = {}
+
+    def handle(request):
+        if request.url.path == "/ping":
+            server["pings"] += 1
+            return httpx.Response(200, json={"model": server["model"]} if server["model"] else {})
+        server["analyses"] += 1
+        return httpx.Response(200, json={"rules": [{"title": "R", "content": "x"}]})
+
+    monkeypatch.setattr(mcp_client, "_load_cached_analysis", lambda content_hash, options_hash, model: cache.get((content_hash, model)))
+    monkeypatch.setattr(mcp_client, "_store_cached_analysis",
+                        lambda content_hash, options_hash, model, result, *args: cache.__setitem__((content_hash, model), result))
+
+    async def scenario():
+        client = mcp_client.MCPClient("http://mcp.test", transport="json", model_ttl=60)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+        async with client:
+            chunks = await asyncio.gather(*(
+                client.extract_rules_with_ai(b"chunk", f"part-{i}.md", "MARKDOWN", content_hash=f"chunk-{i}")
+                for i in range(3)
+            ))
+            assert not any(result["cached"] for result in chunks)
+            assert (await client.extract_rules_with_ai(b"chunk", "part-0.md", "MARKDOWN", content_hash="chunk-0"))["cached"]
+            assert server["pings"] == 1
+
+            server["model"] = None
+            client._model_checked_at = None
+            result = await client.extract_rules_with_ai(b"chunk", "part-0.md", "MARKDOWN", content_hash="chunk-0")
+            assert not result["cached"]
+
+    asyncio.run(scenario())
+    assert server["analyses"] == 4
+    assert set(cache) == {(f"chunk-{i}", "model-1") for i in range(3)}
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
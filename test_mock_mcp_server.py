@@ -0,0 +1,50 @@
+# test_mock_mcp_server.py
+"""
+Tests for the stand-in MCP server: MCPClient analyzes documents through it
+in sync and async mode, and injected failures surface as errors.
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.core.mcp_client import MCPClient
+from benchmark_mcp import start_stand_in
+from mock_mcp_server import StandInSettings
+
+
+async def analyze(settings, **client_options):
+    """Analyze a small document through a fresh stand-in server."""
+    async with MCPClient(start_stand_in(settings), poll_initial_delay=0.05, **client_options) as client:
+        assert await client.ping()
+        return client, await client.extract_rules_with_ai(b"%PDF-1.4 stand-in", "spec.pdf", "PDF")
+
+
+def test_sync_multipart():
+    """A 200 answer carries the configured number of rules and images."""
+    client, result = asyncio.run(analyze(StandInSettings(latency=0.05, rules=3, images=1, image_bytes=100, model="m-7")))
+    assert (client.model, client.capabilities) == ("m-7", ["multipart_upload"])
+    assert [rule["rule_type"] for rule in result["rules"]] == ["esd", "latchup", "general"]
+    assert len(result["images"][0]["image_data"]) == 100
+
+
+def test_async_json_tasks():
+    """A 202 answer is polled on /tasks until the task finishes or fails."""
+    settings = StandInSettings(mode="async", latency=0.2, jitter=0, rules=2, multipart=False)
+    _, result = asyncio.run(analyze(settings, poll_max_delay=0.1))
+    assert "error" not in result and len(result["rules"]) == 2
+
+    _, result = asyncio.run(analyze(StandInSettings(mode="async", latency=0.1, task_failure_rate=1.0), poll_max_delay=0.1))
+    assert result["error"] == "Stand-in task failure"
+
+    _, result = asyncio.run(analyze(StandInSettings(error_rate=1.0)))
+    assert "500" in result["error"]
+
+
+if __name__ == "__main__":
+    test_sync_multipart()
+    test_async_json_tasks()
+    print("All stand-in MCP server tests passed")
@@ -0,0 +1,120 @@
+# test_parse_result.py
+"""
+Tests for the parse cache: output is keyed by content hash, parser and
+PARSER_VERSION, a hit skips the parser, and images only replaced output
+referred to are deleted once they are older than the grace period.
+"""
+
+import asyncio
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core import document_processing
+from app.core.blob_store import BlobStore
+from app.crud import parse_result
+from app.crud.parse_result import save_parse_result, delete_parse_results, get_parse_result
+from app.database.models import ImportedDocument, ParseResult, ValidationQueue
+from app.parsers.excel_parser import ExcelParser
+from app.parsers.pdf_parser import PDFParser
+
+
+def output(*keys):
+    images = [{"filename": f"image_{i}.png", "blob_key": key} for i, key in enumerate(keys)]
+    return {"rules": [], "metadata": {}, "images": images, "image_count": len(images)}
+
+
+def age(store, key, seconds):
+    """Backdate a blob as if it had been written seconds ago."""
+    written = time.time() - seconds
+    os.utime(store.path(key), (written, written))
+
+
+def test_cache_key_is_hash_parser_and_version(db, tmp_path, monkeypatch):
+    """Output is only served for the same content, parser and parser version."""
+    monkeypatch.setattr(document_processing, "blob_store", BlobStore(str(tmp_path)))
+    monkeypatch.setattr(document_processing, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    save_parse_result(db, "doc", "PDFParser", PDFParser.PARSER_VERSION, output())
+
+    assert document_processing.get_cached_result("doc", PDFParser) == output()
+    assert document_processing.get_cached_result("other", PDFParser) is None
+    assert document_processing.get_cached_result(None, PDFParser) is None
+    assert document_processing.get_cached_result("doc", ExcelParser) is None
+    monkeypatch.setattr(PDFParser, "PARSER_VERSION", PDFParser.PARSER_VERSION + ".1")
+    assert document_processing.get_cached_result("doc", PDFParser) is None
+
+
+def test_new_parser_version_replaces_output(db):
+    """Saving output of another version drops the old one; deleting drops every parser's output."""
+    save_parse_result(db, "doc", "PDFParser", "1", output())
+    save_parse_result(db, "doc", "ExcelParser", "1", output())
+    save_parse_result(db, "doc", "PDFParser", "2", output())
+
+    assert get_parse_result(db, "doc", "PDFParser", "1") is None
+    assert get_parse_result(db, "doc", "PDFParser", "2") is not None
+    assert db.query(ParseResult).count() == 2
+    assert delete_parse_results(db, "doc") == 2
+    assert db.query(ParseResult).count() == 0
+
+
+def test_parse_job_uses_cached_output(db, tmp_path, monkeypatch):
+    """A cache hit queues the stored rules without starting a worker process."""
+    monkeypatch.setattr(document_processing, "blob_store", BlobStore(str(tmp_path)))
+    monkeypatch.setattr(document_processing, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    monkeypatch.setattr(document_processing.job_manager, "submit", None)
+    db.get(ImportedDocument, 1).content_hash = "doc"
+    db.commit()
+    rules = [{"title": "Clamp placement", "content": "Place clamps close to the pad", "confidence": 0.9}]
+    save_parse_result(db, "doc", "PDFParser", PDFParser.PARSER_VERSION, {**output(), "rules": rules})
+
+    db_job = SimpleNamespace(id=1, document_id=1, attempts=1, max_attempts=3)
+    result = asyncio.run(document_processing.run_parse_job(db_job))
+    assert (result["source"], result["rules_extracted"], result["rules_queued"]) == ("cache", 1, 1)
+    assert db.query(ValidationQueue).one().extracted_content["title"] == "Clamp placement"
+
+
+def test_replaced_images_are_deleted_after_grace_period(db, tmp_path):
+    """Images only older output used go; shared and recently written ones stay."""
+    store = BlobStore(str(tmp_path))
+    old, shared, recent = store.put(b"old image"), store.put(b"shared image"), store.put(b"recent image")
+    save_parse_result(db, "doc", "PDFParser", "1", output(old, shared, recent), image_store=store)
+    for key in (old, shared):
+        age(store, key, parse_result.IMAGE_GRACE_SECONDS + 1)
+
+    save_parse_result(db, "doc", "PDFParser", "2", output(shared), image_store=store)
+    assert not store.exists(old)
+    assert store.exists(shared)
+    # A parse still running may be about to store output that refers to it
+    assert store.exists(recent)
+
+
+def test_writing_a_blob_again_restarts_its_grace_period(db, tmp_path):
+    """A parse that writes an existing image protects it from deletion."""
+    store = BlobStore(str(tmp_path))
+    key = store.put(b"image")
+    save_parse_result(db, "doc", "PDFParser", "1", output(key), image_store=store)
+    age(store, key, parse_result.IMAGE_GRACE_SECONDS + 1)
+
+    assert store.put(b"image") == key
+    delete_parse_results(db, "doc", image_store=store)
+    assert store.exists(key)
+
+
+def test_cached_output_with_missing_images_is_a_miss(db, tmp_path, monkeypatch):
+    """Output whose image blobs were deleted is not served from the cache."""
+    store = BlobStore(str(tmp_path))
+    monkeypatch.setattr(document_processing, "blob_store", store)
+    monkeypatch.setattr(document_processing, "SessionLocal", sessionmaker(bind=db.get_bind()))
+    key = store.put(b"image")
+    save_parse_result(db, "doc", "PDFParser", PDFParser.PARSER_VERSION, output(key))
+
+    assert document_processing.get_cached_result("doc", PDFParser)["images"][0]["blob_key"] == key
+    store.delete(key)
+    assert document_processing.get_cached_result("doc", PDFParser) is None
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
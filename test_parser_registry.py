@@ -0,0 +1,91 @@
+# test_parser_registry.py
+"""
+Tests for the parser registry: format detection from extension and magic
+bytes, and the Markdown and CSV parsers reading the exports we produce.
+"""
+
+import csv
+import io
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.parsers import parser_registry, PDFParser, ExcelParser, MarkdownParser, CSVParser
+
+
+def test_detect():
+    """Extensions choose the parser; content must match and unknown extensions are sniffed."""
+    assert parser_registry.detect("spec.pdf", b"%PDF-1.7\n") is PDFParser
+    assert parser_registry.detect("spec.PDF", b"garbage") is None
+    assert parser_registry.detect("rules.xlsx", b"PK\x03\x04") is ExcelParser
+    assert parser_registry.detect("rules.csv", b"Rule ID,Title\n") is CSVParser
+    assert parser_registry.detect("rules.csv", b"\xd0\xcf\x11\xe0\x00\x00") is None
+    # Without an extension only unambiguous magic bytes identify a format
+    assert parser_registry.detect("scan", b"%PDF-1.4") is PDFParser
+    assert parser_registry.detect("archive", b"PK\x03\x04") is None
+    assert parser_registry.detect("notes.txt", b"plain text") is None
+    assert parser_registry.for_document_type("MARKDOWN") is MarkdownParser
+
+
+def test_csv_export():
+    """The rule export's CSV layout maps Title and Content, not Rule ID."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(["Rule ID", "Type", "Title", "Content", "Explanation", "Severity", "Category", "Technology"])
+    writer.writerow(["ESD-001", "esd", "Clamp placement", "Place clamps, as close as possible,\nto the pad", "", "high", "IO", "28nm"])
+    writer.writerow(["LATCHUP-002", "latchup", "Guard rings", "Surround drivers with guard rings", "", "medium", "IO", "28nm"])
+    writer.writerow(["GENERAL-003", "general", "", "", "", "", "", ""])
+
+    parser = CSVParser(file_content=output.getvalue().encode("utf-8-sig"))
+    rules = parser.extract_rules()
+
+    assert [rule["title"] for rule in rules] == ["Clamp placement", "Guard rings"]
+    assert rules[0]["content"] == "Place clamps, as close as possible,\nto the pad"
+    assert [rule["rule_type"] for rule in rules] == ["esd", "latchup"]
+    assert (rules[1]["severity"], rules[1]["row"]) == ("medium", 3)
+    assert parser.extract_metadata()["rows"] == 3
+
+
+def test_csv_semicolons_and_cp1252():
+    """Excel's semicolon CSVs in Windows-1252 are read too."""
+    data = "Title;Description\nRésumé rule;Keep µ-vias out of the ESD path\n".encode("cp1252")
+    rules = CSVParser(file_content=data).extract_rules()
+    assert rules[0]["title"] == "Résumé rule"
+    assert rules[0]["content"] == "Keep µ-vias out of the ESD path"
+
+
+def test_markdown():
+    """Numbered headings and rule tables both become rules with their line numbers."""
+    text = "\n".join([
+        "# 28nm ESD Guidelines",
+        "",
+        "### 2.1 Clamp placement",
+        "Clamps shall be placed within 50 um of the pad.",
+        "",
+        "| Rule ID | Description | Severity |",
+        "|---------|:------------|----------|",
+        "| LU-1 | Guard rings shall surround every driver against latchup | high |",
+        "",
+        "### 2.2 Latchup spacing",
+        "Keep 10 um between NMOS and PMOS.",
+    ])
+    parser = MarkdownParser(file_content=text.encode("utf-8"))
+    rules = parser.extract_rules()
+
+    assert [(rule["title"], rule["line"]) for rule in rules] == [
+        ("2.1 Clamp placement", 3), ("2.2 Latchup spacing", 10), ("LU-1", 8)
+    ]
+    assert "Guard rings" not in rules[0]["content"]
+    assert "Rule ID" not in rules[0]["content"]
+    assert rules[2]["rule_type"] == "latchup"
+    assert parser.extract_metadata() == {"lines": 11, "headings": 3, "title": "28nm ESD Guidelines"}
+
+
+if __name__ == "__main__":
+    test_detect()
+    test_csv_export()
+    test_csv_semicolons_and_cp1252()
+    test_markdown()
+    print("All parser registry tests passed")
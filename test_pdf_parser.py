@@ -0,0 +1,127 @@
+# test_pdf_parser.py
+"""
+Tests for the PDF parser: page ranges, page provenance of text offsets,
+how many processes extract text, and image extraction.
+"""
+
+import io
+
+import PyPDF2
+import pytest
+from PIL import Image
+from PyPDF2.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from app.core.job_manager import JobManager
+from app.parsers import pdf_parser
+from app.parsers.pdf_parser import PDFParser, parse_page_range
+
+
+def build_text_pdf(texts):
+    """A PDF with one line of Helvetica text per page."""
+    writer = PyPDF2.PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica")
+    }))
+    for text in texts:
+        writer.add_blank_page(width=612, height=792)
+        page = writer.pages[-1]
+        content = DecodedStreamObject()
+        content.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+    output = io.BytesIO()
+    writer.write(output)
+    return output.getvalue()
+
+PAGES = ["Page one", "Page two", "Page three", "Page four"]
+
+
+@pytest.mark.parametrize("value, expected", [("12", (12, 12)), ("5-7", (5, 7)), (" 2 - 3 ", (2, 3))])
+def test_parse_page_range(value, expected):
+    assert parse_page_range(value) == expected
+
+
+@pytest.mark.parametrize("value", ["", "a", "0", "3-2", "1-2-3", "-2"])
+def test_parse_page_range_rejects(value):
+    with pytest.raises(ValueError):
+        parse_page_range(value)
+
+
+def test_page_range_and_offsets():
+    """Only pages in the range are extracted; offsets in the full text map back to their one-based page."""
+    parser = PDFParser(file_content=build_text_pdf(PAGES), page_range=(2, 3))
+    assert parser.extract_page_texts() == [{"page": 2, "text": "Page two"}, {"page": 3, "text": "Page three"}]
+
+    full_text = parser._extract_full_text()
+    assert full_text == "Page two\n\nPage three\n\n"
+    assert parser.page_for_offset(0) == 2
+    assert parser.page_for_offset(full_text.index("three")) == 3
+    assert parser.page_for_offset(len(full_text)) == 3
+
+
+def test_parallel_extraction_matches_serial(monkeypatch):
+    """Pages extracted on a process pool come back in page order."""
+    monkeypatch.setattr(pdf_parser, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_parser, "PDF_PAGE_CHUNK_SIZE", 1)
+    data = build_text_pdf(PAGES)
+
+    parallel = PDFParser(file_content=data, max_workers=2).extract_page_texts()
+    assert parallel == PDFParser(file_content=data, max_workers=1).extract_page_texts()
+    assert [page["text"] for page in parallel] == PAGES
+
+
+def test_text_workers_default_to_job_share(monkeypatch):
+    """Inside a job, text extraction uses the job's share of the CPUs unless PDF_TEXT_WORKERS is set."""
+    monkeypatch.setattr(pdf_parser, "PDF_TEXT_WORKERS", 0)
+    monkeypatch.setattr(pdf_parser.os, "cpu_count", lambda: 8)
+    data = build_text_pdf(PAGES[:1])
+    assert JobManager(max_workers=2).cpus_per_job == 4
+    assert JobManager(max_workers=16).cpus_per_job == 1
+
+    monkeypatch.delenv("DOCUMENT_JOB_CPUS", raising=False)
+    assert PDFParser(file_content=data).max_workers == 8
+    monkeypatch.setenv("DOCUMENT_JOB_CPUS", "4")
+    assert PDFParser(file_content=data).max_workers == 4
+    monkeypatch.setattr(pdf_parser, "PDF_TEXT_WORKERS", 2)
+    assert PDFParser(file_content=data).max_workers == 2
+
+
+def build_image_pdf(sizes):
+    """A PDF with one JPEG image of each size, one per page."""
+    images = [Image.new("RGB", size, "red") for size in sizes]
+    output = io.BytesIO()
+    images[0].save(output, "PDF", save_all=True, append_images=images[1:])
+    return output.getvalue()
+
+
+def test_images_per_page_with_size_filter():
+    """Images are read page by page; those below min_image_dimension are skipped."""
+    data = build_image_pdf([(40, 30), (10, 80)])
+
+    images = list(PDFParser(file_content=data).iter_images())
+    assert [(image["page"], image["filename"], image["mime_type"], image["width"], image["height"])
+            for image in images] == [
+        (1, "image_page1_0.jpg", "image/jpeg", 40, 30), (2, "image_page2_0.jpg", "image/jpeg", 10, 80)
+    ]
+    assert Image.open(io.BytesIO(images[0]["image_data"])).size == (40, 30)
+
+    images = list(PDFParser(file_content=data, min_image_dimension=20).iter_images())
+    assert [image["page"] for image in images] == [1]
+
+
+def test_image_byte_budget_truncates():
+    """Extraction stops before the image that would exceed max_image_bytes."""
+    data = build_image_pdf([(40, 30), (40, 30)])
+    first = next(PDFParser(file_content=data).iter_images())
+
+    parser = PDFParser(file_content=data, max_image_bytes=len(first["image_data"]) + 1)
+    assert len(parser.extract_images()) == 1
+    assert parser.images_truncated
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))
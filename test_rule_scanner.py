@@ -0,0 +1,71 @@
+# test_rule_scanner.py
+"""
+Regression tests for the shared rule boundary scanner.
+The corpus in samples/rule_scanner_corpus.json pins the expected rules for each case.
+"""
+
+import json
+import sys
+from pathlib import Path
+
+# Add the app directory to the path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.parsers.rule_scanner import RuleScanner, RULE_TITLE_PATTERN
+
+CORPUS_PATH = Path(__file__).parent / "samples" / "rule_scanner_corpus.json"
+
+
+def load_corpus():
+    """Load the regression corpus."""
+    with open(CORPUS_PATH, "r") as f:
+        return json.load(f)
+
+
+def test_corpus():
+    """Every corpus case should produce exactly its expected rules."""
+    scanner = RuleScanner()
+    for case in load_corpus():
+        rules = scanner.scan(case["text"], kinds=case["kinds"])
+        found = [
+            {"kind": rule["kind"], "title": rule["title"], "content": rule["content"]}
+            for rule in rules
+        ]
+        assert found == case["expected"], f"Corpus case '{case['name']}' changed: {found}"
+
+
+def test_spans_cover_source_text():
+    """Rule offsets should point back at the heading and body in the source text."""
+    scanner = RuleScanner()
+    for case in load_corpus():
+        text = case["text"]
+        for rule in scanner.scan(text, kinds=case["kinds"]):
+            assert rule["start"] < rule["end"] <= len(text)
+            assert rule["content"] in text[rule["start"]:rule["end"]]
+
+
+def test_rule_title_pattern():
+    """Numbered paragraph titles are recognised, prose is not."""
+    assert RULE_TITLE_PATTERN.match("Rule 4 Clamp spacing")
+    assert RULE_TITLE_PATTERN.match("3.2 Guard rings")
+    assert RULE_TITLE_PATTERN.match("5. Power domains")
+    assert not RULE_TITLE_PATTERN.match("All IO pins need protection")
+
+
+def test_long_text_is_linear():
+    """A long document without a terminating heading should scan quickly."""
+    import time
+    
+    text = "Rule 1: Start\n" + ("filler text with 1.5 um numbers " * 20 + "\n") * 20000
+    started = time.time()
+    rules = RuleScanner().scan(text)
+    assert len(rules) == 1
+    assert time.time() - started < 5
+
+
+if __name__ == "__main__":
+    test_corpus()
+    test_spans_cover_source_text()
+    test_rule_title_pattern()
+    test_long_text_is_linear()
+    print("All rule scanner tests passed")
@@ -0,0 +1,83 @@
+# test_stats_service.py
+"""
+Tests for the dashboard stats service: grouped counts, reuse within the
+TTL and invalidation when rules or validation items are committed.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.database.models import Rule, RuleType, ValidationQueue, ValidationStatus
+from app.core.stats_service import StatsService, stats_service, RULE_STATS
+from app.crud.candidate import save_candidates
+
+
+@pytest.fixture(autouse=True)
+def rules(db):
+    """Three active rules on two technologies and one inactive rule."""
+    db.add_all([
+        Rule(technology_id=1, rule_type=RuleType.ESD, title="A", content="x", is_active=True),
+        Rule(technology_id=1, rule_type=RuleType.LATCHUP, title="B", content="x", is_active=True),
+        Rule(technology_id=2, rule_type=RuleType.ESD, title="C", content="x", is_active=True),
+        Rule(technology_id=2, rule_type=RuleType.GENERAL, title="D", content="x", is_active=False)
+    ])
+    db.commit()
+
+
+@pytest.fixture
+def queries(db):
+    """SQL statements issued on the database from the start of the test."""
+    statements = []
+    event.listen(db.get_bind(), "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+    return statements
+
+
+def test_grouped_counts(db):
+    """Rule counts come per type and technology; inactive rules are left out."""
+    stats = StatsService(ttl_seconds=0).rule_stats(db)
+    assert (stats["total"], stats["esd"], stats["latchup"], stats["general"]) == (3, 2, 1, 0)
+    assert stats["by_technology"][2] == {"total": 1, "esd": 1, "latchup": 0, "general": 0}
+
+
+def test_cached_until_commit(db, queries):
+    """Counts are reused until a commit changes the counted rows, even in bulk."""
+    assert stats_service.validation_status_counts(db)["total"] == 0
+    issued = len(queries)
+    assert stats_service.validation_status_counts(db)["pending"] == 0
+    assert len(queries) == issued
+
+    save_candidates(db, 1, [{"title": "R", "content": "x"}] * 3, "parser")
+    assert stats_service.validation_status_counts(db)["pending"] == 3
+
+    db.query(ValidationQueue).update({ValidationQueue.validation_status: ValidationStatus.APPROVED})
+    db.commit()
+    assert stats_service.validation_status_counts(db)["approved"] == 3
+
+    assert stats_service.rule_stats(db)["total"] == 3
+    db.add(Rule(technology_id=1, rule_type=RuleType.GENERAL, title="E", content="x", is_active=True))
+    db.rollback()
+    assert stats_service.rule_stats(db)["total"] == 3
+    db.add(Rule(technology_id=1, rule_type=RuleType.GENERAL, title="E", content="x", is_active=True))
+    db.commit()
+    assert stats_service.rule_stats(db)["general"] == 1
+
+
+def test_count_computed_before_invalidation_is_not_stored(db):
+    """A count that was being computed when the rows changed is returned but not cached."""
+    service = StatsService(ttl_seconds=60)
+    counted = []
+
+    def count_then_commit(session):
+        counted.append(len(counted))
+        if len(counted) == 1:
+            # Another request commits a change while this count runs
+            service.invalidate(RULE_STATS)
+        return counted[-1]
+
+    assert service._cached(db, RULE_STATS, count_then_commit) == 0
+    assert service._cached(db, RULE_STATS, count_then_commit) == 1
+    assert service._cached(db, RULE_STATS, count_then_commit) == 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(pytest.main([__file__]))